@@ -22,6 +22,7 @@ import argparse
 import logging
 import sys
 
+from hockepy import nhl, trace
 from hockepy.commands import get_commands
 from hockepy.config import init_config
 from hockepy.log import init_log
@@ -60,6 +61,10 @@ def run_hockepy():
                         help='turn debug output on')
     parser.add_argument('-v', '--verbose', action='store_true',
                         dest='verbose', help='turn verbose output on')
+    parser.add_argument('--trace', dest='trace', default=None,
+                        metavar='FILE',
+                        help='write a trace of the run to FILE (viewable '
+                             'in chrome://tracing or Perfetto)')
     subparsers = parser.add_subparsers(dest='command_name')
 
     cmds = get_commands()
@@ -72,8 +77,16 @@ def run_hockepy():
 
     logging.debug('Discovered commands: %s', cmds.keys())
     # Initialize and run the requested command.
-    command = cmds[args.command_name](args)
-    command.run()
+    if args.trace:
+        trace.enable()
+    try:
+        with trace.span('command', command=args.command_name):
+            command = cmds[args.command_name](args)
+            command.run()
+    finally:
+        nhl.save_cache_stats()
+        if args.trace:
+            trace.write(args.trace)
     sys.exit(0)
 
 
@@ -0,0 +1,350 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.archive
+---------------
+
+This module implements an archive of successive live feed snapshots.
+
+Every polled snapshot of a game's live feed is kept for replays and
+debugging. To keep the archive small, a snapshot is stored in full only
+once in a while (a keyframe) - the others are stored as JSON deltas
+against the previous snapshot. Unchanged snapshots are not stored at all.
+Each frame is compressed on its own (see hockepy.cache.compress()).
+
+An archive consists of two files - the frames and an index of fixed-size
+records (time, offset and size of a frame and whether it's a keyframe).
+The index allows for random access to the snapshot at any time: the
+nearest preceding keyframe is read and (at most KEYFRAME_INTERVAL)
+deltas are applied to it. Several processes may record the same game -
+appends are serialized by a lock of the index.
+
+These interfaces are implemented:
+- KEYFRAME_INTERVAL is the default number of frames between keyframes
+- diff() returns a delta between two JSON documents
+- patch() applies a delta to a JSON document
+- archive_path() returns path to the archive of a game
+- IndexRecord named tuple describes a stored frame
+- FeedArchive class reads an archive of a game
+- FeedRecorder class records snapshots to archives
+"""
+
+import bisect
+import collections
+import contextlib
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from hockepy.cache import compress, decompress
+from hockepy.schema import loads
+
+# Every KEYFRAME_INTERVAL-th frame is a keyframe.
+KEYFRAME_INTERVAL = 50
+
+# Maximum number of games whose last snapshots a recorder keeps.
+MAX_GAMES = 32
+
+# suffixes of the frames and index files
+DATA_SUFFIX = '.data'
+INDEX_SUFFIX = '.index'
+
+# index record: time (seconds since the epoch), offset and size of the
+# frame, keyframe flag
+INDEX_RECORD = struct.Struct('<dQI?')
+
+# Delta operations - a dictionary delta maps changed keys to deltas of
+# their values, other deltas are lists starting with an operation.
+REPLACE = '='
+REMOVE = '-'
+APPEND = '+'
+ITEMS = '@'
+
+IndexRecord = collections.namedtuple(
+    'IndexRecord', ['time', 'offset', 'size', 'keyframe'])
+
+# The last frame of an archive as known to a recorder - its raw and
+# decoded snapshot, number of frames since the last keyframe, size of the
+# index after the frame and time of the frame.
+_LastFrame = collections.namedtuple(
+    '_LastFrame', ['body', 'doc', 'frames', 'index_size', 'time'])
+
+
+def diff(old, new):
+    """Return a delta turning the old JSON document into the new one.
+
+    Return None if the documents are equal. Dictionaries are compared
+    key by key, lists growing at the end (like plays of a live feed) are
+    stored as the appended items only, lists of the same length item by
+    item. Anything else is replaced as a whole.
+    """
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta = {key: [REMOVE] for key in old if key not in new}
+        for key, value in new.items():
+            if key not in old:
+                delta[key] = [REPLACE, value]
+            else:
+                value_delta = diff(old[key], value)
+                if value_delta is not None:
+                    delta[key] = value_delta
+        return delta
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) < len(new) and old == new[:len(old)]:
+            return [APPEND, new[len(old):]]
+        if len(old) == len(new):
+            return [ITEMS, {str(idx): diff(old_item, new_item)
+                            for idx, (old_item, new_item)
+                            in enumerate(zip(old, new))
+                            if old_item != new_item}]
+    return [REPLACE, new]
+
+
+def patch(doc, delta):
+    """Return the JSON document with the delta (see diff()) applied.
+
+    The given document is not modified, unchanged parts are shared with
+    the returned one though.
+    """
+    if delta is None:
+        return doc
+    if isinstance(delta, dict):
+        doc = dict(doc)
+        for key, value_delta in delta.items():
+            if value_delta == [REMOVE]:
+                del doc[key]
+            else:
+                doc[key] = patch(doc.get(key), value_delta)
+        return doc
+    operation = delta[0]
+    if operation == REPLACE:
+        return delta[1]
+    if operation == APPEND:
+        return doc + delta[1]
+    if operation == ITEMS:
+        doc = list(doc)
+        for idx, item_delta in delta[1].items():
+            doc[int(idx)] = patch(doc[int(idx)], item_delta)
+        return doc
+    raise ValueError(f'Unknown delta operation: {operation!r}.')
+
+
+def archive_path(directory, game_id, projected=False):
+    """Return path (without suffix) to the archive of the given game.
+
+    Projected feeds (e.g. 'current' - see hockepy.nhl.feed_url()) are
+    archived separately from full feeds.
+    """
+    name = f'{game_id}-{projected}' if projected else str(game_id)
+    return os.path.join(os.path.expanduser(directory), name)
+
+
+@contextlib.contextmanager
+def _locked_index(path):
+    """Open the index of the archive at path for appending and lock it.
+
+    The lock is exclusive (and blocking) where fcntl is available. A
+    partially written record at the end of the index is cut off.
+    """
+    with open(path + INDEX_SUFFIX, 'ab') as index_file:
+        if fcntl is not None:
+            fcntl.flock(index_file.fileno(), fcntl.LOCK_EX)
+        size = os.fstat(index_file.fileno()).st_size
+        if size % INDEX_RECORD.size:
+            index_file.truncate(size - size % INDEX_RECORD.size)
+        yield index_file
+        # the lock is released by closing the file
+
+
+class FeedArchive:
+    """Archive of live feed snapshots of a game (read-only).
+
+    Only frames that are indexed are read - a frame written by a process
+    that crashed before updating the index is ignored.
+    """
+
+    def __init__(self, path):
+        """Open the archive at path (without suffix, see archive_path())."""
+        self.path = path
+        with open(path + INDEX_SUFFIX, 'rb') as index_file:
+            index = index_file.read()
+        # a partially written record is ignored
+        index = index[:len(index) - len(index) % INDEX_RECORD.size]
+        self.index = [IndexRecord(*record)
+                      for record in INDEX_RECORD.iter_unpack(index)]
+        self.times = [record.time for record in self.index]
+
+    def __len__(self):
+        """Return the number of snapshots in the archive."""
+        return len(self.index)
+
+    def _read_frames(self, data_file, records):
+        """Yield decoded frames of the given index records."""
+        for record in records:
+            data_file.seek(record.offset)
+            yield record, loads(decompress(data_file.read(record.size)))
+
+    def _replay(self, first, last):
+        """Yield (time, snapshot) of frames first to last (inclusive).
+
+        Snapshots are restored from the keyframe preceding the first one.
+        """
+        start = first
+        while not self.index[start].keyframe:
+            start -= 1
+        snapshot = None
+        with open(self.path + DATA_SUFFIX, 'rb') as data_file:
+            frames = self._read_frames(data_file,
+                                       self.index[start:last + 1])
+            for idx, (record, frame) in enumerate(frames, start):
+                snapshot = frame if record.keyframe else patch(snapshot,
+                                                               frame)
+                if idx >= first:
+                    yield record.time, snapshot
+
+    def __iter__(self):
+        """Yield (time, snapshot) of all snapshots in chronological order."""
+        if self.index:
+            yield from self._replay(0, len(self.index) - 1)
+
+    def snapshot_at(self, timestamp):
+        """Return the snapshot at the given time (seconds since the epoch).
+
+        That is the last snapshot recorded at or before the time or None
+        if there is no such snapshot.
+        """
+        idx = bisect.bisect_right(self.times, timestamp) - 1
+        if idx < 0:
+            return None
+        for _, snapshot in self._replay(idx, idx):
+            return snapshot
+        return None
+
+
+class FeedRecorder:
+    """Recorder of live feed snapshots to archives in a directory.
+
+    The last snapshots of up to MAX_GAMES recently recorded games are
+    kept in memory to compute deltas against. Appending to an archive is
+    serialized across processes by an exclusive lock of its index (on
+    platforms providing fcntl). If the archive has been appended to by
+    someone else since the recorder's last frame (or the recorder has
+    not seen the archive yet), the delta is computed against the last
+    archived snapshot instead. Times in an index never decrease - a frame
+    recorded earlier than the last indexed one gets its time. It's safe
+    to share a recorder across threads.
+    """
+
+    def __init__(self, directory, keyframe_interval=KEYFRAME_INTERVAL):
+        """Initialize the recorder storing archives in directory."""
+        self.directory = os.path.expanduser(directory)
+        self.keyframe_interval = keyframe_interval
+        # archive path -> _LastFrame of the recorder's last frame
+        self._last = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def archive(self, game_id, projected=False):
+        """Return FeedArchive of the given game."""
+        return FeedArchive(archive_path(self.directory, game_id, projected))
+
+    def record(self, game_id, body, projected=False, timestamp=None):
+        """Record a snapshot (raw live feed) of the given game.
+
+        Timestamp (seconds since the epoch) is the current time by
+        default. Return True if a frame was stored, False if the
+        snapshot has not changed since the last snapshot in the archive.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        path = archive_path(self.directory, game_id, projected)
+        with self._lock:
+            last = self._last.get(path)
+            if last is not None and last.body == body:
+                return False
+            doc = loads(body)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with _locked_index(path) as index_file:
+                index_size = os.fstat(index_file.fileno()).st_size
+                if last is None or last.index_size != index_size:
+                    # appended by someone else (or not seen yet)
+                    last = self._last_archived(path, body, index_size)
+                if last is not None and last.doc == doc:
+                    self._remember(path, last._replace(body=body))
+                    return False
+                if last is None or last.frames + 1 >= self.keyframe_interval:
+                    frame, keyframe, frames = body, True, 0
+                else:
+                    delta = diff(last.doc, doc)
+                    frame = json.dumps(delta, separators=(',', ':')).encode()
+                    keyframe, frames = False, last.frames + 1
+                if last is not None:
+                    timestamp = max(timestamp, last.time)
+                index_size = self._append(path, index_file, compress(frame),
+                                          timestamp, keyframe)
+            self._remember(path, _LastFrame(body, doc, frames, index_size,
+                                            timestamp))
+        logging.debug('Recorded %s of game %s.',
+                      'a keyframe' if keyframe else 'a delta', game_id)
+        return True
+
+    def _remember(self, path, last):
+        """Keep the last frame of the archive at path in memory."""
+        self._last[path] = last
+        self._last.move_to_end(path)
+        if len(self._last) > MAX_GAMES:
+            self._last.popitem(last=False)
+
+    @staticmethod
+    def _last_archived(path, body, index_size):
+        """Return _LastFrame of the last snapshot in the archive or None.
+
+        The raw body of the archived snapshot is not known, the given one
+        is used instead.
+        """
+        if not index_size:
+            return None
+        try:
+            feed_archive = FeedArchive(path)
+            if not feed_archive.index:
+                return None
+            # frames since the last keyframe
+            frames = 0
+            while not feed_archive.index[-1 - frames].keyframe:
+                frames += 1
+            doc = feed_archive.snapshot_at(math.inf)
+        except (OSError, ValueError) as err:
+            logging.warning('Unable to read the archive %r: %s', path, err)
+            return None
+        return _LastFrame(body, doc, frames, index_size,
+                          feed_archive.times[-1])
+
+    @staticmethod
+    def _append(path, index_file, frame, timestamp, keyframe):
+        """Append the frame to the archive and index it.
+
+        Return the new size of the index.
+        """
+        with open(path + DATA_SUFFIX, 'ab') as data_file:
+            offset = data_file.tell()
+            data_file.write(frame)
+        index_file.write(INDEX_RECORD.pack(timestamp, offset, len(frame),
+                                           keyframe))
+        index_file.flush()
+        return os.fstat(index_file.fileno()).st_size
@@ -0,0 +1,296 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.broadcast
+-----------------
+
+This module implements a server pushing live score updates to clients.
+
+Games of the day are polled once no matter how many clients are
+connected - the schedule is reloaded every now and then and games that
+are live or about to start are refreshed from their live feeds (see
+nhl.refresh()) in between. Clients connect over HTTP and receive
+Server-Sent Events: a snapshot of all the games first and then only
+deltas (changed fields of changed games). Everything runs in a single
+asyncio event loop, blocking retrieval is done in a worker thread, so
+thousands of idle connections cost next to nothing.
+
+Events (the data are JSON objects):
+- 'snapshot' - {"games": [game, ...]} sent once after connecting
+- 'game' - {"game_id": ID, field: value, ...} changed fields of a game
+  (all fields for a new game)
+
+These interfaces are implemented:
+- game_to_dict() converts a Game to a JSON serializable dictionary
+- game_delta() returns changed fields of a game
+- format_event() formats a Server-Sent Event
+- Broadcaster class polls games and pushes updates to clients
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+
+from hockepy import nhl
+from hockepy.game import GameStatus
+from hockepy.prefetch import PREFETCH_LEAD
+
+# Default number of seconds between two refreshes of the games.
+POLL_INTERVAL = 10
+
+# Default number of seconds between two reloads of the whole schedule.
+RELOAD_INTERVAL = 10 * 60
+
+# Number of seconds between two keep-alive comments sent to clients.
+KEEPALIVE_INTERVAL = 15
+
+# Maximum number of events queued for a single client - slower clients
+# are disconnected.
+MAX_QUEUED = 100
+
+# Maximum number of seconds to wait for a client to accept sent data -
+# stalled clients are disconnected.
+DRAIN_TIMEOUT = 30
+
+# Path of the event stream.
+EVENTS_PATH = '/events'
+
+DATE_FMT = '%Y-%m-%d'
+
+_KEEPALIVE = b': keepalive\n\n'
+
+
+def game_to_dict(game):
+    """Return the Game as a JSON serializable dictionary."""
+    data = game._asdict()
+    data['time'] = None if game.time is None else game.time.isoformat()
+    data['type'] = str(game.type)
+    data['status'] = str(game.status)
+    if game.last_play is not None:
+        data['last_play'] = game.last_play._asdict()
+    return data
+
+
+def game_delta(old, new):
+    """Return changed fields of the game (as game_to_dict() does).
+
+    All fields are returned if there's no old game. The game's ID is
+    always included. Return None if nothing changed.
+    """
+    new_data = game_to_dict(new)
+    if old is None:
+        return new_data
+    old_data = game_to_dict(old)
+    delta = {field: value for field, value in new_data.items()
+             if old_data[field] != value}
+    if not delta:
+        return None
+    delta['game_id'] = new.game_id
+    return delta
+
+
+def format_event(event, data):
+    """Return a Server-Sent Event (bytes) with JSON data."""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'.encode()
+
+
+def _today():
+    """Return today's date as a string."""
+    return datetime.date.today().strftime(DATE_FMT)
+
+
+class Broadcaster:
+    """Server polling the games of the day and pushing updates.
+
+    Each connected client has a queue of encoded events, events are
+    encoded once for all the clients.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL,
+                 reload_interval=RELOAD_INTERVAL):
+        """Initialize the broadcaster, see serve() to run it."""
+        self.interval = interval
+        self.reload_interval = reload_interval
+        # game ID -> Game of the current day
+        self.games = {}
+        self._clients = set()
+        self._date = None
+        self._reloaded = None
+
+    @property
+    def client_count(self):
+        """Return the number of connected clients."""
+        return len(self._clients)
+
+    def _disconnect(self, queue):
+        """Make the handler of the client with the queue stop."""
+        self._clients.discard(queue)
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def disconnect_all(self):
+        """Disconnect all the clients."""
+        for queue in list(self._clients):
+            self._disconnect(queue)
+
+    def publish(self, data):
+        """Queue the encoded event for all the clients.
+
+        Clients not keeping up are disconnected.
+        """
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                logging.info('Disconnecting a slow client.')
+                self._disconnect(queue)
+
+    def update(self, games):
+        """Update the known games and publish the changes.
+
+        Return the number of changed games.
+        """
+        changed = 0
+        for game in games:
+            delta = game_delta(self.games.get(game.game_id), game)
+            self.games[game.game_id] = game
+            if delta is not None:
+                self.publish(format_event('game', delta))
+                changed += 1
+        return changed
+
+    def _due_schedule(self, now=None):
+        """Return the games due for a refresh as a schedule.
+
+        That is a schedule (see nhl.refresh()) of the live games and the
+        games starting within PREFETCH_LEAD seconds (or that should have
+        started already) - other games are only updated by reloads.
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        soon = now + datetime.timedelta(seconds=PREFETCH_LEAD)
+        return {self._date: [
+            game for game in self.games.values()
+            if game.status == GameStatus.LIVE
+            or (game.status == GameStatus.SCHEDULED
+                and game.time is not None and game.time <= soon)]}
+
+    async def poll(self):
+        """Reload or refresh the games once.
+
+        The schedule is reloaded every reload_interval seconds (and when
+        the day changes), games due for a refresh (see _due_schedule())
+        are refreshed otherwise.
+        """
+        loop = asyncio.get_running_loop()
+        today = _today()
+        now = loop.time()
+        if (today != self._date or self._reloaded is None
+                or now - self._reloaded >= self.reload_interval):
+            schedule = await loop.run_in_executor(
+                None, nhl.get_schedule, today, today)
+            if today != self._date:
+                self.games = {}
+                self._date = today
+            self._reloaded = now
+            games = [game for day in (schedule or {}).values()
+                     for game in day]
+        else:
+            schedule = self._due_schedule()
+            games = schedule[self._date]
+            if games:
+                await loop.run_in_executor(None, nhl.refresh, schedule)
+        changed = self.update(games)
+        logging.debug('Polled %d game(s), %d changed, %d client(s).',
+                      len(games), changed, self.client_count)
+
+    async def run_poller(self):
+        """Keep polling the games every interval seconds."""
+        while True:
+            try:
+                await self.poll()
+            except (OSError, ValueError) as err:
+                # network errors (requests' exceptions are OSErrors) and
+                # malformed responses must not stop the server
+                logging.warning('Polling failed: %s', err)
+            await asyncio.sleep(self.interval)
+
+    async def run_keepalive(self):
+        """Keep the clients' connections alive."""
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            self.publish(_KEEPALIVE)
+
+    async def handle(self, reader, writer):
+        """Handle a client's connection."""
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError):
+            writer.close()
+            return
+        parts = request.split(b' ', 2)
+        path = parts[1].decode(errors='replace') if len(parts) > 1 else ''
+        if parts[0] != b'GET' or path.split('?', 1)[0] != EVENTS_PATH:
+            writer.write(b'HTTP/1.1 404 Not Found\r\n'
+                         b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            await self._close(writer)
+            return
+
+        queue = asyncio.Queue(MAX_QUEUED)
+        writer.write(b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'Connection: keep-alive\r\n\r\n')
+        writer.write(format_event('snapshot', {
+            'games': [game_to_dict(game) for game in self.games.values()]}))
+        self._clients.add(queue)
+        try:
+            while True:
+                await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+                data = await queue.get()
+                if data is None:
+                    break
+                writer.write(data)
+        except ConnectionError:
+            pass
+        except asyncio.TimeoutError:
+            logging.info('Disconnecting a stalled client.')
+            # closing would wait for the buffered data to be sent
+            writer.transport.abort()
+        finally:
+            self._clients.discard(queue)
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer):
+        """Close the connection ignoring errors."""
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """Serve clients (and poll the games) until cancelled."""
+        server = await asyncio.start_server(self.handle, host, port)
+        logging.info('Broadcasting on %s.', ', '.join(
+            str(sock.getsockname()) for sock in server.sockets))
+        tasks = [asyncio.create_task(self.run_poller()),
+                 asyncio.create_task(self.run_keepalive())]
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.disconnect_all()
@@ -0,0 +1,374 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.cache
+-------------
+
+This module implements a persistent cache of NHL API responses.
+
+Response bodies are stored compressed - using zstd if the zstandard
+package is installed, gzip otherwise. Decompression is transparent and
+works for both formats no matter which one is used for writing.
+
+These interfaces are implemented:
+- compress() compresses data using the preferred format
+- decompress() decompresses data in any of the supported formats
+- read_file() reads a (possibly compressed) file
+- content_size() returns size of a file's decompressed contents
+- write_file() atomically writes a compressed file
+- CacheEntry named tuple describes a cached body
+- ResponseCache class stores response bodies keyed by URLs
+"""
+
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# magic numbers of the supported formats
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# size of the gzip header and trailer (i.e. of gzip compressed nothing)
+GZIP_MIN_SIZE = 18
+
+# file name suffix of cached bodies
+SUFFIX = '.zst' if zstandard is not None else '.gz'
+
+# name of the file with lookup statistics (in the cache directory)
+STATS_FILE = 'stats'
+
+# outcomes of lookups counted by ResponseCache
+LOOKUPS = ('hit', 'stale', 'miss')
+
+# Leftover temporary files (of interrupted writes) older than this (in
+# seconds) are removed by ResponseCache.prune().
+TMP_MAX_AGE = 60 * 60
+
+# A cache with max_size is pruned once bodies of this fraction of its
+# max_size have been written since the last pruning (the first write of
+# a process prunes it as well).
+PRUNE_FRACTION = 0.1
+
+CacheEntry = collections.namedtuple('CacheEntry', ['path', 'size', 'mtime'])
+
+
+def compress(data):
+    """Compress data (bytes) using zstd if available, gzip otherwise."""
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    # repetitive JSON compresses well even with a fast level
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data):
+    """Decompress data compressed by zstd or gzip.
+
+    Data not compressed by any of them are returned as they are.
+    """
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError('zstandard package is needed to decompress '
+                             'zstd compressed data.')
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    return data
+
+
+def read_file(path):
+    """Return (decompressed) contents of the given file."""
+    with open(path, 'rb') as data_file:
+        return decompress(data_file.read())
+
+
+def content_size(path):
+    """Return size of the decompressed contents of the given file.
+
+    The size is read from the zstd frame header or the gzip trailer (it's
+    modulo 4 GiB there) without decompressing the file. Return None if
+    the size is not known (e.g. zstandard package is not installed).
+    """
+    with open(path, 'rb') as data_file:
+        head = data_file.read(len(ZSTD_MAGIC))
+        if head.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                return None
+            data_file.seek(0)
+            # a frame header takes at most 18 bytes
+            size = zstandard.frame_content_size(data_file.read(18))
+            return size if size >= 0 else None
+        size = data_file.seek(0, os.SEEK_END)
+        if not head.startswith(GZIP_MAGIC):
+            return size
+        if size < GZIP_MIN_SIZE:
+            # truncated
+            return None
+        data_file.seek(size - 4)
+        return struct.unpack('<I', data_file.read(4))[0]
+
+
+def write_file(path, data):
+    """Atomically write compressed data to the given file.
+
+    Return size of the compressed data.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    compressed = compress(data)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(compressed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(compressed)
+
+
+class ResponseCache:
+    """Persistent cache of response bodies keyed by URLs.
+
+    Each body is stored compressed in its own file in the given
+    directory. The file's modification time is the time the body was
+    retrieved. If max_size (in bytes) is given, the oldest bodies are
+    removed on writes to keep the cache about that size (see
+    PRUNE_FRACTION). Outcomes of lookups (see LOOKUPS) are counted and
+    can be added to the statistics persisted in the directory (see
+    save_stats()). It's safe to share a cache across threads.
+    """
+
+    def __init__(self, directory, max_size=None):
+        """Initialize the cache in the given directory."""
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+        self.lookups = dict.fromkeys(LOOKUPS, 0)
+        self._lock = threading.Lock()
+        # bytes written since the last pruning (None before the first one)
+        self._written = None
+
+    def _count(self, lookup):
+        """Count a lookup with the given outcome."""
+        with self._lock:
+            self.lookups[lookup] += 1
+
+    def path(self, key):
+        """Return path to the file for the given key (URL)."""
+        digest = hashlib.sha1(key.encode(), usedforsecurity=False)
+        name = digest.hexdigest()
+        return os.path.join(self.directory, name[:2], name + SUFFIX)
+
+    def _find(self, key):
+        """Return path to an existing file for the key or None.
+
+        Files written in the other supported format are found as well.
+        """
+        path = self.path(key)
+        if os.path.exists(path):
+            return path
+        base = path[:-len(SUFFIX)]
+        for suffix in ('.zst', '.gz'):
+            if os.path.exists(base + suffix):
+                return base + suffix
+        return None
+
+    def age(self, key):
+        """Return age (in seconds) of the cached body or None."""
+        path = self._find(key)
+        if path is None:
+            return None
+        try:
+            return max(0.0, time.time() - os.path.getmtime(path))
+        except OSError:
+            return None
+
+    def get(self, key, max_age=math.inf):
+        """Return the cached body for the key or None.
+
+        Bodies older than max_age seconds are ignored.
+        """
+        path = self._find(key)
+        if path is None:
+            self._count('miss')
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                self._count('stale')
+                return None
+            body = read_file(path)
+        except (OSError, ValueError) as err:
+            logging.debug('Unable to read cached %r: %s', key, err)
+            self._count('miss')
+            return None
+        self._count('hit')
+        return body
+
+    def put(self, key, body):
+        """Store the body for the key."""
+        try:
+            size = write_file(self.path(key), body)
+            logging.debug('Cached %r (%d bytes stored as %d bytes).',
+                          key, len(body), size)
+        except OSError as err:
+            logging.warning('Unable to cache %r: %s', key, err)
+            return
+        if self.max_size:
+            self._enforce_max_size(size)
+
+    def _enforce_max_size(self, size):
+        """Account a written body of the size and prune if it's due."""
+        with self._lock:
+            if self._written is not None:
+                self._written += size
+                if self._written < self.max_size * PRUNE_FRACTION:
+                    return
+            self._written = 0
+        try:
+            self.prune(max_size=self.max_size)
+        except OSError as err:
+            logging.warning('Unable to prune the cache: %s', err)
+
+    def entries(self):
+        """Yield CacheEntry named tuples of all cached bodies."""
+        try:
+            subdirs = [entry.path for entry in os.scandir(self.directory)
+                       if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            try:
+                files = list(os.scandir(subdir))
+            except FileNotFoundError:
+                continue
+            for entry in files:
+                if entry.name.startswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield CacheEntry(entry.path, stat.st_size, stat.st_mtime)
+
+    def _remove_tmp_files(self, now):
+        """Remove temporary files left behind by interrupted writes."""
+        try:
+            subdirs = [entry.path for entry in os.scandir(self.directory)
+                       if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        for subdir in subdirs:
+            try:
+                files = list(os.scandir(subdir))
+            except FileNotFoundError:
+                # removed by a concurrent prune
+                continue
+            for entry in files:
+                try:
+                    if (entry.name.startswith('.tmp')
+                            and now - entry.stat().st_mtime > TMP_MAX_AGE):
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def prune(self, max_age=None, max_size=None, now=None):
+        """Remove cached bodies to respect the given limits.
+
+        Bodies older than max_age seconds are removed, then the oldest
+        ones are removed until all of them take at most max_size bytes.
+        Return a tuple of the number of removed bodies and their size.
+        """
+        now = time.time() if now is None else now
+        self._remove_tmp_files(now)
+        entries = sorted(self.entries(), key=lambda entry: entry.mtime)
+        total = sum(entry.size for entry in entries)
+        removed = freed = 0
+        for entry in entries:
+            if ((max_age is None or now - entry.mtime <= max_age)
+                    and (max_size is None or total - freed <= max_size)):
+                # entries are sorted from the oldest so the rest is kept
+                break
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+            removed += 1
+            freed += entry.size
+        if removed:
+            for entry in os.scandir(self.directory):
+                if entry.is_dir():
+                    try:
+                        os.rmdir(entry.path)
+                    except OSError:
+                        # not empty
+                        pass
+        logging.info('Pruned %d cached bodies (%d bytes).', removed, freed)
+        return removed, freed
+
+    def _stats_path(self):
+        """Return path to the file with persisted lookup statistics."""
+        return os.path.join(self.directory, STATS_FILE)
+
+    def _read_stats(self):
+        """Return the persisted lookup statistics."""
+        try:
+            stats = json.loads(read_file(self._stats_path()))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            logging.warning('Unable to read cache statistics: %s', err)
+            return {}
+        return stats
+
+    def load_stats(self):
+        """Return lookup statistics.
+
+        That is a dictionary mapping outcomes (see LOOKUPS) to their
+        counts - the persisted ones together with those not saved yet.
+        """
+        stats = self._read_stats()
+        with self._lock:
+            return {lookup: stats.get(lookup, 0) + self.lookups[lookup]
+                    for lookup in LOOKUPS}
+
+    def save_stats(self):
+        """Add the counted lookups to the persisted statistics.
+
+        The counts are reset then. Concurrent saves by several processes
+        may lose some counts - the statistics are meant to be indicative.
+        """
+        with self._lock:
+            counts = self.lookups
+            self.lookups = dict.fromkeys(LOOKUPS, 0)
+        if not any(counts.values()):
+            return
+        stats = self._read_stats()
+        stats = {lookup: stats.get(lookup, 0) + counts[lookup]
+                 for lookup in LOOKUPS}
+        try:
+            write_file(self._stats_path(), json.dumps(stats).encode())
+        except OSError as err:
+            logging.warning('Unable to save cache statistics: %s', err)
+            with self._lock:
+                for lookup in LOOKUPS:
+                    self.lookups[lookup] += counts[lookup]
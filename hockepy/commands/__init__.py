@@ -17,7 +17,14 @@ a function to retrieve all available (sub)commands.
 """
 
 from hockepy.commands.base_command import BaseCommand
+from hockepy.commands.boxscore import Boxscore
+from hockepy.commands.broadcast import Broadcast
+from hockepy.commands.cache import Cache
+from hockepy.commands.odds import Odds
+from hockepy.commands.prefetch import Prefetch
+from hockepy.commands.ratings import Ratings
 from hockepy.commands.schedule import Schedule
+from hockepy.commands.shots import Shots
 from hockepy.commands.today import Today
 
 
@@ -0,0 +1,153 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.boxscore
+-------------------------
+
+This module defines class for boxscore command.
+
+The purpose of this command is to retrieve and print box scores (team and
+player stats) of a game or of all games played on the given date(s).
+"""
+
+import datetime
+import logging
+
+from hockepy import nhl
+from hockepy.commands import BaseCommand
+from hockepy.game import GameStatus
+from hockepy.utils import exit_error
+
+
+class Boxscore(BaseCommand):
+    """Boxscore command.
+
+    Accepts the following arguments:
+    - first_date or game ID (positional)
+    - last_date (positional)
+    - --totals
+    """
+
+    _COMMAND = 'boxscore'
+    DATE_FMT = '%Y-%m-%d'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Print box scores of a game or of games on given dates.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('first_date', default=None, nargs='?',
+                            help='game ID or first date to get box scores '
+                                 'for (default: today)')
+        parser.add_argument('last_date', default=None, nargs='?',
+                            help='last date to get box scores for')
+        parser.add_argument('--totals', dest='totals', action='store_true',
+                            help='print team totals only')
+        return parser
+
+    @staticmethod
+    def format_team(box):
+        """Return lines with the team's totals."""
+        return [
+            f'{box.team}: {box.goals} G, {box.shots} S, {box.hits} H, '
+            f'{box.pim} PIM, PP {box.pp_goals}/{box.pp_opportunities}, '
+            f'FO {box.faceoff_pct:.1f}%'
+        ]
+
+    @staticmethod
+    def format_players(box):
+        """Return lines with the team's player stats."""
+        name_width = max((len(player.name) for player in box.players),
+                         default=0)
+        lines = []
+        for player in box.players:
+            prefix = (f'  {player.number:>2} {player.position:<2} '
+                      f'{player.name:<{name_width}} {player.toi:>5}')
+            if player.saves is None:
+                lines.append(f'{prefix} {player.goals} G {player.assists} A '
+                             f'{player.shots} S {player.pim} PIM '
+                             f'{player.plus_minus:+d}')
+            else:
+                lines.append(f'{prefix} {player.saves}/{player.shots} SV')
+        return lines
+
+    def print_boxscore(self, title, box):
+        """Print the given box score with the given title."""
+        print(title)
+        if box is None:
+            print('  Box score not available.')
+        else:
+            for team in (box.away, box.home):
+                lines = self.format_team(team)
+                if not self.args.totals:
+                    lines.extend(self.format_players(team))
+                print('\n'.join(lines))
+        print('')
+
+    def get_games(self):
+        """Return a list of (title, game ID, max_age) of wanted dates."""
+        first_date = self.args.first_date
+        if first_date is None:
+            first_date = datetime.date.today().strftime(self.DATE_FMT)
+        last_date = self.args.last_date or first_date
+        try:
+            datetime.datetime.strptime(first_date, self.DATE_FMT)
+            datetime.datetime.strptime(last_date, self.DATE_FMT)
+        except ValueError:
+            exit_error(f'Dates must be in {self.DATE_FMT!r} format.')
+
+        games = []
+        for day in nhl.get_schedule_days(first_date, last_date) or ():
+            for game in day.games:
+                status = nhl.get_status(game.status_code)
+                if status in (GameStatus.SCHEDULED, GameStatus.POSTPONED):
+                    continue
+                title = (f'{day.date}: {game.away} {game.away_score} @ '
+                         f'{game.home} {game.home_score} ({status})')
+                games.append((title, game.game_id, nhl.feed_max_age(status)))
+        return games
+
+    def print_game(self, game_id):
+        """Print the box score of the given game with its status."""
+        try:
+            game = nhl.get_game_boxscore(game_id, False)
+        except OSError as err:
+            # requests' exceptions are OSErrors
+            logging.debug('Unable to retrieve box score of %s: %s',
+                          game_id, err)
+            game = None
+        if game is None:
+            self.print_boxscore(f'Game {game_id}', None)
+        else:
+            status, box = game
+            self.print_boxscore(f'Game {game_id} ({status})', box)
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        first_date = self.args.first_date
+        if first_date is not None and first_date.isdigit():
+            self.print_game(int(first_date))
+            return
+
+        games = self.get_games()
+        if not games:
+            print('No games at all.')
+            return
+
+        boxscores = nhl.get_boxscores({game_id: max_age
+                                       for _, game_id, max_age in games})
+        for title, game_id, _ in games:
+            self.print_boxscore(title, boxscores[game_id])
@@ -0,0 +1,68 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.broadcast
+--------------------------
+
+This module defines class for broadcast command.
+
+The purpose of this command is to run a server pushing live score updates
+of today's games to any number of clients (see hockepy.broadcast).
+"""
+
+import asyncio
+import logging
+
+from hockepy import broadcast
+from hockepy.commands import BaseCommand
+
+
+class Broadcast(BaseCommand):
+    """Broadcast command.
+
+    Accepts the following arguments:
+    - --host
+    - --port
+    - --interval
+    """
+
+    _COMMAND = 'broadcast'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Push live score updates to clients (Server-Sent Events).'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('--host', dest='host', default='127.0.0.1',
+                            help='address to listen on '
+                                 '(default: %(default)s)')
+        parser.add_argument('--port', dest='port', type=int, default=8080,
+                            help='port to listen on (default: %(default)s)')
+        parser.add_argument('--interval', dest='interval', type=float,
+                            default=broadcast.POLL_INTERVAL,
+                            help='seconds between two refreshes of the '
+                                 'games (default: %(default)s)')
+        return parser
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        broadcaster = broadcast.Broadcaster(self.args.interval)
+        print(f'Streaming events at http://{self.args.host}:'
+              f'{self.args.port}{broadcast.EVENTS_PATH}')
+        try:
+            asyncio.run(broadcaster.serve(self.args.host, self.args.port))
+        except KeyboardInterrupt:
+            logging.info('Broadcast interrupted.')
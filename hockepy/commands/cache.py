@@ -0,0 +1,226 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.cache
+----------------------
+
+This module defines class for cache command.
+
+The purpose of this command is to manage the response cache (see
+hockepy.cache) - to warm it for a period (e.g. ahead of game nights),
+to prune it to size and age limits and to print its statistics.
+"""
+
+import datetime
+import logging
+import re
+import time
+
+from hockepy import prefetch
+from hockepy.cache import ResponseCache, content_size
+from hockepy.commands import BaseCommand
+from hockepy.config import CONF
+from hockepy.nhl import FEED_WORKERS
+from hockepy.utils import exit_error, season_dates
+
+
+class Cache(BaseCommand):
+    """Cache command.
+
+    Accepts the following actions and their arguments:
+    - warm (first_date, last_date, --season, --workers)
+    - prune (--max-age, --max-size)
+    - stats
+    """
+
+    _COMMAND = 'cache'
+    DATE_FMT = '%Y-%m-%d'
+
+    SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    AGE_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Warm, prune or describe the response cache.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        actions = parser.add_subparsers(dest='action', required=True)
+
+        warm = actions.add_parser('warm', help='retrieve schedules and '
+                                  'feeds of finished games of a period')
+        warm.add_argument('first_date', default=None, nargs='?',
+                          help='first date to warm the cache for')
+        warm.add_argument('last_date', default=None, nargs='?',
+                          help='last date to warm the cache for')
+        warm.add_argument('--season', dest='season', type=int, default=None,
+                          metavar='YEAR',
+                          help='warm the whole season starting in YEAR')
+        warm.add_argument('--workers', dest='workers', type=int,
+                          default=None,
+                          help='number of concurrent requests '
+                               f'(default: {FEED_WORKERS})')
+
+        prune = actions.add_parser('prune', help='remove old cached '
+                                   'responses')
+        prune.add_argument('--max-age', dest='max_age', default=None,
+                           type=cls.parse_age,
+                           help='remove responses older than this (e.g. '
+                                '30d, 12h or seconds)')
+        prune.add_argument('--max-size', dest='max_size', default=None,
+                           type=cls.parse_size,
+                           help='remove the oldest responses to fit into '
+                                'this size (e.g. 500M, 2G or bytes)')
+
+        actions.add_parser('stats', help='print hit rate, size and '
+                           'compression ratio of the cache')
+        return parser
+
+    @classmethod
+    def _parse_number(cls, text, units, what):
+        """Parse a number with an optional unit suffix."""
+        match = re.fullmatch(r'\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]?)\s*',
+                             text.lower())
+        if not match or match.group(2) not in units:
+            raise ValueError(f'Invalid {what}: {text!r}.')
+        return float(match.group(1)) * units[match.group(2)]
+
+    @classmethod
+    def parse_age(cls, text):
+        """Parse age like '30d', '12h', '15m' or '600' (seconds).
+
+        Return the age in seconds.
+        """
+        return cls._parse_number(text, cls.AGE_UNITS, 'age')
+
+    @classmethod
+    def parse_size(cls, text):
+        """Parse size like '500M', '2G', '64k' or '1000' (bytes).
+
+        Return the size in bytes.
+        """
+        return int(cls._parse_number(text, cls.SIZE_UNITS, 'size'))
+
+    @staticmethod
+    def format_size(size):
+        """Return the size (in bytes) in a human readable form."""
+        if size < 1024:
+            return f'{size} B'
+        for unit in ('kB', 'MB'):
+            size /= 1024
+            if size < 1024:
+                return f'{size:.1f} {unit}'
+        return f'{size / 1024:.1f} GB'
+
+    @staticmethod
+    def entry_status(age):
+        """Return status of a cached response of the given age.
+
+        The status is by age only - what kind of response an entry is
+        (and so its TTL) is not known without decompressing it. Responses
+        are 'fresh' if they are not older than 'schedule_ttl' (schedules
+        and feeds of upcoming games are used without revalidation),
+        'stale' if they are not older than 'max_stale' (schedules may be
+        printed while being revalidated) and 'old' otherwise. Old entries
+        are not necessarily useless - feeds and box scores of final games
+        and settled past schedules are used no matter how old they are.
+        """
+        if age <= (CONF.get('schedule_ttl') or 0):
+            return 'fresh'
+        if age <= (CONF.get('max_stale') or 0):
+            return 'stale'
+        return 'old'
+
+    def get_dates(self):
+        """Return (first, last) dates to warm the cache for."""
+        if self.args.season is not None:
+            return season_dates(self.args.season)
+        first = self.args.first_date
+        if first is None:
+            first = datetime.date.today().strftime(self.DATE_FMT)
+        last = self.args.last_date or first
+        try:
+            datetime.datetime.strptime(first, self.DATE_FMT)
+            datetime.datetime.strptime(last, self.DATE_FMT)
+        except ValueError:
+            exit_error(f'Dates must be in {self.DATE_FMT!r} format.')
+        return first, last
+
+    def warm(self):
+        """Warm the cache for the requested period."""
+        first, last = self.get_dates()
+        days, feeds = prefetch.warm(first, last, self.args.workers)
+        print(f'Warmed schedules of {days} day(s) and {feeds} feed(s) '
+              f'({first} - {last}).')
+
+    def prune(self, cache):
+        """Prune the cache to the requested limits."""
+        if self.args.max_age is None and self.args.max_size is None:
+            exit_error('Use --max-age and/or --max-size to prune the cache.')
+        removed, freed = cache.prune(self.args.max_age, self.args.max_size)
+        print(f'Removed {removed} response(s) ({self.format_size(freed)}).')
+
+    def stats(self, cache):
+        """Print statistics of the cache."""
+        lookups = cache.load_stats()
+        total = sum(lookups.values())
+        rate = f'{100 * lookups["hit"] / total:.1f}%' if total else 'n/a'
+        print(f'Lookups: {total} (hit rate {rate})')
+        for lookup, count in lookups.items():
+            print(f'  {lookup:<6} {count:>8}')
+
+        now = time.time()
+        counts = {'fresh': 0, 'stale': 0, 'old': 0}
+        sizes = dict.fromkeys(counts, 0)
+        # sizes of entries whose decompressed size is known
+        stored = raw = 0
+        for entry in cache.entries():
+            status = self.entry_status(now - entry.mtime)
+            counts[status] += 1
+            sizes[status] += entry.size
+            try:
+                entry_raw = content_size(entry.path)
+            except OSError:
+                # removed since listed
+                entry_raw = None
+            if entry_raw is not None:
+                stored += entry.size
+                raw += entry_raw
+        print(f'Entries: {sum(counts.values())} '
+              f'({self.format_size(sum(sizes.values()))})')
+        for status, count in counts.items():
+            print(f'  {status:<6} {count:>8} '
+                  f'{self.format_size(sizes[status]):>10}')
+        print(f'  (by age: fresh <= {CONF.get("schedule_ttl") or 0} s, '
+              f'stale <= {CONF.get("max_stale") or 0} s; final games are '
+              'used at any age)')
+        ratio = f'{raw / stored:.1f}x' if stored else 'n/a'
+        print(f'Compression: {self.format_size(raw)} stored as '
+              f'{self.format_size(stored)} (ratio {ratio})')
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command (%s).', self.command,
+                      self.args.action)
+        if not CONF.get('cache_dir'):
+            exit_error('There is no cache (see cache_dir).')
+
+        if self.args.action == 'warm':
+            self.warm()
+            return
+        cache = ResponseCache(CONF['cache_dir'])
+        if self.args.action == 'prune':
+            self.prune(cache)
+        else:
+            self.stats(cache)
@@ -0,0 +1,122 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.odds
+---------------------
+
+This module defines class for odds command.
+
+The purpose of this command is to simulate the rest of the regular season
+(see hockepy.odds) and print playoff odds of all teams.
+"""
+
+import logging
+
+from hockepy import nhl, odds, teams
+from hockepy.commands import BaseCommand
+from hockepy.config import CONF
+from hockepy.game import Game, GameStatus, GameType
+from hockepy.utils import exit_error, season_dates
+
+
+class Odds(BaseCommand):
+    """Odds command.
+
+    Accepts the following arguments:
+    - --sims
+    - --workers
+    - --seed
+    """
+
+    _COMMAND = 'odds'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Simulate the rest of the season and print playoff odds.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('--sims', dest='sims', type=int, default=100000,
+                            help='number of simulated seasons '
+                                 '(default: 100000)')
+        parser.add_argument('--workers', dest='workers', type=int, default=1,
+                            help='number of worker processes, 0 means all '
+                                 'CPUs (default: 1)')
+        parser.add_argument('--seed', dest='seed', type=int, default=None,
+                            help='random seed (for reproducible results)')
+        return parser
+
+    @staticmethod
+    def get_conferences():
+        """Return a dictionary mapping team IDs to their conferences."""
+        nhl.get_teams()
+        return {team.id: team.conference for team in teams.get_teams()
+                if team.conference}
+
+    @staticmethod
+    def get_games():
+        """Return regular season games of the current season.
+
+        The schedule is retrieved without live feeds. Last plays (needed
+        to tell overtime losses) are retrieved for final games only -
+        concurrently and cached forever.
+        """
+        days = nhl.get_schedule_days(*season_dates(),
+                                     max_age=CONF.get('schedule_ttl'))
+        games = [game for day in days or () for game in day.games
+                 if nhl.get_type(game.game_type) == GameType.REGULAR]
+        last_plays = nhl.get_last_plays(
+            [game.game_id for game in games
+             if nhl.get_status(game.status_code) == GameStatus.FINAL],
+            max_age=nhl.FOREVER)
+        return [Game(home=teams.register(game.home_id, game.home),
+                     away=teams.register(game.away_id, game.away),
+                     home_score=game.home_score,
+                     away_score=game.away_score, time=game.time,
+                     type=GameType.REGULAR,
+                     status=nhl.get_status(game.status_code),
+                     last_play=last_plays.get(game.game_id),
+                     home_id=game.home_id, away_id=game.away_id,
+                     game_id=game.game_id)
+                for game in games]
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        if odds.numpy is None:
+            exit_error('NumPy is needed to simulate playoff odds.')
+        if self.args.sims <= 0:
+            exit_error('The number of simulations must be positive.')
+
+        games = self.get_games()
+        if not games:
+            print('No games at all.')
+            return
+        standings = odds.get_standings(games)
+        remaining = odds.get_remaining(games)
+        probs = odds.simulate(standings, remaining, sims=self.args.sims,
+                              conferences=self.get_conferences(),
+                              workers=self.args.workers,
+                              seed=self.args.seed)
+
+        names = {team_id: teams.team_name(team_id) or str(team_id)
+                 for team_id in probs}
+        width = max(len(name) for name in names.values())
+        for team_id in sorted(probs, key=lambda team_id: (
+                -probs[team_id], -standings.points[team_id],
+                names[team_id])):
+            print(f'{names[team_id]:<{width}} '
+                  f'{standings.points[team_id]:>3} pts '
+                  f'{standings.played[team_id]:>2} GP '
+                  f'{100 * probs[team_id]:5.1f}%')
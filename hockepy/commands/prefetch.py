@@ -0,0 +1,75 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.prefetch
+-------------------------
+
+This module defines class for prefetch command.
+
+The purpose of this command is to warm the response cache ahead of time
+(see hockepy.prefetch) - either once (e.g. from cron) or continuously as
+a daemon.
+"""
+
+import logging
+
+from hockepy import prefetch
+from hockepy.commands import BaseCommand
+from hockepy.config import CONF
+from hockepy.utils import exit_error
+
+
+class Prefetch(BaseCommand):
+    """Prefetch command.
+
+    Accepts the following arguments:
+    - --daemon
+    - --days
+    - --lead
+    """
+
+    _COMMAND = 'prefetch'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Warm the cache with upcoming schedules and live feeds.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('--daemon', dest='daemon', action='store_true',
+                            help='keep running and warm the cache ahead of '
+                                 'each game')
+        parser.add_argument('--days', dest='days', type=int, default=1,
+                            help='number of days after today to prefetch '
+                                 'the schedule for (default: %(default)s)')
+        parser.add_argument('--lead', dest='lead', type=int,
+                            default=prefetch.PREFETCH_LEAD // 60,
+                            help='minutes before a game starts to prefetch '
+                                 'its live feed (default: %(default)s)')
+        return parser
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        if not CONF.get('cache_dir'):
+            exit_error('Prefetching needs the cache (see cache_dir).')
+
+        lead = self.args.lead * 60
+        if self.args.daemon:
+            try:
+                prefetch.run_daemon(self.args.days, lead)
+            except KeyboardInterrupt:
+                logging.info('Prefetch daemon interrupted.')
+        else:
+            prefetch.prefetch(self.args.days, lead)
@@ -0,0 +1,94 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.ratings
+------------------------
+
+This module defines class for ratings command.
+
+The purpose of this command is to update persisted team ratings (see
+hockepy.ratings) with new results and print them.
+"""
+
+import datetime
+import logging
+
+from hockepy import ratings, teams
+from hockepy.commands import BaseCommand
+from hockepy.config import CONF
+from hockepy.utils import exit_error
+
+
+class Ratings(BaseCommand):
+    """Ratings command.
+
+    Accepts the following arguments:
+    - --since
+    - --reset
+    """
+
+    _COMMAND = 'ratings'
+    DATE_FMT = '%Y-%m-%d'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Update team ratings with new results and print them.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('--since', dest='since', default=None,
+                            help='first date to read results from (default: '
+                                 'the last applied result or a year ago)')
+        parser.add_argument('--reset', dest='reset', action='store_true',
+                            help='start from scratch instead of updating '
+                                 'the persisted ratings')
+        return parser
+
+    def get_start_date(self, state):
+        """Return the first date results should be read from."""
+        if self.args.since is not None:
+            try:
+                datetime.datetime.strptime(self.args.since, self.DATE_FMT)
+            except ValueError:
+                exit_error(f'Dates must be in {self.DATE_FMT!r} format.')
+            return self.args.since
+        if state.watermark is not None:
+            # the watermark's time is in UTC while schedule days are
+            # local to the league, so an evening game may be scheduled
+            # a day earlier - games applied already are skipped by the
+            # watermark anyway
+            watermark_date = state.watermark[0].date()
+            return (watermark_date - datetime.timedelta(days=1)).strftime(
+                self.DATE_FMT)
+        year_ago = datetime.date.today() - datetime.timedelta(days=365)
+        return year_ago.strftime(self.DATE_FMT)
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        if not CONF.get('ratings_file'):
+            exit_error('Ratings are disabled (see ratings_file).')
+
+        state = None if self.args.reset else ratings.load_ratings()
+        state = state or ratings.Ratings()
+        start_date = self.get_start_date(state)
+        end_date = datetime.date.today().strftime(self.DATE_FMT)
+        applied = ratings.backfill(state, start_date, end_date)
+        logging.info('Applied %d new result(s).', applied)
+        state.save()
+
+        for team_id, rating in sorted(state.ratings.items(),
+                                      key=lambda item: -item[1]):
+            name = teams.team_name(team_id) or str(team_id)
+            print(f'{rating:7.1f} {name}')
@@ -20,20 +20,34 @@ games scheduled for the given date (default is today).
 
 import datetime
 import logging
+import re
+import sys
+from time import monotonic
 
-from hockepy import nhl
+import requests
+
+from hockepy import nhl, prefetch
+from hockepy.ratings import load_ratings
+from hockepy.render import ScheduleRenderer
 from hockepy.config import CONF
 from hockepy.commands import BaseCommand
-from hockepy.game import has_started, GameStatus
-from hockepy.utils import (bold_text, bold_escape_seq_width, exit_error,
-                           local_timezone)
+from hockepy.transport import OfflineError
+from hockepy.utils import exit_error, local_timezone
 
 
 class Schedule(BaseCommand):
     """Schedule command.
 
     Accepts the following arguments:
-    - date (positional)
+    - first_date (positional)
+    - last_date (positional)
+    - --home-first
+    - --utc
+    - --team (repeatable)
+    - --highlighted
+    - --deadline
+    - --offline
+    - --wait-fresh
     """
 
     _COMMAND = 'schedule'
@@ -52,111 +66,139 @@ class Schedule(BaseCommand):
                             help='first date to get schedule for')
         parser.add_argument('last_date', default=None, nargs='?',
                             help='last date to get schedule for')
+        cls.add_arguments(parser)
+        return parser
+
+    @staticmethod
+    def add_arguments(parser):
+        """Add arguments shared by schedule-like commands to the parser."""
         parser.add_argument('--home-first', dest='home_first',
                             action='store_true',
                             help='print the home team first')
         parser.add_argument('--utc', dest='utc', action='store_true',
                             help='print times in UTC instead of local time')
-        return parser
-
-    @staticmethod
-    def get_time_txt(game, timezone=None):
-        """Compose game's time as a text to be printed."""
-        if not game.time:
-            return 'Time TBD'
-
-        if timezone:
-            gametime = game.time.astimezone(timezone)
-        else:
-            gametime = game.time
-
-        return f'{gametime.hour:02d}:{gametime.minute:02d} {gametime.tzname()}'
+        parser.add_argument('--team', dest='teams', action='append',
+                            default=[], metavar='TEAM',
+                            help='print only games of the team (name, '
+                                 'abbreviation or ID); can be repeated')
+        parser.add_argument('--highlighted', dest='highlighted',
+                            action='store_true',
+                            help='print only games of the highlighted '
+                                 'teams (see highlight_teams)')
+        parser.add_argument('--deadline', dest='deadline',
+                            type=Schedule.parse_duration, default=None,
+                            help='latency budget (e.g. 1.5s or 800ms) - '
+                                 'games not updated in time are printed '
+                                 'from the schedule only')
+        parser.add_argument('--offline', dest='offline', action='store_true',
+                            help='use local data only (see also offline '
+                                 'configuration) - games are marked with '
+                                 'the age of their data')
+        parser.add_argument('--wait-fresh', dest='wait_fresh',
+                            action='store_true',
+                            help='if a stale schedule is printed, wait for '
+                                 'the fresh one and print it too if it '
+                                 'differs')
 
     @staticmethod
-    def get_score_txt(game, score_fmt):
-        """"Compose game's score as a text to be printed."""
-        if has_started(game):
-            score = score_fmt.format(away=game.away_score,
-                                     home=game.home_score)
-            if game.last_play.period == 'SO' or game.last_play.period == 'OT':
-                return score + ' ' + game.last_play.period
-            return score + '   '
-
-        # the game has not started yet -> don't display score
-        return '      '
+    def parse_duration(text):
+        """Parse duration like '1.5s', '800ms' or '2' (seconds).
 
-    @staticmethod
-    def get_last_play_txt(game):
-        """Compose game's last play as a text to be printed."""
-        if game.status == GameStatus.LIVE and game.last_play:
-            return f'- {game.last_play.description} ({game.last_play.time})'
-
-        # the game has finished or has not started yet
-        # -> the last play is not relevant
-        return ''
-
-    def print_game(self, game, team_width, timezone=None):
-        """Print the given game.
-
-        Respect 'home_first' argument and use the appropriate delimiter.
-        Also print each team name so it's padded to at least
-        'team_width' characters.
-        If tz is provided, print time in this time zone. Otherwise use
-        the game time's time zone.
-        Print each game on one line.
+        Return the duration in seconds.
         """
-        logging.debug('Printing game %s', game)
-
-        gametype = f'{game.type:2}'
-
-        home_width = away_width = team_width
-
-        # highight teams
-        width_compensation = bold_escape_seq_width()
-        if game.home in CONF['highlight_teams']:
-            game = game._replace(home=bold_text(game.home))
-            home_width = home_width + width_compensation
-        if game.away in CONF['highlight_teams']:
-            game = game._replace(away=bold_text(game.away))
-            away_width = away_width + width_compensation
-
-        if self.args.home_first:
-            teams_fmt = '{home:>{home_w}} : {away:<{away_w}}'
-            score_fmt = '{home}:{away}'
-        else:
-            teams_fmt = '{away:>{away_w}} @ {home:<{home_w}}'
-            score_fmt = '{away}:{home}'
-        teams = teams_fmt.format(away=game.away, home=game.home,
-                                 away_w=away_width, home_w=home_width)
-
-        time = Schedule.get_time_txt(game, timezone)
-        score = Schedule.get_score_txt(game, score_fmt)
-        last_play = Schedule.get_last_play_txt(game)
-        status = f'({game.status})'
-
-        print(' '.join((gametype, teams, time, score, status, last_play)))
+        match = re.fullmatch(r'\s*(\d+(?:\.\d*)?|\.\d+)\s*(ms|s)?\s*', text)
+        if not match:
+            raise ValueError(f'Invalid duration: {text!r}.')
+        value = float(match.group(1))
+        return value / 1000 if match.group(2) == 'ms' else value
 
     def print_schedule(self, schedule, local_tz):
-        """Print the schedule."""
-        if schedule is None:
-            print('No games at all.')
-            return
-        for date, games in schedule.items():
-            print(f'Schedule for {date}')
-            if not games:
-                print(f'  No games for {date}.')
-            else:
-                home_width = max([len(game.home) for game in games])
-                away_width = max([len(game.away) for game in games])
-                # + 1 is an additional padding
-                team_width = max(home_width, away_width) + 1
-                for game in games:
-                    self.print_game(game, team_width, local_tz)
+        """Print the schedule.
+
+        Respect 'home_first' argument, print times in local_tz (or in
+        the games' time zone if None), highlight teams set by
+        'highlight_teams' configuration and print win probabilities of
+        scheduled games if there are ratings. Each day is written at
+        once - as soon as it's available if the schedule is an iterator
+        of days (see hockepy.render.ScheduleRenderer.render()).
+        """
+        renderer = ScheduleRenderer(
+            home_first=self.args.home_first, timezone=local_tz,
+            highlight_names=CONF['highlight_teams'],
+            ratings=load_ratings())
+        renderer.render(schedule)
+
+    def get_team_ids(self, offline=False):
+        """Return IDs of the teams to filter the schedule by or None.
+
+        Teams are taken from --team arguments and from 'highlight_teams'
+        configuration if --highlighted is set. If offline is True, teams
+        unknown so far are only looked up in the cache. Exit with an
+        error for unknown teams.
+        """
+        wanted = list(self.args.teams)
+        if self.args.highlighted:
+            wanted.extend(CONF['highlight_teams'])
+        if not wanted:
+            return None
+
+        ids = set()
+        for team in wanted:
+            team_id = nhl.get_team_id(team, offline)
+            if team_id is None:
+                exit_error(f'Unknown team: {team!r}.')
+            ids.add(team_id)
+        return ids
+
+    def print_stale(self, wanted_ids, local_tz, deadline=None):
+        """Print a stale cached schedule and revalidate it.
+
+        A cached schedule older than 'schedule_ttl' (i.e. not fresh) but
+        not older than 'max_stale' seconds is printed right away and
+        a fresh one is retrieved by a detached process (which refreshes
+        the cache) so that the command is done right away. With
+        --wait-fresh, retrieve the fresh schedule here instead (by the
+        deadline if given) and print it as well if it differs.
+        Return True if a stale schedule was printed, False otherwise.
+        """
+        max_stale = CONF.get('max_stale')
+        if not max_stale:
+            return False
+        schedule, age = nhl.get_cached_schedule(
+            self.args.first_date, self.args.last_date, wanted_ids)
+        fresh_ttl = CONF.get('schedule_ttl') or 0
+        if age is None or age > max_stale or age <= fresh_ttl:
+            # nothing cached, too old or fresh enough to be used anyway
+            return False
+
+        logging.debug('Printing a stale schedule (%.0f seconds old).', age)
+        self.print_schedule(schedule, local_tz)
+        sys.stdout.flush()
+
+        if not self.args.wait_fresh:
+            prefetch.spawn_revalidation(self.args.first_date,
+                                        self.args.last_date, wanted_ids)
+            return True
+        try:
+            fresh = nhl.get_schedule(self.args.first_date,
+                                     self.args.last_date, wanted_ids,
+                                     deadline)
+        except OSError as err:
+            # requests' exceptions are OSErrors
+            logging.warning('Unable to revalidate the schedule: %s', err)
+            return True
+        if fresh != schedule:
+            print('Updated schedule')
             print('')
+            self.print_schedule(fresh, local_tz)
+        return True
 
     def run(self):
         """Run the command."""
         logging.debug('Running the %r command.', self.command)
+        deadline = None
+        if self.args.deadline is not None:
+            deadline = monotonic() + self.args.deadline
 
         # Determine the date(s) the schedule is wanted for.
         if self.args.first_date is None:
@@ -179,5 +221,26 @@ class Schedule(BaseCommand):
             local_tz = local_timezone()
 
         # Get the schedule and print it.
-        schedule = nhl.get_schedule(self.args.first_date, self.args.last_date)
+        offline = self.args.offline or CONF.get('offline')
+        wanted_ids = self.get_team_ids(offline)
+        if offline:
+            try:
+                schedule = nhl.get_offline_schedule(self.args.first_date,
+                                                    self.args.last_date,
+                                                    wanted_ids)
+            except OfflineError:
+                exit_error('The schedule is not available offline (keep '
+                           '`hockepy prefetch --daemon` running to sync '
+                           'it).')
+            self.print_schedule(schedule, local_tz)
+            return
+        if self.print_stale(wanted_ids, local_tz, deadline):
+            return
+        try:
+            # days are printed as soon as they are ready
+            schedule = nhl.iter_schedule(self.args.first_date,
+                                         self.args.last_date,
+                                         wanted_ids, deadline)
+        except requests.exceptions.Timeout:
+            exit_error('The schedule could not be retrieved in time.')
         self.print_schedule(schedule, local_tz)
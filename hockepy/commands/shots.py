@@ -0,0 +1,116 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.commands.shots
+----------------------
+
+This module defines class for shots command.
+
+The purpose of this command is to print (or save) a heatmap of shot
+locations in games played on the given date(s) - see hockepy.shots.
+"""
+
+import datetime
+import logging
+
+from hockepy import nhl, shots
+from hockepy.commands import BaseCommand
+from hockepy.game import GameStatus
+from hockepy.utils import exit_error
+
+
+class Shots(BaseCommand):
+    """Shots command.
+
+    Accepts the following arguments:
+    - first_date (positional)
+    - last_date (positional)
+    - --team
+    - --goals
+    - --output
+    """
+
+    _COMMAND = 'shots'
+    DATE_FMT = '%Y-%m-%d'
+
+    @property
+    def description(self):
+        """Return the command's short description for user."""
+        return 'Print a heatmap of shot locations.'
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        """Register and return the sub-command's parser."""
+        parser = subparsers.add_parser(cls.command)
+        parser.add_argument('first_date', default=None, nargs='?',
+                            help='first date to get shots for '
+                                 '(default: today)')
+        parser.add_argument('last_date', default=None, nargs='?',
+                            help='last date to get shots for')
+        parser.add_argument('--team', dest='team', default=None,
+                            help='count only shots of the team (name, '
+                                 'abbreviation or ID)')
+        parser.add_argument('--goals', dest='goals', action='store_true',
+                            help='count only goals')
+        parser.add_argument('--output', dest='output', default=None,
+                            metavar='FILE',
+                            help='save the heatmap as a CSV file instead '
+                                 'of printing it')
+        return parser
+
+    def get_games(self, team_id):
+        """Return a dictionary mapping IDs of wanted games to max_age."""
+        first_date = self.args.first_date
+        if first_date is None:
+            first_date = datetime.date.today().strftime(self.DATE_FMT)
+        last_date = self.args.last_date or first_date
+        try:
+            datetime.datetime.strptime(first_date, self.DATE_FMT)
+            datetime.datetime.strptime(last_date, self.DATE_FMT)
+        except ValueError:
+            exit_error(f'Dates must be in {self.DATE_FMT!r} format.')
+
+        team_ids = None if team_id is None else [team_id]
+        games = {}
+        for day in nhl.get_schedule_days(first_date, last_date,
+                                         team_ids=team_ids) or ():
+            for game in day.games:
+                status = nhl.get_status(game.status_code)
+                if status in (GameStatus.SCHEDULED, GameStatus.POSTPONED):
+                    continue
+                games[game.game_id] = nhl.feed_max_age(status)
+        return games
+
+    def run(self):
+        """Run the command."""
+        logging.debug('Running the %r command.', self.command)
+        if shots.numpy is None:
+            exit_error('NumPy is needed for shot analytics.')
+
+        team_id = None
+        if self.args.team is not None:
+            team_id = nhl.get_team_id(self.args.team)
+            if team_id is None:
+                exit_error(f'Unknown team: {self.args.team!r}.')
+
+        games = self.get_games(team_id)
+        if not games:
+            print('No games at all.')
+            return
+        found = shots.collect_shots(shots.iter_feeds(games), team_id)
+        hist, x_edges, y_edges = shots.heatmap(found,
+                                               goals_only=self.args.goals)
+        if self.args.output:
+            shots.save_heatmap(self.args.output, hist, x_edges, y_edges)
+            return
+        print(f'{len(found.x)} shot(s), {int(found.goal.sum())} goal(s) '
+              f'in {len(games)} game(s)')
+        print(shots.format_heatmap(hist))
@@ -26,7 +26,7 @@ from hockepy.commands import BaseCommand, Schedule
 class Today(BaseCommand):
     """Today command.
 
-    Accepts the following arguments:
+    Accepts the same optional arguments as the schedule command.
     """
 
     _COMMAND = 'today'
@@ -40,11 +40,7 @@ class Today(BaseCommand):
     def register_parser(cls, subparsers):
         """Register and return the sub-command's parser."""
         parser = subparsers.add_parser(cls.command)
-        parser.add_argument('--home-first', dest='home_first',
-                            action='store_true',
-                            help='print the home team first')
-        parser.add_argument('--utc', dest='utc', action='store_true',
-                            help='print times in UTC instead of local time')
+        Schedule.add_arguments(parser)
         return parser
 
     def run(self):
@@ -30,6 +30,40 @@ CONF = {}
 
 CONF_FILE_NAME = '.hockepy.conf'
 
+# where NHL API responses are cached (empty string disables the cache)
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'hockepy')
+
+# how large (in bytes) the cache can grow before the oldest responses are
+# removed (0 means no limit)
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# how long (in seconds) cached schedules and feeds of games that have
+# not started yet are considered fresh
+DEFAULT_SCHEDULE_TTL = 60
+
+# how long (in seconds) cached feeds of live games are considered fresh
+DEFAULT_LIVE_TTL = 10
+
+# timeout (in seconds) of requests to NHL API
+DEFAULT_TIMEOUT = 10
+
+# maximum number of requests per second to NHL API (0 means no limit)
+DEFAULT_RATE_LIMIT = 0
+
+# how old (in seconds) cached schedules can be to be printed right away
+# while they are being revalidated
+DEFAULT_MAX_STALE = 10 * 60
+
+# where team ratings are persisted (empty string disables them)
+DEFAULT_RATINGS_FILE = os.path.join('~', '.local', 'share', 'hockepy',
+                                    'ratings')
+
+# where snapshots of polled live feeds are archived (disabled by default)
+DEFAULT_ARCHIVE_DIR = ''
+
+# whether schedules are printed from local data only
+DEFAULT_OFFLINE = False
+
 
 def read_config_file():
     """Find and read config file (.hockepy.conf) if exists.
@@ -60,7 +94,7 @@ def read_config_file():
             return cf_content
         except IOError as err:
             logging.debug('Could not read %r: %s', cf_path, err.strerror)
-        except TypeError as err:
+        except TypeError:
             logging.debug('Not found.')
         except toml.TomlDecodeError:
             logging.warning('Config file %r has a wrong format. Ingoring it.',
@@ -80,3 +114,15 @@ def init_config():
     # initialize default values here
     # (if not specified by the config file):
     CONF['highlight_teams'] = conf_file.get('highlight_teams', [])
+    CONF['cache_dir'] = conf_file.get('cache_dir', DEFAULT_CACHE_DIR)
+    CONF['cache_max_size'] = conf_file.get('cache_max_size',
+                                           DEFAULT_CACHE_MAX_SIZE)
+    CONF['schedule_ttl'] = conf_file.get('schedule_ttl', DEFAULT_SCHEDULE_TTL)
+    CONF['live_ttl'] = conf_file.get('live_ttl', DEFAULT_LIVE_TTL)
+    CONF['timeout'] = conf_file.get('timeout', DEFAULT_TIMEOUT)
+    CONF['rate_limit'] = conf_file.get('rate_limit', DEFAULT_RATE_LIMIT)
+    CONF['max_stale'] = conf_file.get('max_stale', DEFAULT_MAX_STALE)
+    CONF['ratings_file'] = conf_file.get('ratings_file',
+                                         DEFAULT_RATINGS_FILE)
+    CONF['archive_dir'] = conf_file.get('archive_dir', DEFAULT_ARCHIVE_DIR)
+    CONF['offline'] = conf_file.get('offline', DEFAULT_OFFLINE)
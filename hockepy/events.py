@@ -0,0 +1,258 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.events
+--------------
+
+This module implements subscriptions to play events of live games.
+
+There is a single poller (a thread) per game no matter how many
+subscribers are watching the game. The poller retrieves the live feed
+periodically and dispatches new plays (as Play named tuples) to all
+subscribers interested in them. The poller stops once the game is over
+or there are no subscribers left.
+
+These interfaces are implemented:
+- Subscription class represents a single subscriber
+- GamePoller class polls a game's live feed
+- subscribe() subscribes a callback to a game's plays
+- iter_plays() is an async iterator over a game's plays
+"""
+
+import asyncio
+import logging
+import threading
+
+from hockepy import nhl
+from hockepy.schema import loads
+
+# Default number of seconds between two retrievals of a live feed.
+POLL_INTERVAL = 10
+
+# game ID -> running GamePoller
+_POLLERS = {}
+_POLLERS_LOCK = threading.Lock()
+
+
+class Subscription:
+    """A subscription to plays of a single game.
+
+    The callback is called as callback(game_id, play) for each new
+    matching play, on_close() (if provided) once no more plays will
+    come. Plays can be filtered by event types (NHL API's eventTypeId,
+    e.g. 'GOAL' or 'PENALTY') and by the team's ID.
+    """
+
+    def __init__(self, game_id, callback, event_types=None, team_id=None,
+                 on_close=None):
+        """Initialize the subscription."""
+        self.game_id = game_id
+        self.callback = callback
+        self.event_types = (None if event_types is None
+                            else frozenset(event_types))
+        self.team_id = team_id
+        self.on_close = on_close
+        self.closed = False
+
+    def matches(self, play):
+        """Return True if the play (as provided by NHL API) matches."""
+        if (self.event_types is not None
+                and play['result'].get('eventTypeId')
+                not in self.event_types):
+            return False
+        if (self.team_id is not None
+                and play.get('team', {}).get('id') != self.team_id):
+            return False
+        return True
+
+    def close(self):
+        """Mark the subscription closed and let the subscriber know."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close()
+
+    def unsubscribe(self):
+        """Stop receiving plays."""
+        with _POLLERS_LOCK:
+            poller = _POLLERS.get(self.game_id)
+        if poller is not None:
+            poller.remove(self)
+        self.close()
+
+
+class GamePoller(threading.Thread):
+    """Thread polling a game's live feed and dispatching new plays."""
+
+    def __init__(self, game_id, interval=POLL_INTERVAL):
+        """Initialize the poller, it needs to be started."""
+        super().__init__(name=f'hockepy-poller-{game_id}', daemon=True)
+        self.game_id = game_id
+        self.interval = interval
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # number of plays already seen (None before the first poll)
+        self._seen = None
+
+    def add(self, subscription):
+        """Add a subscription."""
+        with self._lock:
+            self._subscriptions.append(subscription)
+
+    def remove(self, subscription):
+        """Remove a subscription, stop polling if it was the last one."""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            if not self._subscriptions:
+                self._stopped.set()
+
+    @property
+    def stopping(self):
+        """Return True if the poller is stopping (or has stopped)."""
+        return self._stopped.is_set()
+
+    def stop(self):
+        """Stop polling and close all subscriptions."""
+        self._stopped.set()
+
+    def poll(self):
+        """Retrieve the live feed and dispatch new plays.
+
+        Return False if the game is over, True otherwise.
+        """
+        try:
+            feed = nhl.get_feed(self.game_id, False,
+                                projected=nhl.ALL_PLAYS)
+        except OSError as err:
+            # connection errors are transient, try again next time
+            logging.warning('Failed to get feed for %s: %s',
+                            self.game_id, err)
+            return True
+        if feed is None:
+            return True
+        try:
+            feed = loads(feed)
+            plays = feed['liveData']['plays']['allPlays']
+            status = nhl.get_status(feed['gameData']['status']['statusCode'])
+        except (KeyError, ValueError) as err:
+            logging.debug('Unexpected feed for %s: %s', self.game_id, err)
+            return True
+
+        if self._seen is None:
+            # plays before the subscription are not dispatched
+            self._seen = len(plays)
+        new_plays = plays[self._seen:]
+        self._seen = len(plays)
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for play in new_plays:
+            play_tuple = None
+            for subscription in subscriptions:
+                if not subscription.matches(play):
+                    continue
+                if play_tuple is None:
+                    play_tuple = nhl.get_play_tuple(play)
+                try:
+                    subscription.callback(self.game_id, play_tuple)
+                except Exception:  # pylint: disable=broad-except
+                    # one subscriber must not break the others
+                    logging.exception('Subscriber failed for play %s.',
+                                      play_tuple)
+
+        return status not in nhl.SETTLED_STATUSES
+
+    def run(self):
+        """Poll until the game is over or there are no subscribers."""
+        logging.debug('Polling game %s started.', self.game_id)
+        try:
+            while not self._stopped.is_set():
+                if not self.poll():
+                    break
+                self._stopped.wait(self.interval)
+        finally:
+            with _POLLERS_LOCK:
+                if _POLLERS.get(self.game_id) is self:
+                    del _POLLERS[self.game_id]
+            with self._lock:
+                subscriptions, self._subscriptions = self._subscriptions, []
+            for subscription in subscriptions:
+                subscription.close()
+            logging.debug('Polling game %s stopped.', self.game_id)
+
+
+def _resolve_team(team):
+    """Return ID of the given team (name, abbreviation or ID) or None."""
+    if team is None or isinstance(team, int):
+        return team
+    team_id = nhl.get_team_id(team)
+    if team_id is None:
+        raise ValueError(f'Unknown team: {team!r}.')
+    return team_id
+
+
+def subscribe(game_id, callback, event_types=None, team=None,
+              interval=POLL_INTERVAL, on_close=None):
+    """Subscribe the callback to new plays of the given game.
+
+    The callback is called as callback(game_id, play) where play is
+    a Play named tuple. It's called from the poller's thread.
+    Plays can be filtered by event types (NHL API's eventTypeId, e.g.
+    'GOAL' or 'PENALTY') and by team (its name, abbreviation or ID).
+    The interval is only used if there's no poller for the game yet.
+    on_close() is called once the game is over or the subscription is
+    cancelled.
+    Return a Subscription instance.
+    """
+    subscription = Subscription(game_id, callback, event_types,
+                                _resolve_team(team), on_close)
+    with _POLLERS_LOCK:
+        poller = _POLLERS.get(game_id)
+        if poller is None or poller.stopping:
+            poller = GamePoller(game_id, interval)
+            _POLLERS[game_id] = poller
+            poller.add(subscription)
+            poller.start()
+        else:
+            poller.add(subscription)
+    return subscription
+
+
+async def iter_plays(game_id, event_types=None, team=None,
+                     interval=POLL_INTERVAL):
+    """Asynchronously iterate over new plays of the given game.
+
+    This is an async iterator counterpart of subscribe() - see its
+    documentation for the arguments. The iteration ends once the game
+    is over.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def callback(_game_id, play):
+        loop.call_soon_threadsafe(queue.put_nowait, play)
+
+    def on_close():
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    subscription = subscribe(game_id, callback, event_types, team, interval,
+                             on_close)
+    try:
+        while True:
+            play = await queue.get()
+            if play is None:
+                break
+            yield play
+    finally:
+        subscription.unsubscribe()
@@ -19,6 +19,9 @@ These interfaces are implemented:
 - Play named tuple
 - GameStatus enum
 - GameType enum
+- BoxScore named tuple
+- TeamBox named tuple
+- PlayerBox named tuple
 - has_started() - indicates whether the game has already started
 """
 
@@ -35,7 +38,14 @@ Game = namedtuple(
      'time',        # UTC time and date (datetime object) or None
      'type',        # GameType instance
      'status',      # GameStatus instance
-     'last_play']   # last play so far - Play namedtuple or None
+     'last_play',   # last play so far - Play namedtuple or None
+     'home_id',     # home team's ID (see hockepy.teams) or None
+     'away_id',     # away team's ID (see hockepy.teams) or None
+     'game_id',     # league's ID of the game or None
+     'partial',     # True if some data are missing (not retrieved in time)
+     'age'],        # age (in seconds) of local data the game is built from
+                    # or None if the data are up to date
+    defaults=(None, None, None, False, None)
 )
 
 
@@ -47,6 +57,43 @@ Play = namedtuple(
 )
 
 
+BoxScore = namedtuple(
+    'BoxScore',
+    ['home',        # home team's TeamBox
+     'away']        # away team's TeamBox
+)
+
+
+TeamBox = namedtuple(
+    'TeamBox',
+    ['team',        # team's name
+     'team_id',     # team's ID (see hockepy.teams) or None
+     'goals',
+     'shots',
+     'pim',         # penalty minutes
+     'hits',
+     'pp_goals',    # power play goals
+     'pp_opportunities',  # power play opportunities
+     'faceoff_pct',  # faceoff win percentage (float)
+     'players']     # list of PlayerBox named tuples
+)
+
+
+PlayerBox = namedtuple(
+    'PlayerBox',
+    ['name',
+     'position',    # e.g. 'C', 'D', 'G'
+     'number',      # jersey number as a string
+     'toi',         # time on ice as 'MM:SS'
+     'goals',
+     'assists',
+     'shots',       # shots (skaters) or shots against (goalies)
+     'pim',         # penalty minutes
+     'plus_minus',  # plus/minus or None for goalies
+     'saves']       # saves or None for skaters
+)
+
+
 def has_started(game):
     """Return true if the given game has started, False otherwise.
 
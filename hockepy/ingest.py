@@ -0,0 +1,99 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.ingest
+--------------
+
+This module implements bulk ingestion of stored live feeds.
+
+Decoding JSON and converting plays is CPU-bound so the work is spread
+across a pool of processes. Only compact results (tuples of Play named
+tuples) travel back to the parent process and the results keep the order
+of the input.
+
+These interfaces are implemented:
+- GameFeed named tuple
+- parse_feed() parses a single stored live feed
+- ingest_feeds() parses many stored live feeds in parallel
+"""
+
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from hockepy import nhl
+from hockepy.cache import read_file
+from hockepy.schema import loads
+
+
+GameFeed = namedtuple(
+    'GameFeed',
+    ['source',      # where the feed came from (e.g. file path)
+     'game_id',     # NHL API's gamePk or None if not available
+     'plays']       # tuple of Play named tuples
+)
+
+
+def parse_feed(source):
+    """Parse a stored live feed given by its path.
+
+    The feed may be stored compressed (see hockepy.cache).
+
+    Return a GameFeed named tuple.
+    """
+    feed = loads(read_file(source))
+    plays = feed['liveData']['plays']['allPlays']
+    return GameFeed(source=source,
+                    game_id=feed.get('gamePk'),
+                    plays=tuple(nhl.get_play_tuple(play) for play in plays))
+
+
+def _try_parse_feed(source):
+    """Parse a stored live feed (see parse_feed()) or return None.
+
+    One unreadable or malformed feed must not abort the whole ingestion.
+    """
+    try:
+        return parse_feed(source)
+    except (OSError, ValueError, KeyError) as err:
+        logging.warning('Unable to parse feed %r: %r', source, err)
+        return None
+
+
+def ingest_feeds(sources, workers=None, chunksize=None):
+    """Parse the given stored live feeds in parallel.
+
+    Sources are paths to the stored feeds. Use the given number of
+    worker processes (all CPUs by default), a single worker means
+    parsing in this process. Chunk size (number of feeds sent to
+    a worker at once) is derived from the number of sources if not
+    provided.
+    Yield GameFeed named tuples in the order of the sources (None for
+    feeds that can't be read or parsed).
+    """
+    sources = list(sources)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(sources)) or 1
+    logging.info('Ingesting %d feed(s) using %d worker(s).',
+                 len(sources), workers)
+
+    if workers == 1:
+        yield from map(_try_parse_feed, sources)
+        return
+
+    if chunksize is None:
+        # a few chunks per worker keep the workers busy evenly while
+        # the overhead of sending the chunks stays low
+        chunksize = max(1, len(sources) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_try_parse_feed, sources,
+                                chunksize=chunksize)
@@ -14,107 +14,189 @@ hockepy.nhl
 
 This module implements access to a subset of NHL API.
 
-These functions are implemented:
+HockeyClient class owns everything needed to access the API - its
+transport (connection pool, response cache and rate limit) and its
+configuration. A client is safe to share across threads. The module-level
+functions are thin wrappers over the default client created from CONF
+(see get_client()).
+
+These interfaces are implemented:
+- HockeyClient class accesses the NHL API
+- get_client() returns the default client
+- set_client() replaces the default client
+- save_cache_stats() saves lookup statistics of the default client's
+    cache
 - get_schedule() returns games played on specified days.
+- iter_schedule() yields games played on specified days day by day
+- get_cached_schedule() returns games played on specified days using
+    cached data only
+- get_offline_schedule() returns games played on specified days using
+    local data only, with the age of each game's data
+- get_schedule_days() returns the schedule for specified days without
+    retrieving live feeds
+- schedule_url() returns URL of the schedule for specified days
+- feed_url() returns URL of the live feed for a game
+- feed_max_age() returns how old a cached live feed can be
 - parse_schedule() returns Games as parsed from the given JSON schedule
+- get_transport() returns the transport used to access the NHL API
 - log_bad_response_msg() logs error message from a bad response from
-    the NHL API if possible
+    the NHL API if possible (see hockepy.transport)
 - get_status() returns GameStatus for NHL API's statusCode
 - get_type() returns GameType for NHL API's gameType
+- get_feed() returns the raw live feed for a game
+- get_plays() returns all plays of a game as provided by the NHL API
+- get_play_tuple() returns a Play named tuple for the given play
+- get_last_play() returns the last play of a game as provided by
+    the NHL API
+- get_last_play_tuple() returns the last play of a game as a Play
+    named tuple
+- get_last_plays() returns last plays of many games retrieved
+    concurrently
+- get_teams() returns all teams and keeps hockepy.teams registry
+    up to date
+- get_team_id() returns a team's ID by its name, abbreviation or ID
+- get_boxscore() returns the box score of a game
+- get_boxscores() returns box scores of many games retrieved concurrently
+- get_game_boxscore() returns the status and the box score of a game
+- refresh() updates games of an already retrieved schedule that may
+    have changed since
 """
 
+import datetime
 import logging
+import queue
+import threading
 from collections import OrderedDict
-from datetime import datetime, timezone
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from time import monotonic
 from urllib.parse import urljoin
 
-import requests
-
+from hockepy import teams
+from hockepy.archive import FeedRecorder
+from hockepy.cache import ResponseCache
+from hockepy.config import CONF
 from hockepy.game import Game, GameStatus, GameType, Play
+from hockepy.schema import (BOXSCORE_PATHS, FEED_BOXSCORE_PATHS,
+                            FEED_PATHS, PLAYS_PATHS, SCHEDULE_PATHS,
+                            FeedPlay, decode_boxscore, decode_current_play,
+                            decode_feed_boxscore, decode_feed_game,
+                            decode_play, decode_schedule, decode_teams,
+                            fields_param, loads)
+from hockepy.trace import span
+# pylint: disable=unused-import
+# (log_bad_response_msg is kept available here for backward compatibility)
+from hockepy.transport import (FOREVER, TIMEOUT, OfflineError, RateLimiter,
+                               Transport, log_bad_response_msg)
 
 # URL to the NHL API
 API_URL = 'https://statsapi.web.nhl.com/api/v1/'
 
-# API points
+# API points (of the default API_URL)
 FEED_URL = urljoin(API_URL, 'game/')
 SCHEDULE_URL = urljoin(API_URL, 'schedule')
+TEAMS_URL = urljoin(API_URL, 'teams')
+
+# Projections of live feeds - to game's state with its current play
+# (enough for schedules), to all the plays and to game's status with its
+# box score
+CURRENT_PLAY = 'current'
+ALL_PLAYS = 'plays'
+BOXSCORE = 'boxscore'
+
+# Projections of the responses to fields actually used by hockepy
+SCHEDULE_FIELDS = fields_param(SCHEDULE_PATHS)
+FEED_FIELDS = {CURRENT_PLAY: fields_param(FEED_PATHS),
+               ALL_PLAYS: fields_param(PLAYS_PATHS),
+               BOXSCORE: fields_param(FEED_BOXSCORE_PATHS)}
+BOXSCORE_FIELDS = fields_param(BOXSCORE_PATHS)
+
+# How often (in seconds) the teams are retrieved again - teams change
+# very rarely (if ever) during a season.
+TEAMS_TTL = 24 * 60 * 60
+
+# Games in these states are not expected to change anymore.
+SETTLED_STATUSES = frozenset((GameStatus.FINAL, GameStatus.POSTPONED))
+
+# Maximum number of live feeds retrieved concurrently
+FEED_WORKERS = 8
 
 # Date/time used by the API
 DATETIME_FMT = '%Y-%m-%dT%H:%M:%SZ'
 
+# Dates of schedules
+DATE_FMT = '%Y-%m-%d'
 
-def log_bad_response_msg(response):
-    """Try and log an error message from a bad response.
+# The default client (see get_client()) and the lock guarding its creation
+_client = None
+_client_lock = threading.Lock()
 
-    If a bad response comes back from the NHL API, there might be
-    an error message in it. If it's the case, retrieve and log it if
-    possible. Do nothing if not.
-    """
-    # Do something for bad responses only.
-    if response.status_code == requests.codes['ok']:
-        return
 
-    try:
-        json = response.json()
-        msg_number = json.get('messageNumber', None)
-        msg = json.get('message', None)
-        logging.debug('Bad response from NHL API (HTTP %d): #%d: %s',
-                      response.status_code, msg_number, msg)
-    except ValueError:
-        logging.debug('Bad response from NHL API (HTTP %d).',
-                      response.status_code)
+def _remaining(deadline):
+    """Return seconds remaining until the deadline (or None).
 
+    A tiny positive number is returned for passed deadlines as zero
+    timeouts are not accepted by requests.
+    """
+    if deadline is None:
+        return None
+    return max(0.001, deadline - monotonic())
 
-def parse_schedule(schedule):
-    """Return games played according to the schedule.
 
-    The schedule is expected in JSON format as returned from the NHL API
-    exactly. Return games as an ordered dictionary where keys are dates
-    and values are lists of Game named tuples. Return None if there are
-    no games in the given schedule.
+class _DaemonExecutor:
+    """Minimal executor running calls in daemon threads.
+
+    Workers of ThreadPoolExecutor are joined when the interpreter exits,
+    so requests abandoned at a deadline would keep the process running
+    until they time out. Daemon workers don't - shutdown() only cancels
+    the calls that have not started yet and lets the workers go.
     """
-    if schedule['totalGames'] == 0:
-        logging.debug('No games for the period of time.')
-        return None
 
-    sched = OrderedDict()
-    for day in schedule['dates']:
-        games = []
-        for game in day['games']:
+    def __init__(self, max_workers):
+        """Initialize the executor, workers are started on demand."""
+        self._max_workers = max_workers
+        self._workers = 0
+        self._calls = queue.SimpleQueue()
+
+    def submit(self, func, *args):
+        """Schedule func(*args) and return its Future."""
+        future = Future()
+        self._calls.put((future, func, args))
+        if self._workers < self._max_workers:
+            self._workers += 1
+            threading.Thread(target=self._work, daemon=True).start()
+        return future
 
-            # try and parse time
-            status_code = game['status']['statusCode']
-            if status_code == '8':
-                # scheduled but time TBD
-                gametime = None
+    def _work(self):
+        """Run the scheduled calls until shut down."""
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            future, func, args = call
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args)
+            except BaseException as err:  # pylint: disable=broad-except
+                # the exception is raised by the future's result()
+                future.set_exception(err)
             else:
-                try:
-                    gametime = datetime.strptime(game['gameDate'],
-                                                 DATETIME_FMT)
-                    # set timezone (NHL API uses UTC)
-                    gametime = gametime.replace(tzinfo=timezone.utc)
-                except ValueError as err:
-                    logging.debug('Unable to parse time: %s', err)
-                    gametime = None
-
-            # retrieve last play
-            lastplay = get_last_play(game['gamePk'], False)
-
-            games.append(
-                Game(
-                    home=game['teams']['home']['team']['name'],
-                    away=game['teams']['away']['team']['name'],
-                    home_score=game['teams']['home']['score'],
-                    away_score=game['teams']['away']['score'],
-                    time=gametime,
-                    type=get_type(game['gameType']),
-                    status=get_status(status_code),
-                    last_play=get_play_tuple(lastplay)
-                )
-            )
-        sched[day['date']] = games
-        logging.debug('Schedule found: %s', sched)
-    return sched
+                future.set_result(result)
+
+    def shutdown(self):
+        """Cancel calls not started yet and stop the workers.
+
+        Running calls are not waited for.
+        """
+        while True:
+            try:
+                call = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            if call is not None:
+                call[0].cancel()
+        for _ in range(self._workers):
+            self._calls.put(None)
 
 
 def get_status(status_code):
@@ -152,59 +234,23 @@ def get_type(game_type):
     return GameType.PLAYOFFS
 
 
-def get_schedule(start_date, end_date):
-    """Return games played between the given dates.
-
-    Dates must be strings in "YYYY-MM-DD" format. Return games as
-    an ordered dictionary where keys are dates and values are lists of
-    Game named tuples. Return None if there are no games between
-    the given dates.
-    """
-    logging.info('Retrieving NHL schedule for %s - %s.', start_date, end_date)
-    url = f'{SCHEDULE_URL}?startDate={start_date}&endDate={end_date}'
-    response = requests.get(url)
-    if response.status_code != requests.codes['ok']:
-        log_bad_response_msg(response)
-        response.raise_for_status()
-
-    return parse_schedule(response.json())
-
-
-def get_plays(game_id, fail=True):
-    """Retrieve all plays as provided in the live feed.
-
-    Return list of all plays available in the feed in the format
-    provided by the NHL API.
-    If it's not possible to retrieve the feed for the given game_id,
-    then it depends on fail parameter - if it's True, an exception will
-    be raised, otherwise None is returned without an exception.
-    """
-    logging.info('Retrieving NHL game live feed plays for %s.', game_id)
-    url = urljoin(FEED_URL, f'{game_id}/feed/live')
-    response = requests.get(url)
-    if response.status_code != requests.codes['ok']:
-        log_bad_response_msg(response)
-        if fail:
-            response.raise_for_status()
-        return None
-
-    return response.json()['liveData']['plays']['allPlays']
-
-
 def get_play_tuple(play):
     """Get a play tuple from a play returned by the NHL API or None.
 
     Return a Play namedtuple for the given play and ignore other
-    information about the play provided by the NHL API.
+    information about the play provided by the NHL API. The play can
+    also be given as an already decoded FeedPlay.
     Return None if the given play is empty or not valid.
     """
     if not play:
         return None
+    if not isinstance(play, FeedPlay):
+        play = decode_play(play)
 
-    period = play['about']['ordinalNum']
+    period = play.ordinal
 
-    mins, secs = [int(num) for num in play['about']['periodTime'].split(':')]
-    mins = mins + 20 * (play['about']['period'] - 1)
+    mins, secs = [int(num) for num in play.period_time.split(':')]
+    mins = mins + 20 * (play.period - 1)
     if period == 'SO':
         # if the "period" is shootout, then it's clear that we're in
         # a regular season and following after a 5 minutes long (not 20)
@@ -212,30 +258,968 @@ def get_play_tuple(play):
         mins = mins - 15
     time = f'{mins:02d}:{secs:02d}'
 
-    return Play(period=period, time=time,
-                description=play['result']['description'])
+    return Play(period=period, time=time, description=play.description)
+
+
+def _filter_days(days, team_ids):
+    """Return decoded schedule days with games of the given teams only.
+
+    Days left without games are dropped. If there are no team IDs, the
+    days are returned as they are.
+    """
+    if not team_ids or days is None:
+        return days
+    days = [day._replace(games=[
+        game for game in day.games
+        if game.home_id in team_ids or game.away_id in team_ids])
+        for day in days]
+    return [day for day in days if day.games]
+
+
+def _log_last_play_error(game_id, err):
+    """Log that the last play of a game couldn't be retrieved.
+
+    Such a game is left out of last plays and so it's partial (see
+    _game_tuple()).
+    """
+    # requests' exceptions are OSErrors, malformed feeds raise ValueErrors
+    logging.debug('Unable to retrieve last play of %s: %s', game_id, err)
+
+
+def _game_tuple(game, last_plays):
+    """Return Game named tuple for the game of a decoded schedule.
+
+    Last plays are given as a dictionary mapping game IDs to Play named
+    tuples - games missing there are marked as partial.
+    """
+    return Game(home=teams.register(game.home_id, game.home),
+                away=teams.register(game.away_id, game.away),
+                home_score=game.home_score,
+                away_score=game.away_score,
+                time=game.time,
+                type=get_type(game.game_type),
+                status=get_status(game.status_code),
+                last_play=last_plays.get(game.game_id),
+                home_id=game.home_id,
+                away_id=game.away_id,
+                game_id=game.game_id,
+                partial=game.game_id not in last_plays)
+
+
+class HockeyClient:
+    """Client of the NHL API.
+
+    The client owns its transport - a connection pool, an optional
+    response cache (in cache_dir, kept within cache_max_size bytes) and
+    an optional rate limit (requests per second) - and its
+    configuration. Cached schedules (and feeds of
+    games that have not started yet) are used for schedule_ttl seconds,
+    cached feeds of live games for live_ttl seconds (None means no
+    cache is used). Live feeds retrieved over the network are recorded
+    by the recorder if there is one (see hockepy.archive.FeedRecorder).
+    Teams are registered in the (process-wide) hockepy.teams registry.
+    It's safe to share a client across threads.
+    """
+
+    def __init__(self, api_url=API_URL, cache_dir=None, timeout=TIMEOUT,
+                 rate_limit=None, schedule_ttl=None, live_ttl=None,
+                 feed_workers=FEED_WORKERS, transport=None, recorder=None,
+                 cache_max_size=None):
+        """Initialize the client.
+
+        A transport can be provided instead of cache_dir, cache_max_size,
+        timeout and rate_limit.
+        """
+        if transport is None:
+            cache = (ResponseCache(cache_dir, cache_max_size) if cache_dir
+                     else None)
+            limiter = RateLimiter(rate_limit) if rate_limit else None
+            transport = Transport(cache, timeout, limiter)
+        self.transport = transport
+        self.recorder = recorder
+        self.api_url = api_url
+        self.schedule_ttl = schedule_ttl
+        self.live_ttl = live_ttl
+        self.feed_workers = feed_workers
+        self._feed_url = urljoin(api_url, 'game/')
+        self._schedule_url = urljoin(api_url, 'schedule')
+        self._teams_url = urljoin(api_url, 'teams')
+        # monotonic() of the last teams retrieval (or None)
+        self._teams_retrieved = None
+        self._teams_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, conf=None):
+        """Return a client configured according to conf (CONF by default).
+
+        If 'cache_dir' is set, responses are cached there (and the cache
+        is kept within 'cache_max_size' bytes if set), 'timeout' (in
+        seconds) is used for requests, 'rate_limit' limits requests per
+        second and 'schedule_ttl' and 'live_ttl' set the freshness of
+        cached responses. If 'archive_dir' is set, live feeds are
+        archived there.
+        """
+        conf = CONF if conf is None else conf
+        archive_dir = conf.get('archive_dir')
+        return cls(cache_dir=conf.get('cache_dir'),
+                   cache_max_size=conf.get('cache_max_size'),
+                   timeout=conf.get('timeout', TIMEOUT),
+                   rate_limit=conf.get('rate_limit'),
+                   schedule_ttl=conf.get('schedule_ttl'),
+                   live_ttl=conf.get('live_ttl'),
+                   recorder=FeedRecorder(archive_dir) if archive_dir else None)
+
+    def schedule(self, start_date, end_date=None, team_ids=None,
+                 deadline=None):
+        """Return games played between the given dates.
+
+        The end date is the start date by default. See get_schedule().
+        """
+        return self.get_schedule(start_date, end_date or start_date,
+                                 team_ids, deadline)
+
+    def last_plays(self, game_ids, max_age=None):
+        """Return last plays of the given games as Play named tuples.
+
+        See get_last_plays().
+        """
+        return self.get_last_plays(game_ids, max_age)
+
+    def plays(self, game_id):
+        """Return all plays of the given game as Play named tuples."""
+        return [get_play_tuple(play) for play in self.get_plays(game_id)]
+
+    def last_play(self, game_id, max_age=None):
+        """Return the last play of the given game as a Play named tuple.
+
+        Return None if there is no play yet.
+        """
+        return self.get_last_play_tuple(game_id, max_age=max_age)
+
+    def schedule_url(self, start_date, end_date):
+        """Return URL of the schedule for the given dates.
+
+        The schedule of all teams is requested (schedules of some teams
+        are filtered from it - see get_schedule()). Only fields needed by
+        hockepy are requested.
+        """
+        return (f'{self._schedule_url}?startDate={start_date}'
+                f'&endDate={end_date}&fields={SCHEDULE_FIELDS}')
+
+    def feed_url(self, game_id, projected=False):
+        """Return URL of the live feed for the given game.
+
+        If projected is a projection (CURRENT_PLAY, ALL_PLAYS or
+        BOXSCORE), only fields needed for it are requested (see
+        hockepy.schema.FEED_PATHS, hockepy.schema.PLAYS_PATHS and
+        hockepy.schema.FEED_BOXSCORE_PATHS), otherwise the full feed is.
+        """
+        url = urljoin(self._feed_url, f'{game_id}/feed/live')
+        if projected:
+            url = f'{url}?fields={FEED_FIELDS[projected]}'
+        return url
+
+    def feed_max_age(self, status):
+        """Return max_age of a cached live feed for a game in the status.
+
+        Feeds of final games never change, other feeds are considered
+        fresh according to live_ttl and schedule_ttl.
+        """
+        if status == GameStatus.FINAL:
+            return FOREVER
+        if status == GameStatus.LIVE:
+            return self.live_ttl
+        return self.schedule_ttl
+
+    def _get_last_play_by(self, game_id, max_age, deadline):
+        """Return the last play of the game retrieved by the deadline.
+
+        The request's timeout is what remains until the deadline when the
+        request is actually made, not when it's scheduled. Raise
+        TimeoutError if the deadline has passed already.
+        """
+        if deadline is not None and monotonic() >= deadline:
+            raise TimeoutError(f'Deadline passed before retrieving {game_id}.')
+        return self.get_last_play_tuple(game_id, False, max_age,
+                                        _remaining(deadline))
+
+    def _get_last_play_tuples(self, feeds, deadline=None, offline=False):
+        """Return last plays of the given games.
+
+        Feeds are given as a dictionary mapping game IDs to max_age (see
+        get_feed()). If there is no deadline (a monotonic() time), feeds
+        are retrieved one by one. Otherwise they are retrieved
+        concurrently and games whose feeds are not retrieved by the
+        deadline are left out of the returned dictionary (game ID ->
+        Play named tuple or None). Games whose feeds can't be retrieved
+        or decoded are left out as well.
+        If offline is True, only cached feeds are used.
+        """
+        plays = {}
+        if deadline is None or offline:
+            for game_id, max_age in feeds.items():
+                try:
+                    plays[game_id] = self.get_last_play_tuple(
+                        game_id, False, max_age, offline=offline)
+                except (OSError, ValueError) as err:
+                    _log_last_play_error(game_id, err)
+            return plays
+
+        if not feeds:
+            return plays
+        executor = _DaemonExecutor(min(self.feed_workers, len(feeds)))
+        futures = {
+            executor.submit(self._get_last_play_by, game_id, max_age,
+                            deadline): game_id
+            for game_id, max_age in feeds.items()
+        }
+        done, not_done = wait(futures, timeout=_remaining(deadline))
+        # abandon the rest (their requests time out by the deadline anyway)
+        executor.shutdown()
+        for future in done:
+            try:
+                plays[futures[future]] = future.result()
+            except (OSError, ValueError) as err:
+                _log_last_play_error(futures[future], err)
+        if not_done:
+            logging.info('Abandoned %d feed(s) that missed the deadline.',
+                         len(not_done))
+        return plays
+
+    def parse_schedule(self, schedule, deadline=None, offline=False,
+                       team_ids=None):
+        """Return games played according to the schedule.
+
+        The schedule is expected in JSON format as returned from the NHL
+        API exactly (either raw or already decoded). Return games as an
+        ordered dictionary where keys are dates and values are lists of
+        Game named tuples. Return None if there are no games in the given
+        schedule.
+        If a deadline (a time.monotonic() time) is given, live feeds are
+        retrieved concurrently and those not retrieved by the deadline
+        are abandoned - such games are marked as partial and have no last
+        play. If offline is True, only cached live feeds are used. If team
+        IDs are given, only games of these teams are parsed.
+        """
+        with span('parse.schedule'):
+            days = _filter_days(decode_schedule(schedule), team_ids)
+        if not days:
+            logging.debug('No games for the period of time.')
+            return None
+
+        feeds = {game.game_id: self.feed_max_age(get_status(game.status_code))
+                 for day in days for game in day.games}
+        with span('fetch.feeds', games=len(feeds)) as feeds_span:
+            last_plays = self._get_last_play_tuples(feeds, deadline, offline)
+            feeds_span.set(retrieved=len(last_plays))
+
+        sched = OrderedDict()
+        for day in days:
+            games = [_game_tuple(game, last_plays) for game in day.games]
+            sched[day.date] = games
+            logging.debug('Schedule found for %s: %d game(s).',
+                          day.date, len(games))
+        return sched
+
+    def iter_parsed_schedule(self, schedule, deadline=None, offline=False,
+                             team_ids=None):
+        """Yield (date, games) of the schedule as soon as each day is ready.
+
+        This is a streaming variant of parse_schedule() - see it for the
+        arguments. Live feeds of all games are retrieved concurrently (the
+        earlier days first) and each day is yielded once its feeds are
+        retrieved, so the first days are available long before all the
+        feeds are. Games are lists of Game named tuples. Nothing is
+        yielded if there are no games in the given schedule.
+        """
+        with span('parse.schedule'):
+            days = _filter_days(decode_schedule(schedule), team_ids)
+        if not days:
+            logging.debug('No games for the period of time.')
+            return
+
+        if offline:
+            for day in days:
+                feeds = {game.game_id: None for game in day.games}
+                last_plays = self._get_last_play_tuples(feeds, offline=True)
+                yield day.date, [_game_tuple(game, last_plays)
+                                 for game in day.games]
+            return
+
+        executor = _DaemonExecutor(self.feed_workers)
+        try:
+            # submitted in the order of days so the first days are first
+            futures = [{
+                game.game_id: executor.submit(
+                    self._get_last_play_by, game.game_id,
+                    self.feed_max_age(get_status(game.status_code)),
+                    deadline)
+                for game in day.games} for day in days]
+            for day, day_futures in zip(days, futures):
+                with span('fetch.feeds', date=day.date,
+                          games=len(day_futures)) as feeds_span:
+                    wait(day_futures.values(), timeout=_remaining(deadline))
+                    last_plays = {}
+                    for game_id, future in day_futures.items():
+                        if not future.done():
+                            continue
+                        try:
+                            last_plays[game_id] = future.result()
+                        except (OSError, ValueError) as err:
+                            _log_last_play_error(game_id, err)
+                    feeds_span.set(retrieved=len(last_plays))
+                logging.debug('Schedule ready for %s: %d game(s).',
+                              day.date, len(day.games))
+                yield day.date, [_game_tuple(game, last_plays)
+                                 for game in day.games]
+        finally:
+            # abandon feeds of days that are not wanted anymore (or those
+            # that missed the deadline - their requests time out anyway)
+            executor.shutdown()
+
+    def get_schedule_days(self, start_date, end_date, max_age=None,
+                          team_ids=None):
+        """Return the schedule between the given dates without live feeds.
+
+        Dates must be strings in "YYYY-MM-DD" format. A cached schedule
+        is used if it's not older than max_age seconds. If team IDs are
+        given, only games of these teams are returned (see
+        get_schedule()). Return a list of hockepy.schema.ScheduleDay
+        named tuples or None if there are no games between the given
+        dates.
+        """
+        logging.info('Retrieving NHL schedule for %s - %s.',
+                     start_date, end_date)
+        days = _filter_days(decode_schedule(self.transport.get(
+            self.schedule_url(start_date, end_date), max_age=max_age)),
+            team_ids)
+        return days or None
+
+    def get_schedule(self, start_date, end_date, team_ids=None,
+                     deadline=None):
+        """Return games played between the given dates.
+
+        Dates must be strings in "YYYY-MM-DD" format. If team IDs are
+        given, only games of these teams are returned - the whole
+        schedule is retrieved (so it's shared with queries for other
+        teams and warmed by hockepy.prefetch) and filtered here, live
+        feeds are retrieved for the wanted games only. Return games as an
+        ordered dictionary where keys are dates and values are lists of
+        Game named tuples. Return None if there are no games between the
+        given dates.
+        A cached schedule is used if it's not older than schedule_ttl
+        seconds (if set).
+        If a deadline (a time.monotonic() time) is given, the whole
+        retrieval is bounded by it - see parse_schedule(). The schedule
+        itself must be retrieved by the deadline, requests.Timeout is
+        raised otherwise.
+        """
+        logging.info('Retrieving NHL schedule for %s - %s.',
+                     start_date, end_date)
+        body = self.transport.get(
+            self.schedule_url(start_date, end_date),
+            max_age=self.schedule_ttl, timeout=_remaining(deadline))
+        return self.parse_schedule(body, deadline, team_ids=team_ids)
+
+    def iter_schedule(self, start_date, end_date, team_ids=None,
+                      deadline=None):
+        """Return an iterator of (date, games) played between the dates.
+
+        The schedule is retrieved right away (see get_schedule() for the
+        arguments), the days are yielded as soon as the live feeds of
+        their games are retrieved (see iter_parsed_schedule()).
+        """
+        logging.info('Retrieving NHL schedule for %s - %s.',
+                     start_date, end_date)
+        body = self.transport.get(
+            self.schedule_url(start_date, end_date),
+            max_age=self.schedule_ttl, timeout=_remaining(deadline))
+        return self.iter_parsed_schedule(body, deadline, team_ids=team_ids)
+
+    def get_cached_schedule(self, start_date, end_date, team_ids=None):
+        """Return games between the given dates using cached data only.
+
+        See get_schedule() for the arguments. Return a (schedule, age)
+        tuple where age is the age (in seconds) of the cached schedule.
+        Return (None, None) if the schedule is not cached. Games whose
+        live feeds are not cached have no last play.
+        """
+        body, age = self._get_cached_schedule_body(start_date, end_date)
+        if body is None:
+            return None, None
+        return (self.parse_schedule(body, offline=True, team_ids=team_ids),
+                age)
+
+    def _get_cached_schedule_body(self, start_date, end_date):
+        """Return (body, age) of the cached schedule or (None, None).
+
+        The body is the schedule of all teams (see schedule_url()).
+        """
+        url = self.schedule_url(start_date, end_date)
+        body = self.transport.get(url, fail=False, offline=True)
+        if body is None:
+            return None, None
+        return body, self.transport.age(url) or 0.0
+
+    def _get_cached_schedule_days(self, start_date, end_date):
+        """Return (days, ages) of the cached schedule for the given dates.
+
+        Days are a list of hockepy.schema.ScheduleDay named tuples and
+        ages is a dictionary mapping dates to ages of their schedules.
+        The schedule of the whole period is used if it's cached,
+        otherwise the schedules of the single days are (as retrieved by
+        the schedule command or the prefetch daemon). Raise OfflineError
+        if some of the days are not cached.
+        """
+        bodies = [self._get_cached_schedule_body(start_date, end_date)]
+        first = datetime.datetime.strptime(start_date, DATE_FMT).date()
+        last = datetime.datetime.strptime(end_date, DATE_FMT).date()
+        if bodies[0][0] is None and first < last:
+            dates = [(first + datetime.timedelta(days)).strftime(DATE_FMT)
+                     for days in range((last - first).days + 1)]
+            bodies = [self._get_cached_schedule_body(date, date)
+                      for date in dates]
+        if any(body is None for body, _ in bodies):
+            raise OfflineError(f'Schedule for {start_date} - {end_date} is '
+                               'not cached.')
+
+        days, ages = [], {}
+        for body, age in bodies:
+            for day in decode_schedule(body) or ():
+                days.append(day)
+                ages[day.date] = age
+        return days, ages
+
+    def get_offline_schedule(self, start_date, end_date, team_ids=None):
+        """Return games between the given dates using local data only.
+
+        See get_schedule() for the arguments. Nothing is retrieved from
+        the NHL API - cached schedules (see _get_cached_schedule_days())
+        and live feeds are used no matter how old they are and each
+        game's age is set to the age of the oldest data it's built from.
+        Games whose live feeds are not cached have no last play. Raise
+        OfflineError if the schedule is not cached.
+        """
+        days, ages = self._get_cached_schedule_days(start_date, end_date)
+        days = _filter_days(days, team_ids)
+        if not days:
+            logging.debug('No games for the period of time.')
+            return None
+
+        feeds = {game.game_id: None for day in days for game in day.games}
+        last_plays = self._get_last_play_tuples(feeds, offline=True)
+        sched = OrderedDict()
+        for day in days:
+            games = []
+            for game in day.games:
+                feed_age = self.transport.age(
+                    self.feed_url(game.game_id, projected=CURRENT_PLAY))
+                age = max(ages[day.date], feed_age or 0.0)
+                games.append(_game_tuple(game, last_plays)._replace(age=age))
+            sched[day.date] = games
+        return sched
+
+    def refresh(self, schedule):
+        """Refresh games of the given (already retrieved) schedule.
+
+        The schedule is expected as returned by get_schedule(). Only
+        games that may still change (i.e. not final or postponed games)
+        are retrieved again - each from its live feed. Changed games are
+        replaced in the schedule in place.
+        Return a list of (old, new) Game tuples for games that changed.
+        """
+        changed = []
+        if not schedule:
+            return changed
+
+        for games in schedule.values():
+            for idx, game in enumerate(games):
+                if game.status in SETTLED_STATUSES or game.game_id is None:
+                    continue
+
+                feed = self.get_feed(game.game_id, False,
+                                     projected=CURRENT_PLAY)
+                if feed is None:
+                    continue
+                try:
+                    state = decode_feed_game(feed)
+                    new_game = game._replace(
+                        home_score=state.home_score,
+                        away_score=state.away_score,
+                        time=state.time,
+                        status=get_status(state.status_code),
+                        last_play=get_play_tuple(state.current_play),
+                        # the game is complete and up to date now
+                        partial=False,
+                        age=None
+                    )
+                except (KeyError, ValueError) as err:
+                    logging.debug('Unexpected feed for %s: %s',
+                                  game.game_id, err)
+                    continue
+
+                if new_game != game:
+                    logging.debug('Game %s changed.', game.game_id)
+                    games[idx] = new_game
+                    changed.append((game, new_game))
+        return changed
+
+    def get_feed(self, game_id, fail=True, max_age=None, projected=False,
+                 timeout=None, offline=False):
+        """Retrieve the raw (undecoded) live feed for the given game.
+
+        A cached feed is used if it's not older than max_age seconds (see
+        feed_max_age()). If projected is a projection, the feed only
+        contains fields needed for it (see feed_url()). Timeout (in
+        seconds) overrides the transport's default timeout. If offline is
+        True, only the cache is used (see Transport.get()).
+        If it's not possible to retrieve the feed for the given game_id,
+        then it depends on fail parameter - if it's True, an exception
+        will be raised, otherwise None is returned without an exception.
+        """
+        url = self.feed_url(game_id, projected)
+        if self.recorder is None:
+            return self.transport.get(url, fail, max_age, timeout=timeout,
+                                      offline=offline)
+        body, cached = self.transport.fetch(url, fail, max_age,
+                                            timeout=timeout, offline=offline)
+        # only feeds retrieved over the network are new snapshots
+        if body is not None and not cached:
+            try:
+                self.recorder.record(game_id, body, projected)
+            except (OSError, ValueError) as err:
+                logging.warning('Unable to archive the feed of game %s: %s',
+                                game_id, err)
+        return body
+
+    def get_plays(self, game_id, fail=True):
+        """Retrieve all plays as provided in the live feed.
+
+        Return list of all plays available in the feed in the format
+        provided by the NHL API.
+        If it's not possible to retrieve the feed for the given game_id,
+        then it depends on fail parameter - if it's True, an exception
+        will be raised, otherwise None is returned without an exception.
+        """
+        logging.info('Retrieving NHL game live feed plays for %s.', game_id)
+        feed = self.get_feed(game_id, fail)
+        if feed is None:
+            return None
+
+        return loads(feed)['liveData']['plays']['allPlays']
+
+    def get_last_play(self, game_id, fail=True):
+        """Return the last play (for the given game) in the tuple format.
+
+        The tuple format is usually a Play named tuple or None.
+        If it's not possible to retrieve the feed for the given game_id,
+        then it depends on fail parameter - if it's True, an exception
+        will be raised, otherwise None is returned without an exception.
+        """
+        logging.info('Retrieving NHL game last play for %s.', game_id)
+        feed = self.get_feed(game_id, fail)
+        if feed is None:
+            return None
+
+        try:
+            return loads(feed)['liveData']['plays']['currentPlay']
+        except KeyError as err:
+            if fail:
+                raise err
+            return None
+
+    def get_last_play_tuple(self, game_id, fail=True, max_age=None,
+                            timeout=None, offline=False):
+        """Return the last play for the given game as a Play named tuple.
+
+        This is a faster equivalent of get_play_tuple(get_last_play(...))
+        that decodes only the fields needed for the tuple. See get_feed()
+        for the meaning of max_age, timeout and offline.
+        If it's not possible to retrieve the feed for the given game_id,
+        then it depends on fail parameter - if it's True, an exception
+        will be raised, otherwise None is returned without an exception.
+        """
+        logging.info('Retrieving NHL game last play for %s.', game_id)
+        feed = self.get_feed(game_id, fail, max_age, projected=CURRENT_PLAY,
+                             timeout=timeout, offline=offline)
+        if feed is None:
+            return None
+
+        try:
+            with span('parse.feed', game_id=game_id):
+                return get_play_tuple(decode_current_play(feed))
+        except KeyError as err:
+            if fail:
+                raise err
+            return None
+
+    def get_last_plays(self, game_ids, max_age=None, workers=None):
+        """Return last plays of the given games retrieved concurrently.
+
+        Feeds are retrieved by up to workers threads (feed_workers by
+        default) over the client's connection pool. A cached feed is used
+        if it's not older than max_age seconds. Errors are isolated per
+        game - a game whose feed can't be retrieved or decoded gets None
+        (as with get_last_play_tuple(..., fail=False)).
+        Return a dictionary mapping game IDs to Play named tuples (or
+        None) in the order of the given game IDs.
+        """
+        game_ids = list(dict.fromkeys(game_ids))
+        if not game_ids:
+            return {}
+
+        def get(game_id):
+            try:
+                return game_id, self.get_last_play_tuple(game_id, False,
+                                                         max_age)
+            except (OSError, ValueError) as err:
+                # requests' exceptions are OSErrors, malformed JSON is
+                # a ValueError
+                logging.debug('Unable to retrieve last play of %s: %s',
+                              game_id, err)
+                return game_id, None
+
+        workers = min(workers or self.feed_workers, len(game_ids))
+        with span('fetch.last_plays', games=len(game_ids)):
+            if workers == 1:
+                return dict(map(get, game_ids))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return dict(pool.map(get, game_ids))
+
+    def get_boxscore(self, game_id, fail=True, max_age=None):
+        """Return the box score of the given game.
+
+        Return a hockepy.game.BoxScore named tuple with per-team and
+        per-player stats. A cached box score is used if it's not older
+        than max_age seconds (see feed_max_age() - box scores of final
+        games can be cached forever).
+        If it's not possible to retrieve the box score for the given
+        game_id, then it depends on fail parameter - if it's True,
+        an exception will be raised, otherwise None is returned without
+        an exception.
+        """
+        logging.info('Retrieving NHL game box score for %s.', game_id)
+        url = urljoin(self._feed_url,
+                      f'{game_id}/boxscore?fields={BOXSCORE_FIELDS}')
+        body = self.transport.get(url, fail, max_age)
+        if body is None:
+            return None
+        try:
+            return decode_boxscore(body)
+        except KeyError as err:
+            if fail:
+                raise err
+            return None
+
+    def get_boxscores(self, games, workers=None):
+        """Return box scores of the given games retrieved concurrently.
+
+        Games are given as a dictionary mapping game IDs to max_age (see
+        get_boxscore()). Return a dictionary mapping game IDs to BoxScore
+        named tuples (or None if a box score couldn't be retrieved).
+        """
+        if not games:
+            return {}
+
+        def get(game):
+            game_id, max_age = game
+            try:
+                return game_id, self.get_boxscore(game_id, False, max_age)
+            except (OSError, ValueError) as err:
+                # requests' exceptions are OSErrors, malformed box scores
+                # raise ValueErrors
+                logging.debug('Unable to retrieve box score of %s: %s',
+                              game_id, err)
+                return game_id, None
+
+        workers = min(workers or self.feed_workers, len(games))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(get, games.items()))
+
+    def get_game_boxscore(self, game_id, fail=True):
+        """Return (GameStatus, BoxScore) of the given game.
+
+        Both are read from a single (projected) live feed, so the status
+        doesn't cost another request. A cached feed of a settled game is
+        used no matter how old it is, a cached feed of other games is
+        used for live_ttl seconds.
+        If it's not possible to retrieve the feed for the given game_id,
+        then it depends on fail parameter - if it's True, an exception
+        will be raised, otherwise None is returned without an exception.
+        """
+        logging.info('Retrieving NHL game box score for %s.', game_id)
+        feed = self.get_feed(game_id, False, projected=BOXSCORE,
+                             offline=True)
+        if feed is not None:
+            try:
+                status_code, box = decode_feed_boxscore(feed)
+                if get_status(status_code) in SETTLED_STATUSES:
+                    return get_status(status_code), box
+            except (KeyError, ValueError) as err:
+                logging.debug('Unexpected cached feed for %s: %s',
+                              game_id, err)
+
+        feed = self.get_feed(game_id, fail, self.live_ttl,
+                             projected=BOXSCORE)
+        if feed is None:
+            return None
+        try:
+            status_code, box = decode_feed_boxscore(feed)
+            return get_status(status_code), box
+        except (KeyError, ValueError) as err:
+            if fail:
+                raise err
+            return None
+
+    def get_teams(self, force=False, offline=False):
+        """Return all teams as a list of hockepy.teams.Team named tuples.
+
+        The teams are retrieved from the NHL API at most once per
+        TEAMS_TTL seconds (unless force is True) and registered in
+        hockepy.teams registry. If offline is True, cached teams are
+        registered (if there are any) no matter how old they are.
+        """
+        with self._teams_lock:
+            if (not force and self._teams_retrieved is not None
+                    and monotonic() - self._teams_retrieved < TEAMS_TTL):
+                return teams.get_teams()
+
+            logging.info('Retrieving NHL teams.')
+            body = self.transport.get(self._teams_url,
+                                      max_age=None if force else TEAMS_TTL,
+                                      fail=not offline, offline=offline)
+            if body is None:
+                return teams.get_teams()
+            for team in decode_teams(body):
+                teams.register(*team)
+            if not offline:
+                self._teams_retrieved = monotonic()
+            return teams.get_teams()
+
+    def get_team_id(self, team, offline=False):
+        """Return ID of the team given by its name, abbreviation or ID.
+
+        Teams already seen (e.g. in a schedule) are looked up in
+        hockepy.teams registry, all teams are retrieved from the NHL API
+        (or the cache only if offline is True) otherwise. Return None if
+        there is no such team.
+        """
+        team_id = teams.find_team_id(team)
+        if team_id is None:
+            self.get_teams(offline=offline)
+            team_id = teams.find_team_id(team)
+        return team_id
+
+
+def get_client():
+    """Return the default client.
+
+    The client is created on the first use according to CONF (see
+    HockeyClient.from_config()).
+    """
+    # pylint: disable=global-statement
+    # (the default client is a module-level singleton on purpose)
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HockeyClient.from_config()
+    return _client
+
+
+def set_client(client):
+    """Replace the default client (None means creating it again)."""
+    # pylint: disable=global-statement
+    # (the default client is a module-level singleton on purpose)
+    global _client
+
+    with _client_lock:
+        _client = client
+
+
+def save_cache_stats():
+    """Save lookup statistics of the default client's response cache.
+
+    Nothing is done if the default client has not been created or if it
+    does not use a cache (see hockepy.cache.ResponseCache.save_stats()).
+    """
+    client = _client
+    if client is not None and client.transport.cache is not None:
+        client.transport.cache.save_stats()
+
+
+def get_transport():
+    """Return the transport used to access the NHL API.
+
+    That is the transport of the default client (see get_client()).
+    """
+    return get_client().transport
+
+
+def parse_schedule(schedule, deadline=None, offline=False, team_ids=None):
+    """Return games played according to the schedule.
+
+    See HockeyClient.parse_schedule().
+    """
+    return get_client().parse_schedule(schedule, deadline, offline,
+                                       team_ids)
+
+
+def get_teams(force=False, offline=False):
+    """Return all teams as a list of hockepy.teams.Team named tuples.
+
+    See HockeyClient.get_teams().
+    """
+    return get_client().get_teams(force, offline)
+
+
+def get_team_id(team, offline=False):
+    """Return ID of the team given by its name, abbreviation or ID.
+
+    See HockeyClient.get_team_id().
+    """
+    return get_client().get_team_id(team, offline)
+
+
+def feed_max_age(status):
+    """Return max_age of a cached live feed for a game in the status.
+
+    See HockeyClient.feed_max_age().
+    """
+    return get_client().feed_max_age(status)
+
+
+def schedule_url(start_date, end_date):
+    """Return URL of the schedule for the given dates.
+
+    See HockeyClient.schedule_url().
+    """
+    return get_client().schedule_url(start_date, end_date)
+
+
+def get_schedule_days(start_date, end_date, max_age=None, team_ids=None):
+    """Return the schedule between the given dates without live feeds.
+
+    See HockeyClient.get_schedule_days().
+    """
+    return get_client().get_schedule_days(start_date, end_date, max_age,
+                                          team_ids)
+
+
+def get_schedule(start_date, end_date, team_ids=None, deadline=None):
+    """Return games played between the given dates.
+
+    See HockeyClient.get_schedule().
+    """
+    return get_client().get_schedule(start_date, end_date, team_ids,
+                                     deadline)
+
+
+def iter_schedule(start_date, end_date, team_ids=None, deadline=None):
+    """Return an iterator of (date, games) played between the dates.
+
+    See HockeyClient.iter_schedule().
+    """
+    return get_client().iter_schedule(start_date, end_date, team_ids,
+                                      deadline)
+
+
+def feed_url(game_id, projected=False):
+    """Return URL of the live feed for the given game.
+
+    See HockeyClient.feed_url().
+    """
+    return get_client().feed_url(game_id, projected)
+
+
+def get_cached_schedule(start_date, end_date, team_ids=None):
+    """Return games between the given dates using cached data only.
+
+    See HockeyClient.get_cached_schedule().
+    """
+    return get_client().get_cached_schedule(start_date, end_date, team_ids)
+
+
+def get_offline_schedule(start_date, end_date, team_ids=None):
+    """Return games between the given dates using local data only.
+
+    See HockeyClient.get_offline_schedule().
+    """
+    return get_client().get_offline_schedule(start_date, end_date, team_ids)
+
+
+def get_feed(game_id, fail=True, max_age=None, projected=False,
+             timeout=None, offline=False):
+    """Retrieve the raw (undecoded) live feed for the given game.
+
+    See HockeyClient.get_feed().
+    """
+    return get_client().get_feed(game_id, fail, max_age, projected, timeout,
+                                 offline)
+
+
+def get_plays(game_id, fail=True):
+    """Retrieve all plays as provided in the live feed.
+
+    See HockeyClient.get_plays().
+    """
+    return get_client().get_plays(game_id, fail)
 
 
 def get_last_play(game_id, fail=True):
     """Return the last play (for the given game) in the tuple format.
 
-    The tuple format is usually a Play named tuple or None.
-    If it's not possible to retrieve the feed for the given game_id,
-    then it depends on fail parameter - if it's True, an exception will
-    be raised, otherwise None is returned without an exception.
-    """
-    logging.info('Retrieving NHL game last play for %s.', game_id)
-    url = urljoin(FEED_URL, f'{game_id}/feed/live')
-    response = requests.get(url)
-    if response.status_code != requests.codes['ok']:
-        log_bad_response_msg(response)
-        if fail:
-            response.raise_for_status()
-        return None
+    See HockeyClient.get_last_play().
+    """
+    return get_client().get_last_play(game_id, fail)
 
-    try:
-        return response.json()['liveData']['plays']['currentPlay']
-    except KeyError as err:
-        if fail:
-            raise err
-        return None
+
+def get_last_play_tuple(game_id, fail=True, max_age=None, timeout=None,
+                        offline=False):
+    """Return the last play for the given game as a Play named tuple.
+
+    See HockeyClient.get_last_play_tuple().
+    """
+    return get_client().get_last_play_tuple(game_id, fail, max_age, timeout,
+                                            offline)
+
+
+def get_last_plays(game_ids, max_age=None, workers=None):
+    """Return last plays of the given games retrieved concurrently.
+
+    See HockeyClient.get_last_plays().
+    """
+    return get_client().get_last_plays(game_ids, max_age, workers)
+
+
+def get_boxscore(game_id, fail=True, max_age=None):
+    """Return the box score of the given game.
+
+    See HockeyClient.get_boxscore().
+    """
+    return get_client().get_boxscore(game_id, fail, max_age)
+
+
+def get_boxscores(games, workers=None):
+    """Return box scores of the given games retrieved concurrently.
+
+    See HockeyClient.get_boxscores().
+    """
+    return get_client().get_boxscores(games, workers)
+
+
+def get_game_boxscore(game_id, fail=True):
+    """Return (GameStatus, BoxScore) of the given game.
+
+    See HockeyClient.get_game_boxscore().
+    """
+    return get_client().get_game_boxscore(game_id, fail)
+
+
+def refresh(schedule):
+    """Refresh games of the given (already retrieved) schedule.
+
+    See HockeyClient.refresh().
+    """
+    return get_client().refresh(schedule)
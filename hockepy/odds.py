@@ -0,0 +1,212 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.odds
+------------
+
+This module implements a Monte Carlo simulator of playoff odds.
+
+The rest of the regular season is simulated many times (in vectorized
+batches using NumPy, optionally in several processes) starting from the
+current standings and the probability of making the playoffs is reported
+for each team. NumPy is an optional dependency of hockepy - it's needed
+by simulate() only.
+
+Standings count 2 points for a win and 1 point for an overtime or
+shootout loss. Playoff spots are split evenly among conferences (if
+known), ties are broken randomly. Teams are identified by their IDs (see
+hockepy.teams).
+
+These interfaces are implemented:
+- Standings named tuple
+- get_standings() computes standings from finished games
+- get_remaining() returns remaining games
+- simulate() simulates the rest of the season
+"""
+
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hockepy.game import GameStatus, GameType
+
+# Probability that the home team wins a game.
+HOME_WIN_PROB = 0.55
+
+# Probability that a game goes to overtime (or shootout).
+OVERTIME_PROB = 0.23
+
+# Number of playoff spots.
+PLAYOFF_SPOTS = 16
+
+# Number of seasons simulated at once.
+BATCH_SIZE = 10000
+
+
+Standings = namedtuple(
+    'Standings',
+    ['points',      # team ID -> points
+     'played']      # team ID -> games played
+)
+
+
+def _went_to_overtime(game):
+    """Return True if the (finished) game was decided in OT or SO."""
+    return (game.last_play is not None
+            and game.last_play.period in ('OT', 'SO'))
+
+
+def get_standings(games):
+    """Return Standings computed from the given games.
+
+    Only final regular season games count. Teams are identified by their
+    IDs.
+    """
+    points = {}
+    played = {}
+    for game in games:
+        for team in (game.home_id, game.away_id):
+            points.setdefault(team, 0)
+            played.setdefault(team, 0)
+        if game.type != GameType.REGULAR or game.status != GameStatus.FINAL:
+            continue
+        played[game.home_id] += 1
+        played[game.away_id] += 1
+        if game.home_score > game.away_score:
+            winner, loser = game.home_id, game.away_id
+        else:
+            winner, loser = game.away_id, game.home_id
+        points[winner] += 2
+        if _went_to_overtime(game):
+            points[loser] += 1
+    return Standings(points=points, played=played)
+
+
+def get_remaining(games):
+    """Return (home ID, away ID) of regular season games to be played."""
+    return [(game.home_id, game.away_id) for game in games
+            if game.type == GameType.REGULAR
+            and game.status in (GameStatus.SCHEDULED, GameStatus.LIVE)]
+
+
+def _check_numpy():
+    """Raise RuntimeError if NumPy is not available."""
+    if numpy is None:
+        raise RuntimeError('NumPy is needed to simulate playoff odds.')
+
+
+def _simulate_batch(task):
+    """Simulate a batch of seasons.
+
+    The task is a tuple of (base points, home indices, away indices,
+    conference groups, spots per group, home win probability, overtime
+    probability, number of simulations, seed). Return counts of
+    playoff appearances per team.
+    """
+    (base, home, away, groups, spots, home_win_prob, overtime_prob,
+     sims, seed) = task
+    rng = numpy.random.default_rng(seed)
+    n_teams = len(base)
+    n_games = len(home)
+
+    # incidence matrices: game -> team
+    home_inc = numpy.zeros((n_games, n_teams), dtype=numpy.float32)
+    home_inc[numpy.arange(n_games), home] = 1
+    away_inc = numpy.zeros((n_games, n_teams), dtype=numpy.float32)
+    away_inc[numpy.arange(n_games), away] = 1
+    diff_inc = home_inc - away_inc
+
+    counts = numpy.zeros(n_teams, dtype=numpy.int64)
+    done = 0
+    while done < sims:
+        size = min(BATCH_SIZE, sims - done)
+        home_wins = (rng.random((size, n_games), dtype=numpy.float32)
+                     < home_win_prob).astype(numpy.float32)
+        overtime = (rng.random((size, n_games), dtype=numpy.float32)
+                    < overtime_prob).astype(numpy.float32)
+        # a game is worth 2 points (3 if decided in overtime), the home
+        # team gets 2 for a win and 1 for an overtime loss
+        home_pts = overtime + home_wins * (2 - overtime)
+        game_pts = overtime + 2
+        points = base + home_pts @ diff_inc + game_pts @ away_inc
+        # random tie breaks (points are integers)
+        points += rng.random((size, n_teams)) * 0.5
+
+        for group, group_spots in zip(groups, spots):
+            group_points = points[:, group]
+            if group_spots >= len(group):
+                counts[group] += size
+                continue
+            top = numpy.argpartition(-group_points, group_spots - 1,
+                                     axis=1)[:, :group_spots]
+            counts[group] += numpy.bincount(top.ravel(),
+                                            minlength=len(group))
+        done += size
+    return counts
+
+
+def simulate(standings, remaining, sims=100000, conferences=None,
+             spots=PLAYOFF_SPOTS, workers=1, seed=None,
+             home_win_prob=HOME_WIN_PROB, overtime_prob=OVERTIME_PROB):
+    """Simulate the rest of the season and return playoff odds.
+
+    Standings are current Standings, remaining are (home ID, away ID)
+    pairs of games to be played. If conferences (team ID -> conference)
+    are given, playoff spots are split evenly among them, otherwise the
+    best teams overall make the playoffs. Simulations are split among
+    the given number of worker processes (all CPUs if None).
+    Return a dictionary mapping team IDs to their probability of making
+    the playoffs.
+    """
+    _check_numpy()
+    teams = sorted(set(standings.points)
+                   | {team for game in remaining for team in game})
+    index = {team: idx for idx, team in enumerate(teams)}
+    base = numpy.array([standings.points.get(team, 0) for team in teams],
+                       dtype=numpy.float32)
+    home = numpy.array([index[game[0]] for game in remaining],
+                       dtype=numpy.intp)
+    away = numpy.array([index[game[1]] for game in remaining],
+                       dtype=numpy.intp)
+
+    if conferences and all(conferences.get(team) for team in teams):
+        names = sorted(set(conferences[team] for team in teams))
+        groups = [numpy.array([index[team] for team in teams
+                               if conferences[team] == name])
+                  for name in names]
+        group_spots = [spots // len(names)] * len(names)
+    else:
+        groups = [numpy.arange(len(teams))]
+        group_spots = [spots]
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, sims // BATCH_SIZE or 1))
+    seeds = numpy.random.SeedSequence(seed).spawn(workers)
+    tasks = [(base, home, away, groups, group_spots, home_win_prob,
+              overtime_prob, sims // workers + (idx < sims % workers),
+              seeds[idx])
+             for idx in range(workers)]
+    logging.info('Simulating %d seasons (%d games left) in %d process(es).',
+                 sims, len(remaining), workers)
+
+    if workers == 1:
+        counts = _simulate_batch(tasks[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = sum(executor.map(_simulate_batch, tasks))
+
+    return {team: float(counts[idx]) / sims for team, idx in index.items()}
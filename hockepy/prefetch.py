@@ -0,0 +1,243 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.prefetch
+----------------
+
+This module implements warming of the response cache ahead of time.
+
+Schedules for the upcoming days are retrieved in advance and live feeds
+are retrieved shortly before each game starts (and while it's live) so
+that interactive commands are served from the cache.
+
+These functions are implemented:
+- due_games() returns IDs of games whose feeds should be warmed
+- next_wakeup() returns when the next game needs its feed warmed
+- prefetch() warms the cache once
+- run_daemon() keeps warming the cache until stopped
+- warm() warms the cache with schedules and feeds of a period
+- spawn_revalidation() refreshes a cached schedule in a detached process
+
+The module can be run (python -m hockepy.prefetch FIRST LAST [TEAM_ID...])
+to refresh the cached schedule between the given dates - that is what
+spawn_revalidation() does.
+"""
+
+import concurrent.futures
+import datetime
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+import hockepy
+from hockepy import nhl
+from hockepy.config import CONF, init_config
+from hockepy.game import GameStatus
+from hockepy.transport import FOREVER
+
+# How long (in seconds) before a game starts its feed is warmed.
+PREFETCH_LEAD = 5 * 60
+
+# Longest time (in seconds) the daemon sleeps without checking the
+# schedule again.
+MAX_SLEEP = 60 * 60
+
+DATE_FMT = '%Y-%m-%d'
+
+
+def _now():
+    """Return current UTC time."""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def due_games(days, now, lead=PREFETCH_LEAD):
+    """Return IDs of games whose feeds should be warmed now.
+
+    These are live games and games starting within lead seconds (or
+    that should have started already).
+    """
+    soon = now + datetime.timedelta(seconds=lead)
+    due = []
+    for day in days or ():
+        for game in day.games:
+            status = nhl.get_status(game.status_code)
+            if status == GameStatus.LIVE:
+                due.append(game.game_id)
+            elif (status == GameStatus.SCHEDULED and game.time is not None
+                  and game.time <= soon):
+                due.append(game.game_id)
+    return due
+
+
+def next_wakeup(days, now, lead=PREFETCH_LEAD):
+    """Return when the next game's feed needs to be warmed or None."""
+    times = [game.time - datetime.timedelta(seconds=lead)
+             for day in days or () for game in day.games
+             if game.time is not None
+             and nhl.get_status(game.status_code) == GameStatus.SCHEDULED]
+    upcoming = [wakeup for wakeup in times if wakeup > now]
+    return min(upcoming, default=None)
+
+
+def prefetch(days_ahead=1, lead=PREFETCH_LEAD, now=None):
+    """Warm the cache once.
+
+    Retrieve the schedule for today and days_ahead following days, the
+    teams and live feeds of games that are live or start within lead
+    seconds.
+    Return the retrieved schedule (see nhl.get_schedule_days()) - an
+    empty list if there are no games.
+    """
+    now = now or _now()
+    today = now.astimezone().date()
+    # day by day - the way the schedule and today commands retrieve it
+    days = []
+    for offset in range(days_ahead + 1):
+        day = (today + datetime.timedelta(days=offset)).strftime(DATE_FMT)
+        days.extend(nhl.get_schedule_days(day, day) or ())
+
+    # teams are needed to look teams up by name (e.g. offline)
+    nhl.get_teams()
+
+    game_ids = due_games(days, now, lead)
+    logging.info('Prefetching feeds of %d game(s).', len(game_ids))
+    for game_id in game_ids:
+        nhl.get_feed(game_id, False, projected=nhl.CURRENT_PLAY)
+    return days
+
+
+def run_daemon(days_ahead=1, lead=PREFETCH_LEAD, interval=None,
+               stop_event=None):
+    """Keep warming the cache until stop_event is set.
+
+    While there are games live or about to start, the cache is warmed
+    every interval seconds ('live_ttl' configuration by default).
+    Otherwise sleep until the next game is about to start.
+    """
+    if interval is None:
+        interval = CONF.get('live_ttl') or 10
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        now = _now()
+        try:
+            days = prefetch(days_ahead, lead, now)
+        except OSError as err:
+            # network errors (requests' exceptions are OSErrors) must not
+            # stop the daemon
+            logging.warning('Prefetching failed: %s', err)
+            sleep = interval
+        else:
+            if due_games(days, now, lead):
+                sleep = interval
+            else:
+                wakeup = next_wakeup(days, now, lead)
+                sleep = MAX_SLEEP if wakeup is None else min(
+                    MAX_SLEEP, (wakeup - now).total_seconds())
+        logging.debug('Prefetch daemon sleeping for %.0f seconds.', sleep)
+        stop_event.wait(max(sleep, 1))
+
+
+def warm(start_date, end_date, workers=None, today=None):
+    """Warm the cache with schedules and feeds between the given dates.
+
+    The schedule of each day (as retrieved by the schedule command) and
+    the live feeds of all games that are over are retrieved using up to
+    workers concurrent requests (the client's feed_workers by default).
+    Feeds of final games and past schedules whose games are all settled
+    (final or postponed) that are cached already are not retrieved again
+    - a cached past schedule with unsettled games (e.g. cached while
+    they were played) is. Failures are logged and skipped. Return a tuple
+    of the number of days and the number of feeds that were warmed.
+    """
+    first = datetime.datetime.strptime(start_date, DATE_FMT).date()
+    last = datetime.datetime.strptime(end_date, DATE_FMT).date()
+    today = today or datetime.date.today()
+    dates = [first + datetime.timedelta(days=offset)
+             for offset in range((last - first).days + 1)]
+
+    def settled(days):
+        return all(nhl.get_status(game.status_code) in nhl.SETTLED_STATUSES
+                   for day in days for game in day.games)
+
+    def get_day(date):
+        day = date.strftime(DATE_FMT)
+        try:
+            if date >= today:
+                return nhl.get_schedule_days(
+                    day, day, CONF.get('schedule_ttl')) or []
+            days = nhl.get_schedule_days(day, day, FOREVER) or []
+            if not settled(days):
+                logging.debug('Cached schedule for %s is not settled.', day)
+                days = nhl.get_schedule_days(day, day) or []
+            return days
+        except OSError as err:
+            logging.warning('Unable to warm the schedule for %s: %s',
+                            day, err)
+            return None
+
+    def get_feed(game_id):
+        try:
+            return nhl.get_feed(game_id, False, FOREVER,
+                                projected=nhl.CURRENT_PLAY)
+        except OSError as err:
+            logging.warning('Unable to warm the feed of game %s: %s',
+                            game_id, err)
+            return None
+
+    workers = workers or nhl.get_client().feed_workers
+    with concurrent.futures.ThreadPoolExecutor(max(1, workers)) as pool:
+        schedules = [days for days in pool.map(get_day, dates)
+                     if days is not None]
+        game_ids = [game.game_id
+                    for days in schedules for day in days
+                    for game in day.games
+                    if nhl.get_status(game.status_code) == GameStatus.FINAL]
+        logging.info('Warming feeds of %d game(s).', len(game_ids))
+        feeds = sum(feed is not None
+                    for feed in pool.map(get_feed, game_ids))
+    return len(schedules), feeds
+
+
+def spawn_revalidation(start_date, end_date, team_ids=None):
+    """Refresh the cached schedule between the dates in the background.
+
+    The schedule (and the live feeds of its games) is retrieved by
+    a detached process that does not hold the caller's output open, so
+    the caller can exit right away without waiting for it.
+    """
+    args = [sys.executable, '-m', __name__, start_date, end_date]
+    args.extend(str(team_id) for team_id in sorted(team_ids or ()))
+    env = dict(os.environ)
+    # hockepy needs to be importable even if it's not installed
+    package_dir = os.path.dirname(os.path.dirname(hockepy.__file__))
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, (package_dir, env.get('PYTHONPATH'))))
+    try:
+        # the process outlives the call on purpose
+        subprocess.Popen(  # pylint: disable=consider-using-with
+            args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, env=env, start_new_session=True)
+    except OSError as err:
+        logging.warning('Unable to revalidate the schedule: %s', err)
+
+
+def _main(argv):
+    """Refresh the cached schedule (see spawn_revalidation())."""
+    init_config()
+    start_date, end_date, *team_ids = argv
+    nhl.get_schedule(start_date, end_date,
+                     {int(team_id) for team_id in team_ids} or None)
+
+
+if __name__ == '__main__':
+    _main(sys.argv[1:])
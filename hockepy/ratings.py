@@ -0,0 +1,236 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.ratings
+---------------
+
+This module implements Elo ratings of teams.
+
+Ratings are updated from the chronological stream of final game results.
+The state (ratings and a watermark of the last applied game) is persisted
+so that new results are applied incrementally - games at or before the
+watermark are skipped - instead of replaying the whole history. Teams are
+identified by their IDs.
+
+These interfaces are implemented:
+- Ratings class holds the ratings and applies results to them
+- load_ratings() loads persisted ratings
+- iter_results() streams final games from schedules chunk by chunk
+- backfill() updates ratings from schedules between two dates
+"""
+
+import datetime
+import json
+import logging
+import os
+
+from hockepy import nhl, teams
+from hockepy.cache import read_file, write_file
+from hockepy.config import CONF
+from hockepy.game import Game, GameStatus, GameType
+from hockepy.transport import FOREVER
+
+# Rating of a team without any games.
+INITIAL_RATING = 1500.0
+
+# How much a single game changes the ratings.
+K_FACTOR = 8.0
+
+# Rating points added to the home team when predicting a game.
+HOME_ADVANTAGE = 35.0
+
+# Fraction of the distance from the mean each rating loses at the start
+# of a new season.
+SEASON_REGRESSION = 0.3
+
+# Number of days retrieved at once by iter_results().
+CHUNK_DAYS = 30
+
+# How long after the end of a day (in UTC) all its games are surely over.
+SETTLE_DELAY = datetime.timedelta(hours=12)
+
+DATE_FMT = '%Y-%m-%d'
+
+
+def _season(game_id):
+    """Return the season (its first year) of the given game or None."""
+    return None if game_id is None else game_id // 1000000
+
+
+class Ratings:
+    """Elo ratings of teams.
+
+    Results are applied in chronological order. The watermark is the
+    (time, game ID) of the last applied game, games not after it are
+    skipped when applying results.
+    """
+
+    def __init__(self, ratings=None, watermark=None, season=None):
+        """Initialize ratings (team ID -> rating) and the watermark."""
+        self.ratings = dict(ratings or {})
+        self.watermark = watermark
+        self.season = season
+
+    def rating(self, team_id):
+        """Return rating of the given team."""
+        return self.ratings.get(team_id, INITIAL_RATING)
+
+    def win_probability(self, home_id, away_id):
+        """Return probability that the home team wins."""
+        diff = self.rating(away_id) - self.rating(home_id) - HOME_ADVANTAGE
+        return 1 / (1 + 10 ** (diff / 400))
+
+    def _new_season(self, season):
+        """Regress all ratings to the mean at the start of a new season."""
+        if season is None or season == self.season:
+            return
+        if self.season is not None:
+            logging.debug('Season %d started, regressing ratings.', season)
+            for team_id, rating in self.ratings.items():
+                self.ratings[team_id] = rating - SEASON_REGRESSION * (
+                    rating - INITIAL_RATING)
+        self.season = season
+
+    def update(self, games, today=None):
+        """Apply results of the given games (in chronological order).
+
+        Final regular season and playoff games after the watermark are
+        applied. Applying stops at the first game scheduled or live today
+        (or later) so that games still to finish are not skipped next
+        time. Older games that are not final (e.g. never played) are
+        skipped. Return the number of applied games.
+        """
+        today = today or datetime.date.today()
+        applied = 0
+        for game in games:
+            if (game.status in (GameStatus.SCHEDULED, GameStatus.LIVE)
+                    and (game.time is None
+                         or game.time.astimezone().date() >= today)):
+                # time TBD means the game is still to be played
+                break
+            if (game.status != GameStatus.FINAL
+                    or game.type == GameType.PRESEASON
+                    or game.time is None or game.home_id is None
+                    or game.away_id is None):
+                continue
+            key = (game.time, game.game_id or 0)
+            if self.watermark is not None and key <= self.watermark:
+                continue
+
+            self._new_season(_season(game.game_id))
+            expected = self.win_probability(game.home_id, game.away_id)
+            result = 1.0 if game.home_score > game.away_score else 0.0
+            delta = K_FACTOR * (result - expected)
+            self.ratings[game.home_id] = self.rating(game.home_id) + delta
+            self.ratings[game.away_id] = self.rating(game.away_id) - delta
+            self.watermark = key
+            applied += 1
+        return applied
+
+    def to_dict(self):
+        """Return the state as a JSON serializable dictionary."""
+        watermark = None
+        if self.watermark is not None:
+            watermark = [self.watermark[0].isoformat(), self.watermark[1]]
+        return {
+            'ratings': {str(team_id): rating
+                        for team_id, rating in self.ratings.items()},
+            'watermark': watermark,
+            'season': self.season,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Return Ratings with the state returned by to_dict()."""
+        watermark = state.get('watermark')
+        if watermark is not None:
+            watermark = (datetime.datetime.fromisoformat(watermark[0]),
+                         watermark[1])
+        return cls({int(team_id): rating
+                    for team_id, rating in state['ratings'].items()},
+                   watermark, state.get('season'))
+
+    def save(self, path=None):
+        """Atomically save the state ('ratings_file' by default)."""
+        path = os.path.expanduser(path or CONF['ratings_file'])
+        write_file(path, json.dumps(self.to_dict()).encode())
+
+
+def load_ratings(path=None):
+    """Return persisted Ratings ('ratings_file' by default) or None."""
+    path = path or CONF.get('ratings_file')
+    if not path:
+        return None
+    try:
+        return Ratings.from_dict(json.loads(read_file(
+            os.path.expanduser(path))))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        logging.warning('Unable to load ratings from %r: %s', path, err)
+        return None
+
+
+def _chunk_max_age(start_date, end_date, now):
+    """Return max_age of the cached schedule between the given dates.
+
+    A schedule cached once all the games of its last day were surely
+    over (see SETTLE_DELAY) never changes and so it's used no matter how
+    old it is. A schedule cached earlier is retrieved again once the
+    games are over, until then it's used for 'schedule_ttl' seconds.
+    """
+    end = datetime.datetime.strptime(end_date, DATE_FMT).replace(
+        tzinfo=datetime.timezone.utc)
+    settled = end + datetime.timedelta(days=1) + SETTLE_DELAY
+    if now < settled:
+        return CONF.get('schedule_ttl')
+    age = nhl.get_transport().age(nhl.schedule_url(start_date, end_date))
+    if age is not None and now - datetime.timedelta(seconds=age) >= settled:
+        return FOREVER
+    # not cached or cached before the games were over
+    return None
+
+
+def iter_results(start_date, end_date, chunk_days=CHUNK_DAYS):
+    """Yield games between the given dates in chronological order.
+
+    Schedules are retrieved (without live feeds) chunk_days at a time so
+    that memory use does not grow with the length of the period. Games
+    have no last play, their teams are registered in hockepy.teams.
+    See _chunk_max_age() for how long schedules are cached.
+    """
+    first = datetime.datetime.strptime(start_date, DATE_FMT).date()
+    last = datetime.datetime.strptime(end_date, DATE_FMT).date()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    while first <= last:
+        chunk_end = min(last, first + datetime.timedelta(days=chunk_days - 1))
+        chunk = (first.strftime(DATE_FMT), chunk_end.strftime(DATE_FMT))
+        days = nhl.get_schedule_days(*chunk, _chunk_max_age(*chunk, now))
+        games = (game for day in days or () for game in day.games)
+        for game in sorted(games, key=lambda game: (
+                game.time is None, game.time, game.game_id)):
+            yield Game(home=teams.register(game.home_id, game.home),
+                       away=teams.register(game.away_id, game.away),
+                       home_score=game.home_score,
+                       away_score=game.away_score, time=game.time,
+                       type=nhl.get_type(game.game_type),
+                       status=nhl.get_status(game.status_code),
+                       last_play=None, home_id=game.home_id,
+                       away_id=game.away_id, game_id=game.game_id)
+        first = chunk_end + datetime.timedelta(days=1)
+
+
+def backfill(ratings, start_date, end_date, chunk_days=CHUNK_DAYS):
+    """Update ratings from results between the given dates.
+
+    Return the number of applied games.
+    """
+    return ratings.update(iter_results(start_date, end_date, chunk_days))
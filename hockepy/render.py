@@ -0,0 +1,225 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.render
+--------------
+
+This module implements rendering of schedules as text.
+
+A ScheduleRenderer compiles its row templates once (per team width) and
+caches the texts that repeat across games - team names (highlighted or
+not), game times, types and statuses. Each day of a schedule is rendered
+into a single string and written to the output at once (as soon as the
+day is available if the schedule is streamed), so that rendering even
+a long schedule is dominated by I/O.
+
+These interfaces are implemented:
+- ScheduleRenderer class renders schedules
+"""
+
+import sys
+from collections.abc import Mapping
+
+from hockepy.game import GameStatus, GameType, has_started
+from hockepy.teams import find_team_id
+from hockepy.trace import span
+from hockepy.utils import bold_escape_seq_width, bold_text
+
+# Texts of game types and statuses as printed.
+_TYPE_TXT = {game_type: f'{game_type:2}' for game_type in GameType}
+_STATUS_TXT = {status: f'({status})' for status in GameStatus}
+
+# Periods printed next to the score.
+_EXTRA_PERIODS = ('SO', 'OT')
+
+# Score text of games that have not started yet.
+_NO_SCORE = '      '
+
+
+def _format_age(age):
+    """Return the age (in seconds) of data as text."""
+    if age < 60:
+        return '<1 min'
+    if age < 60 * 60:
+        return f'{age // 60:.0f} min'
+    if age < 24 * 60 * 60:
+        return f'{age // (60 * 60):.0f} h'
+    return f'{age // (24 * 60 * 60):.0f} d'
+
+
+class ScheduleRenderer:
+    """Renderer of schedules (see nhl.get_schedule()) as text.
+
+    Rows are composed of the game's type, teams, time, score, status
+    (possibly with the age of the game's local data and win
+    probabilities) and the last play of live games.
+    """
+
+    def __init__(self, home_first=False, timezone=None, highlight_ids=(),
+                 highlight_names=(), ratings=None, out=None):
+        """Initialize the renderer.
+
+        If home_first is True, print the home team first. If timezone is
+        provided, print times in this time zone, otherwise use the game
+        time's time zone. Highlight teams with IDs in highlight_ids and
+        teams given in highlight_names by names, abbreviations or IDs -
+        these are looked up when their games are rendered (teams of
+        a streamed schedule are registered as it's retrieved). If
+        ratings (hockepy.ratings.Ratings) are provided, print win
+        probabilities of scheduled games. Write to out (sys.stdout by
+        default).
+        """
+        self.home_first = home_first
+        self.timezone = timezone
+        self.highlight_ids = frozenset(highlight_ids)
+        self.highlight_names = frozenset(highlight_names)
+        # highlighted teams whose IDs are not known (yet)
+        self._unresolved = set(self.highlight_names)
+        self.ratings = ratings
+        self.out = out
+        self._bold_width = bold_escape_seq_width()
+        # the template's arguments are: home, home width, away, away width
+        if home_first:
+            self._teams_tmpl = '{0:>{1}} : {2:<{3}}'
+        else:
+            self._teams_tmpl = '{2:>{3}} @ {0:<{1}}'
+        self._teams = {}
+        self._times = {}
+
+    def _team(self, team_id, name):
+        """Return (text, extra width) of the team's name.
+
+        Highlighted names are wrapped with escape sequences, which take
+        extra width. Cache the results.
+        """
+        key = (team_id, name)
+        cached = self._teams.get(key)
+        if cached is None:
+            if team_id is not None and self._unresolved:
+                self._resolve_highlighted()
+            highlighted = (name in self.highlight_names
+                           or (team_id is not None
+                               and team_id in self.highlight_ids))
+            if highlighted:
+                cached = (bold_text(name), self._bold_width)
+            else:
+                cached = (name, 0)
+            self._teams[key] = cached
+        return cached
+
+    def _resolve_highlighted(self):
+        """Add IDs of newly registered highlighted teams to highlight_ids."""
+        resolved = {team: find_team_id(team) for team in self._unresolved}
+        resolved = {team: team_id for team, team_id in resolved.items()
+                    if team_id is not None}
+        if resolved:
+            self.highlight_ids |= frozenset(resolved.values())
+            self._unresolved -= resolved.keys()
+
+    def _time(self, gametime):
+        """Return the text of the given game time. Cache the results."""
+        text = self._times.get(gametime)
+        if text is None:
+            if not gametime:
+                text = 'Time TBD'
+            else:
+                local = (gametime.astimezone(self.timezone) if self.timezone
+                         else gametime)
+                text = f'{local.hour:02d}:{local.minute:02d} {local.tzname()}'
+            self._times[gametime] = text
+        return text
+
+    def _pair(self, home, away):
+        """Return the two values in the order of the teams."""
+        if self.home_first:
+            return f'{home}:{away}'
+        return f'{away}:{home}'
+
+    def _score(self, game):
+        """Return the text of the game's score."""
+        if not has_started(game):
+            # the game has not started yet -> don't display score
+            return _NO_SCORE
+        score = self._pair(game.home_score, game.away_score)
+        last_play = game.last_play
+        if last_play and last_play.period in _EXTRA_PERIODS:
+            return f'{score} {last_play.period}'
+        return score + '   '
+
+    def _status(self, game):
+        """Return the text of the game's status."""
+        status = _STATUS_TXT[game.status]
+        if game.partial:
+            status += ' (updating)'
+        if game.age is not None:
+            status += f' [{_format_age(game.age)} old]'
+        if (self.ratings is not None and game.status == GameStatus.SCHEDULED
+                and game.home_id is not None and game.away_id is not None):
+            home = round(100 * self.ratings.win_probability(game.home_id,
+                                                            game.away_id))
+            status += ' ' + self._pair(f'{home}%', f'{100 - home}%')
+        return status
+
+    def render_game(self, game, team_width):
+        """Return the line (without a newline) of the given game.
+
+        Each team name is padded to at least team_width characters.
+        """
+        home, home_extra = self._team(game.home_id, game.home)
+        away, away_extra = self._team(game.away_id, game.away)
+        teams = self._teams_tmpl.format(home, team_width + home_extra,
+                                        away, team_width + away_extra)
+        last_play = ''
+        if game.status == GameStatus.LIVE and game.last_play:
+            last_play = (f'- {game.last_play.description} '
+                         f'({game.last_play.time})')
+        return ' '.join((_TYPE_TXT[game.type], teams, self._time(game.time),
+                         self._score(game), self._status(game), last_play))
+
+    def render_day(self, date, games):
+        """Return the text of the given day of a schedule."""
+        lines = [f'Schedule for {date}']
+        if not games:
+            lines.append(f'  No games for {date}.')
+        else:
+            # + 1 is an additional padding
+            team_width = max(max(len(game.home), len(game.away))
+                             for game in games) + 1
+            lines.extend(self.render_game(game, team_width)
+                         for game in games)
+        lines.append('\n')
+        return '\n'.join(lines)
+
+    def write(self, text):
+        """Write the text to the output at once and flush it."""
+        out = self.out or sys.stdout
+        out.write(text)
+        out.flush()
+
+    def render(self, schedule):
+        """Write the schedule, one write per day.
+
+        The schedule is either a dictionary mapping dates to lists of
+        games or an iterable of (date, games) tuples - each day is
+        written as soon as it's yielded then (see
+        hockepy.nhl.iter_schedule()).
+        """
+        if schedule is None:
+            schedule = ()
+        elif isinstance(schedule, Mapping):
+            schedule = schedule.items()
+        empty = True
+        for date, games in schedule:
+            empty = False
+            with span('render.day', date=date, games=len(games)):
+                self.write(self.render_day(date, games))
+        if empty:
+            self.write('No games at all.\n')
@@ -0,0 +1,434 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.schema
+--------------
+
+This module implements typed decoding of NHL API payloads.
+
+Only the fields hockepy actually uses are kept - the rest of the (large)
+payloads is thrown away right after JSON decoding. A fast JSON backend
+(orjson) is used if installed, the standard json module otherwise.
+
+These interfaces are implemented:
+- ScheduleGame named tuple
+- ScheduleDay named tuple
+- FeedPlay named tuple
+- FeedGame named tuple
+- loads() decodes JSON from bytes or str
+- parse_time() parses the API's date/time format
+- decode_schedule() decodes a schedule payload
+- decode_play() decodes a single play from a live feed
+- decode_current_play() decodes the current play of a live feed
+- decode_feed_game() decodes game's state from a live feed
+- decode_teams() decodes a teams payload
+- decode_boxscore() decodes a boxscore payload
+- decode_feed_boxscore() decodes game's status and box score from a live
+  feed
+- SCHEDULE_PATHS, FEED_PATHS, PLAYS_PATHS, BOXSCORE_PATHS and
+  FEED_BOXSCORE_PATHS list fields read from the payloads
+- fields_param() returns the API's fields projection for given paths
+- project() applies a projection to an already decoded payload
+"""
+
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from hockepy.game import BoxScore, PlayerBox, TeamBox
+from hockepy.teams import Team
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+ScheduleGame = namedtuple(
+    'ScheduleGame',
+    ['game_id',     # NHL API's gamePk
+     'game_type',   # NHL API's gameType ('PR', 'R', 'P',...)
+     'time',        # UTC time and date (datetime object) or None
+     'status_code',  # NHL API's statusCode
+     'home_id',     # home team's NHL API ID
+     'home',        # home team's name
+     'home_score',  # home team's score
+     'away_id',     # away team's NHL API ID
+     'away',        # away team's name
+     'away_score']  # away team's score
+)
+
+
+ScheduleDay = namedtuple(
+    'ScheduleDay',
+    ['date',        # date as a "YYYY-MM-DD" string
+     'games']       # list of ScheduleGame named tuples
+)
+
+
+FeedPlay = namedtuple(
+    'FeedPlay',
+    ['period',      # period number (1, 2, 3, 4,...)
+     'ordinal',     # displayable period - e,g. '1st', '3rd', '3OT', 'SO',...
+     'period_time',  # time elapsed in the period as 'MM:SS'
+     'description']
+)
+
+
+FeedGame = namedtuple(
+    'FeedGame',
+    ['game_id',     # NHL API's gamePk
+     'time',        # UTC time and date (datetime object) or None
+     'status_code',  # NHL API's statusCode
+     'home_score',  # home team's score
+     'away_score',  # away team's score
+     'current_play']  # FeedPlay named tuple or None
+)
+
+
+# Paths of all the fields read from a schedule payload. Keep in sync with
+# the decoders - tests check that decoding a payload projected to these
+# paths gives the same results as decoding the full payload.
+SCHEDULE_PATHS = (
+    'totalGames',
+    'dates.date',
+    'dates.games.gamePk',
+    'dates.games.gameType',
+    'dates.games.gameDate',
+    'dates.games.status.statusCode',
+    'dates.games.teams.home.team.id',
+    'dates.games.teams.home.team.name',
+    'dates.games.teams.home.score',
+    'dates.games.teams.away.team.id',
+    'dates.games.teams.away.team.name',
+    'dates.games.teams.away.score',
+)
+
+# Paths of the fields read from the current play of a live feed (see
+# decode_play()).
+_CURRENT_PLAY_PATHS = (
+    'about.period',
+    'about.ordinalNum',
+    'about.periodTime',
+    'result.description',
+)
+
+# Paths of the fields read from a live feed to get game's state and its
+# current play (see decode_feed_game() and decode_current_play()).
+FEED_PATHS = (
+    'gamePk',
+    'gameData.status.statusCode',
+    'gameData.datetime.dateTime',
+    'liveData.linescore.teams.home.goals',
+    'liveData.linescore.teams.away.goals',
+) + tuple(f'liveData.plays.currentPlay.{path}'
+          for path in _CURRENT_PLAY_PATHS)
+
+# Paths of the fields read from a live feed to go through all its plays
+# (events, shots, timelines and ingested feeds).
+PLAYS_PATHS = (
+    'gamePk',
+    'gameData.status.statusCode',
+) + tuple(f'liveData.plays.allPlays.{path}' for path in (
+    'about.period',
+    'about.ordinalNum',
+    'about.periodTime',
+    'about.goals.home',
+    'about.goals.away',
+    'result.description',
+    'result.eventTypeId',
+    'team.id',
+    'coordinates.x',
+    'coordinates.y',
+))
+
+
+# Paths of all the fields read from a boxscore payload.
+BOXSCORE_PATHS = tuple(
+    f'teams.{side}.{path}' for side in ('home', 'away') for path in (
+        'team.id',
+        'team.name',
+        'teamStats.teamSkaterStats.goals',
+        'teamStats.teamSkaterStats.shots',
+        'teamStats.teamSkaterStats.pim',
+        'teamStats.teamSkaterStats.hits',
+        'teamStats.teamSkaterStats.powerPlayGoals',
+        'teamStats.teamSkaterStats.powerPlayOpportunities',
+        'teamStats.teamSkaterStats.faceOffWinPercentage',
+        'players.person.fullName',
+        'players.jerseyNumber',
+        'players.position.abbreviation',
+        'players.stats.skaterStats.timeOnIce',
+        'players.stats.skaterStats.goals',
+        'players.stats.skaterStats.assists',
+        'players.stats.skaterStats.shots',
+        'players.stats.skaterStats.penaltyMinutes',
+        'players.stats.skaterStats.plusMinus',
+        'players.stats.goalieStats.timeOnIce',
+        'players.stats.goalieStats.goals',
+        'players.stats.goalieStats.assists',
+        'players.stats.goalieStats.shots',
+        'players.stats.goalieStats.pim',
+        'players.stats.goalieStats.saves',
+    )
+)
+
+# Paths of the fields read from a live feed to get game's status and its
+# box score (see decode_feed_boxscore()).
+FEED_BOXSCORE_PATHS = ('gameData.status.statusCode',) + tuple(
+    f'liveData.boxscore.{path}' for path in BOXSCORE_PATHS)
+
+
+def fields_param(paths):
+    """Return value of the API's fields parameter for the given paths.
+
+    The API expects a flat list of names of all the fields to be kept
+    (at any level).
+    """
+    return ','.join(sorted({name for path in paths
+                            for name in path.split('.')}))
+
+
+def _paths_tree(paths):
+    """Return the given paths as a tree of nested dictionaries."""
+    tree = {}
+    for path in paths:
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _project(data, tree):
+    """Return data projected to the given tree of paths."""
+    if not tree:
+        return data
+    if isinstance(data, list):
+        return [_project(item, tree) for item in data]
+    if isinstance(data, dict):
+        projected = {name: _project(data[name], subtree)
+                     for name, subtree in tree.items() if name in data}
+        if not projected and all(isinstance(value, dict)
+                                 for value in data.values()):
+            # a dictionary keyed by IDs (like players in a boxscore) -
+            # the API applies the fields to its values
+            return {key: _project(value, tree)
+                    for key, value in data.items()}
+        return projected
+    return data
+
+
+def project(data, paths):
+    """Return (decoded) data projected to the given paths.
+
+    This is what the API does for the fields parameter, just exact
+    (paths instead of names).
+    """
+    return _project(loads(data), _paths_tree(paths))
+
+
+def loads(data):
+    """Decode JSON data given as bytes or str.
+
+    Use orjson if available, the standard json module otherwise.
+    Already decoded data (e.g. a dictionary) is returned as it is.
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview, str)):
+        return data
+    if orjson is not None:
+        # pylint: disable=no-member
+        # (orjson is a compiled extension pylint cannot inspect)
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_time(text):
+    """Parse the API's date/time string into a UTC datetime object.
+
+    Return None if the string cannot be parsed.
+    """
+    try:
+        gametime = datetime.fromisoformat(text)
+    except (TypeError, ValueError) as err:
+        logging.debug('Unable to parse time: %s', err)
+        return None
+    if gametime.tzinfo is None:
+        # NHL API uses UTC
+        gametime = gametime.replace(tzinfo=timezone.utc)
+    return gametime
+
+
+def _decode_game(game):
+    """Decode one game of the schedule payload into ScheduleGame."""
+    status_code = game['status']['statusCode']
+    home = game['teams']['home']
+    away = game['teams']['away']
+    return ScheduleGame(
+        game_id=game['gamePk'],
+        game_type=game['gameType'],
+        # 8 == scheduled but time TBD
+        time=None if status_code == '8' else parse_time(game['gameDate']),
+        status_code=status_code,
+        home_id=home['team']['id'],
+        home=home['team']['name'],
+        home_score=home['score'],
+        away_id=away['team']['id'],
+        away=away['team']['name'],
+        away_score=away['score'],
+    )
+
+
+def decode_schedule(payload):
+    """Decode a schedule payload as returned by the NHL API.
+
+    The payload can be either raw JSON (bytes or str) or already
+    decoded JSON. Return a list of ScheduleDay named tuples or None if
+    there are no games in the schedule.
+    """
+    schedule = loads(payload)
+    if schedule['totalGames'] == 0:
+        return None
+    return [ScheduleDay(date=day['date'],
+                        games=[_decode_game(game) for game in day['games']])
+            for day in schedule['dates']]
+
+
+def decode_play(play):
+    """Decode a single play as provided in the live feed.
+
+    Return a FeedPlay named tuple or None if the play is empty.
+    """
+    if not play:
+        return None
+    about = play['about']
+    return FeedPlay(period=about['period'],
+                    ordinal=about['ordinalNum'],
+                    period_time=about['periodTime'],
+                    description=play['result']['description'])
+
+
+def decode_current_play(payload):
+    """Decode the current play from a live feed payload.
+
+    Return a FeedPlay named tuple or None if there is no current play.
+    Raise KeyError if the payload does not look like a live feed.
+    """
+    feed = loads(payload)
+    return decode_play(feed['liveData']['plays'].get('currentPlay'))
+
+
+def decode_feed_game(payload):
+    """Decode game's current state from a live feed payload.
+
+    Return a FeedGame named tuple.
+    """
+    feed = loads(payload)
+    game_data = feed['gameData']
+    status_code = game_data['status']['statusCode']
+    linescore = feed['liveData']['linescore']['teams']
+    return FeedGame(
+        game_id=feed['gamePk'],
+        # 8 == scheduled but time TBD
+        time=(None if status_code == '8'
+              else parse_time(game_data['datetime']['dateTime'])),
+        status_code=status_code,
+        home_score=linescore['home']['goals'],
+        away_score=linescore['away']['goals'],
+        current_play=decode_play(
+            feed['liveData']['plays'].get('currentPlay')),
+    )
+
+
+def decode_teams(payload):
+    """Decode a teams payload as returned by the NHL API.
+
+    Return a list of Team named tuples.
+    """
+    return [Team(id=team['id'],
+                 name=team['name'],
+                 abbreviation=team.get('abbreviation'),
+                 conference=team.get('conference', {}).get('name'),
+                 division=team.get('division', {}).get('name'))
+            for team in loads(payload)['teams']]
+
+
+def _decode_player(player):
+    """Decode a player of a boxscore payload into PlayerBox or None.
+
+    Return None for players without stats (e.g. scratches).
+    """
+    stats = player.get('stats', {})
+    if 'skaterStats' in stats:
+        skater = stats['skaterStats']
+        return PlayerBox(name=player['person']['fullName'],
+                         position=player['position']['abbreviation'],
+                         number=player.get('jerseyNumber', ''),
+                         toi=skater['timeOnIce'],
+                         goals=skater['goals'],
+                         assists=skater['assists'],
+                         shots=skater['shots'],
+                         pim=skater['penaltyMinutes'],
+                         plus_minus=skater['plusMinus'],
+                         saves=None)
+    if 'goalieStats' in stats:
+        goalie = stats['goalieStats']
+        return PlayerBox(name=player['person']['fullName'],
+                         position=player['position']['abbreviation'],
+                         number=player.get('jerseyNumber', ''),
+                         toi=goalie['timeOnIce'],
+                         goals=goalie['goals'],
+                         assists=goalie['assists'],
+                         shots=goalie['shots'],
+                         pim=goalie['pim'],
+                         plus_minus=None,
+                         saves=goalie['saves'])
+    return None
+
+
+def _decode_team_box(team):
+    """Decode one team of a boxscore payload into TeamBox."""
+    stats = team['teamStats']['teamSkaterStats']
+    players = (_decode_player(player) for player in team['players'].values())
+    return TeamBox(team=team['team']['name'],
+                   team_id=team['team']['id'],
+                   goals=stats['goals'],
+                   shots=stats['shots'],
+                   pim=stats['pim'],
+                   hits=stats['hits'],
+                   pp_goals=int(stats['powerPlayGoals']),
+                   pp_opportunities=int(stats['powerPlayOpportunities']),
+                   faceoff_pct=float(stats['faceOffWinPercentage']),
+                   players=[player for player in players if player])
+
+
+def decode_boxscore(payload):
+    """Decode a boxscore payload as returned by the NHL API.
+
+    Return a hockepy.game.BoxScore named tuple.
+    """
+    return _decode_box(loads(payload))
+
+
+def _decode_box(box):
+    """Decode an already decoded boxscore into BoxScore."""
+    return BoxScore(home=_decode_team_box(box['teams']['home']),
+                    away=_decode_team_box(box['teams']['away']))
+
+
+def decode_feed_boxscore(payload):
+    """Decode game's status and box score from a live feed payload.
+
+    Return (statusCode, BoxScore named tuple).
+    """
+    feed = loads(payload)
+    return (feed['gameData']['status']['statusCode'],
+            _decode_box(feed['liveData']['boxscore']))
@@ -0,0 +1,237 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.shots
+-------------
+
+This module implements shot location analytics.
+
+Coordinates of shots are pulled from live feeds into NumPy arrays and
+binned into 2D histograms (heatmaps) in a single vectorized pass. The
+rink's center is at (0, 0), x goes from -100 to 100 feet and y from -42.5
+to 42.5 feet. Shots are normalized to one side of the rink - shots of
+a team attacking the other net are rotated by 180 degrees - so that all
+shots of a team (regardless of the period) end up in the same zone. NumPy
+is an optional dependency of hockepy - it's needed by this module only.
+
+These interfaces are implemented:
+- Shots named tuple
+- collect_shots() pulls shot coordinates from live feeds
+- iter_feeds() retrieves live feeds of games concurrently
+- attack_directions() tells which net each shot's team attacked
+- normalize() moves shots to one side of the rink
+- heatmap() bins shots into a normalized 2D histogram
+- format_heatmap() renders a heatmap as text
+- save_heatmap() saves a heatmap as a CSV file
+"""
+
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hockepy import nhl
+from hockepy.schema import loads
+
+# Play types counted as shots (blocked shots are located where they were
+# blocked and their team is the blocking one).
+SHOT_EVENTS = ('SHOT', 'MISSED_SHOT', 'GOAL')
+
+# Half of the rink's length and width (in feet).
+RINK_HALF_LENGTH = 100.0
+RINK_HALF_WIDTH = 42.5
+
+# Default number of bins along x (goal line to center) and y.
+BINS = (20, 17)
+
+# Characters used to render heatmaps, from the lowest value up.
+SHADES = ' .:-=+*#%@'
+
+
+Shots = namedtuple(
+    'Shots',
+    ['x',           # numpy array of x coordinates
+     'y',           # numpy array of y coordinates
+     'goal',        # numpy array of booleans - True for goals
+     'team_id',     # numpy array of shooting teams' IDs
+     'period',      # numpy array of periods the shots were taken in
+     'game_id']     # numpy array of NHL API's gamePks of the games
+)
+
+
+def _check_numpy():
+    """Raise RuntimeError if NumPy is not available."""
+    if numpy is None:
+        raise RuntimeError('NumPy is needed for shot analytics.')
+
+
+def _feed_shots(feed, team_id, event_types):
+    """Return (x, y, goal, team ID, period, game ID) of the feed's shots.
+
+    See collect_shots() for the arguments.
+    """
+    game_id = feed.get('gamePk') or 0
+    shots = []
+    for play in feed['liveData']['plays']['allPlays']:
+        event = play['result'].get('eventTypeId')
+        if event not in event_types:
+            continue
+        coords = play.get('coordinates') or {}
+        shooter = (play.get('team') or {}).get('id')
+        if ('x' not in coords or 'y' not in coords
+                or (team_id is not None and shooter != team_id)):
+            continue
+        shots.append((coords['x'], coords['y'], event == 'GOAL',
+                      shooter or 0, play['about']['period'], game_id))
+    return shots
+
+
+def collect_shots(feeds, team_id=None, event_types=SHOT_EVENTS):
+    """Return Shots found in the given live feeds.
+
+    Feeds may be raw or already decoded, None feeds and feeds without
+    plays are skipped. If team_id is given, only shots of this team are
+    collected. Plays without coordinates are ignored.
+    """
+    _check_numpy()
+    event_types = frozenset(event_types)
+    shots = []
+    for feed in feeds:
+        if feed is None:
+            continue
+        try:
+            shots.extend(_feed_shots(loads(feed), team_id, event_types))
+        except (KeyError, TypeError, ValueError) as err:
+            # e.g. a feed of a game that has not started yet
+            logging.debug('Skipping a feed without plays: %r', err)
+    xs, ys, goals, teams, periods, game_ids = (
+        zip(*shots) if shots else ((),) * len(Shots._fields))
+    return Shots(x=numpy.array(xs, dtype=numpy.float32),
+                 y=numpy.array(ys, dtype=numpy.float32),
+                 goal=numpy.array(goals, dtype=bool),
+                 team_id=numpy.array(teams, dtype=numpy.int32),
+                 period=numpy.array(periods, dtype=numpy.int16),
+                 game_id=numpy.array(game_ids, dtype=numpy.int64))
+
+
+def iter_feeds(games, workers=None):
+    """Yield projected live feeds of the given games.
+
+    Games are given as a dictionary mapping game IDs to max_age (see
+    nhl.feed_max_age()). Feeds are retrieved concurrently by up to
+    workers threads (the client's feed_workers by default) and yielded
+    in the order of the games, feeds that couldn't be retrieved are None.
+    """
+    if not games:
+        return
+    workers = workers or nhl.get_client().feed_workers
+
+    def get(game):
+        game_id, max_age = game
+        try:
+            return nhl.get_feed(game_id, False, max_age,
+                                projected=nhl.ALL_PLAYS)
+        except (OSError, ValueError) as err:
+            # requests' exceptions are OSErrors (or ValueErrors for invalid
+            # requests)
+            logging.debug('Unable to retrieve feed of %s: %s', game_id, err)
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(games))) as pool:
+        yield from pool.map(get, games.items())
+
+
+def attack_directions(shots):
+    """Return the direction (1 or -1 along x) each shot's team attacked.
+
+    A team attacks the same net for the whole period and most of its
+    shots are taken in the offensive zone, so the net attacked by a team
+    in a period of a game is the one at the side where the majority of
+    its shots in the period are (ties are broken by the sum of x).
+    """
+    _check_numpy()
+    if not shots.x.size:
+        return numpy.ones(0, dtype=numpy.float32)
+    _, groups = numpy.unique(
+        numpy.column_stack((shots.game_id, shots.period, shots.team_id)),
+        axis=0, return_inverse=True)
+    groups = groups.ravel()
+    votes = numpy.bincount(groups, weights=numpy.sign(shots.x))
+    sums = numpy.bincount(groups, weights=shots.x)
+    negative = (votes < 0) | ((votes == 0) & (sums < 0))
+    return numpy.where(negative[groups], -1, 1).astype(numpy.float32)
+
+
+def normalize(shots):
+    """Return Shots rotated so that all of them are at the positive x.
+
+    Shots of a team attacking the net at the negative x (see
+    attack_directions()) are rotated by 180 degrees - so shots taken from
+    the team's own half stay at the negative x.
+    """
+    _check_numpy()
+    sign = attack_directions(shots)
+    return shots._replace(x=shots.x * sign, y=shots.y * sign)
+
+
+def heatmap(shots, bins=BINS, goals_only=False):
+    """Return a heatmap of the given shots.
+
+    Shots are normalized to one side of the rink (see normalize()) and
+    binned into a 2D histogram which sums up to 1 (unless there are no
+    shots at all). Return (histogram, x_edges, y_edges) where the
+    histogram's rows correspond to x bins (from the center line to the
+    end boards) and columns to y bins.
+    """
+    shots = normalize(shots)
+    x, y = shots.x, shots.y
+    if goals_only:
+        x, y = x[shots.goal], y[shots.goal]
+    hist, x_edges, y_edges = numpy.histogram2d(
+        x, y, bins=bins,
+        range=[[0, RINK_HALF_LENGTH], [-RINK_HALF_WIDTH, RINK_HALF_WIDTH]])
+    total = hist.sum()
+    if total:
+        hist /= total
+    return hist, x_edges, y_edges
+
+
+def format_heatmap(hist):
+    """Return the heatmap rendered as text (one line per x bin).
+
+    The net is at the bottom. Each bin is rendered as a character from
+    SHADES scaled to the maximal value.
+    """
+    _check_numpy()
+    peak = hist.max() if hist.size else 0
+    if not peak:
+        levels = numpy.zeros(hist.shape, dtype=int)
+    else:
+        levels = numpy.ceil(hist / peak * (len(SHADES) - 1)).astype(int)
+    return '\n'.join('|' + ''.join(SHADES[level] for level in row) + '|'
+                     for row in levels)
+
+
+def save_heatmap(path, hist, x_edges, y_edges):
+    """Save the heatmap as a CSV file.
+
+    Each line holds the lower x and y edges of a bin and its value.
+    """
+    _check_numpy()
+    x_grid, y_grid = numpy.meshgrid(x_edges[:-1], y_edges[:-1],
+                                    indexing='ij')
+    rows = numpy.column_stack((x_grid.ravel(), y_grid.ravel(), hist.ravel()))
+    numpy.savetxt(path, rows, delimiter=',', fmt='%g', header='x,y,value',
+                  comments='')
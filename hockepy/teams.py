@@ -0,0 +1,139 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.teams
+-------------
+
+This module implements a registry of team metadata keyed by team IDs.
+
+Team names and abbreviations are interned so that every game refers to
+the very same string objects and games (or any other data) can carry
+compact integer IDs instead of names. The registry is process-wide and
+safe to update from multiple threads.
+
+These interfaces are implemented:
+- Team named tuple
+- register() adds (or updates) a team in the registry
+- get_team() returns a team by its ID
+- team_name() returns a team's name by its ID
+- find_team_id() returns a team's ID by its name, abbreviation or ID
+- team_ids() returns IDs of the given teams
+- get_teams() returns all registered teams
+"""
+
+import sys
+import threading
+from collections import namedtuple
+
+
+Team = namedtuple(
+    'Team',
+    ['id',            # team's ID as used by the league's API
+     'name',          # team's full name
+     'abbreviation',  # e.g. 'BOS' or None if not known
+     'conference',    # conference name or None if not known
+     'division'],     # division name or None if not known
+    defaults=(None, None, None)
+)
+
+# team ID -> Team
+_TEAMS = {}
+
+# lower-case name or abbreviation -> team ID
+_LOOKUP = {}
+
+# serializes updates of the registry (lookups don't need it)
+_LOCK = threading.Lock()
+
+
+def _intern(text):
+    """Intern the given string, let None pass through."""
+    return None if text is None else sys.intern(text)
+
+
+def register(team_id, name, abbreviation=None, conference=None,
+             division=None):
+    """Register a team and return its interned name.
+
+    Already known metadata is kept unless new values are provided.
+    """
+    name = _intern(name)
+    team = _TEAMS.get(team_id)
+    if team is not None and team.name is name and abbreviation is None:
+        # the most common case - nothing new to register
+        return name
+
+    with _LOCK:
+        # merge with the metadata registered by now (maybe by another
+        # thread)
+        old = _TEAMS.get(team_id)
+        if old is not None:
+            abbreviation = abbreviation or old.abbreviation
+            conference = conference or old.conference
+            division = division or old.division
+        team = Team(id=team_id,
+                    name=name,
+                    abbreviation=_intern(abbreviation),
+                    conference=_intern(conference),
+                    division=_intern(division))
+        _TEAMS[team_id] = team
+        keys = {name.lower()}
+        if abbreviation:
+            keys.add(abbreviation.lower())
+        for key in keys:
+            _LOOKUP[key] = team_id
+        if old is not None:
+            # a renamed team is not found by its old name anymore
+            for key in (old.name, old.abbreviation):
+                if (key and key.lower() not in keys
+                        and _LOOKUP.get(key.lower()) == team_id):
+                    del _LOOKUP[key.lower()]
+    return name
+
+
+def get_team(team_id):
+    """Return Team for the given ID or None if not registered."""
+    return _TEAMS.get(team_id)
+
+
+def team_name(team_id):
+    """Return name of the team with the given ID or None if unknown."""
+    team = _TEAMS.get(team_id)
+    return None if team is None else team.name
+
+
+def find_team_id(text):
+    """Return ID of the team given by its name, abbreviation or ID.
+
+    Matching is case insensitive. Return None for unknown teams.
+    """
+    if isinstance(text, int):
+        return text if text in _TEAMS else None
+    text = text.strip()
+    if text.isdigit():
+        return find_team_id(int(text))
+    return _LOOKUP.get(text.lower())
+
+
+def team_ids(teams):
+    """Return a frozenset of IDs of the given (known) teams.
+
+    Teams may be given by names, abbreviations or IDs, unknown teams
+    are ignored.
+    """
+    ids = (find_team_id(team) for team in teams)
+    return frozenset(team_id for team_id in ids if team_id is not None)
+
+
+def get_teams():
+    """Return all registered teams as a list of Team named tuples."""
+    with _LOCK:
+        return list(_TEAMS.values())
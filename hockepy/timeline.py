@@ -0,0 +1,174 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.timeline
+----------------
+
+This module implements batch conversion of plays to columnar timelines.
+
+Unlike nhl.get_play_tuple(), which converts one play at a time, whole
+lists of plays (allPlays of a live feed) are converted at once into NumPy
+arrays - one array per column. Game clock strings are parsed in a single
+vectorized pass. The rules of nhl.get_play_tuple() are kept - the elapsed
+time counts 20 minutes per period (including overtime) except for the
+shootout, which follows a 5 minutes long overtime. NumPy is an optional
+dependency of hockepy - it's needed by this module only.
+
+These interfaces are implemented:
+- Timeline named tuple
+- EVENT_TYPES lists event types with their codes
+- event_code() returns a code of the given event type
+- play_timeline() converts a list of plays into a Timeline
+- feed_timeline() converts a live feed into a Timeline
+- iter_timelines() converts many live feeds
+"""
+
+from collections import namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hockepy.schema import loads
+
+# Event types (eventTypeId) of plays, the code of each type is its index
+# in this tuple plus one. Unknown types get code 0.
+EVENT_TYPES = (
+    'GAME_SCHEDULED',
+    'PERIOD_READY',
+    'PERIOD_START',
+    'FACEOFF',
+    'HIT',
+    'GIVEAWAY',
+    'TAKEAWAY',
+    'SHOT',
+    'MISSED_SHOT',
+    'BLOCKED_SHOT',
+    'GOAL',
+    'PENALTY',
+    'STOP',
+    'CHALLENGE',
+    'PERIOD_END',
+    'PERIOD_OFFICIAL',
+    'GAME_END',
+    'GAME_OFFICIAL',
+    'SHOOTOUT_COMPLETE',
+)
+
+_EVENT_CODES = {event: code for code, event in enumerate(EVENT_TYPES, 1)}
+
+# Length of a period and of the regular season overtime (in seconds).
+PERIOD_LENGTH = 20 * 60
+REGULAR_OT_LENGTH = 5 * 60
+
+
+Timeline = namedtuple(
+    'Timeline',
+    ['elapsed',     # numpy array of seconds elapsed since the game start
+     'period',      # numpy array of period numbers
+     'event',       # numpy array of event codes (see EVENT_TYPES)
+     'home_score',  # numpy array of home team's score after each play
+     'away_score']  # numpy array of away team's score after each play
+)
+
+
+def _check_numpy():
+    """Raise RuntimeError if NumPy is not available."""
+    if numpy is None:
+        raise RuntimeError('NumPy is needed for play timelines.')
+
+
+def event_code(event_type):
+    """Return the code of the given event type (0 if unknown)."""
+    return _EVENT_CODES.get(event_type, 0)
+
+
+def _parse_clock(times):
+    """Return seconds of the given 'MM:SS' strings as a NumPy array.
+
+    Minutes may have any number of digits (e.g. 'M:SS'), but the common
+    'MM:SS' strings are parsed straight from their bytes. Raise
+    ValueError if any of the strings is not a valid game clock.
+    """
+    try:
+        lengths = numpy.fromiter(map(len, times), dtype=numpy.int32,
+                                 count=len(times))
+        if (lengths == 5).all():
+            chars = numpy.frombuffer(''.join(times).encode('ascii'),
+                                     dtype=numpy.uint8).reshape(-1, 5)
+            digits = chars.astype(numpy.int32) - ord('0')
+            numbers = digits[:, [0, 1, 3, 4]]
+            if ((chars[:, 2] == ord(':')).all() and (numbers >= 0).all()
+                    and (numbers <= 9).all() and (digits[:, 3] <= 5).all()):
+                return (digits[:, 0] * 600 + digits[:, 1] * 60
+                        + digits[:, 3] * 10 + digits[:, 4])
+        parts = numpy.char.partition(numpy.asarray(times, dtype=str), ':')
+    except (TypeError, UnicodeEncodeError) as err:
+        raise ValueError(f'Invalid game clock: {err}') from err
+    minutes, colons, seconds = parts[:, 0], parts[:, 1], parts[:, 2]
+    valid = ((colons == ':') & numpy.char.isdigit(minutes)
+             & numpy.char.isdigit(seconds)
+             & (numpy.char.str_len(seconds) == 2))
+    valid[valid] = seconds[valid].astype(numpy.int32) < 60
+    if not valid.all():
+        raise ValueError(
+            f'Invalid game clock: {times[int(numpy.argmin(valid))]!r}.')
+    return minutes.astype(numpy.int32) * 60 + seconds.astype(numpy.int32)
+
+
+def play_timeline(plays):
+    """Convert the given plays (as provided by the NHL API) to a Timeline.
+
+    Each play must have a game clock ('periodTime') in 'MM:SS' format,
+    ValueError is raised otherwise. A period is a shootout if its
+    ordinal number is 'SO'.
+    """
+    _check_numpy()
+    count = len(plays)
+    abouts = [play['about'] for play in plays]
+    period = numpy.fromiter((about['period'] for about in abouts),
+                            dtype=numpy.int16, count=count)
+    event = numpy.fromiter(
+        (_EVENT_CODES.get(play['result'].get('eventTypeId'), 0)
+         for play in plays), dtype=numpy.int16, count=count)
+    home_score = numpy.fromiter((about['goals']['home'] for about in abouts),
+                                dtype=numpy.int16, count=count)
+    away_score = numpy.fromiter((about['goals']['away'] for about in abouts),
+                                dtype=numpy.int16, count=count)
+
+    elapsed = numpy.zeros(count, dtype=numpy.int32)
+    if count:
+        elapsed += _parse_clock([about['periodTime'] for about in abouts])
+        elapsed += (period.astype(numpy.int32) - 1) * PERIOD_LENGTH
+        # only periods after the regulation may be shootouts, check
+        # the first play of each of them
+        periods, firsts = numpy.unique(period, return_index=True)
+        shootouts = [number for number, first in zip(periods, firsts)
+                     if number > 3 and abouts[first]['ordinalNum'] == 'SO']
+        if shootouts:
+            # the shootout follows a 5 minutes long overtime
+            elapsed[numpy.isin(period, shootouts)] -= (
+                PERIOD_LENGTH - REGULAR_OT_LENGTH)
+
+    return Timeline(elapsed=elapsed, period=period, event=event,
+                    home_score=home_score, away_score=away_score)
+
+
+def feed_timeline(feed):
+    """Convert plays of the given (raw or decoded) live feed."""
+    return play_timeline(loads(feed)['liveData']['plays']['allPlays'])
+
+
+def iter_timelines(feeds):
+    """Yield a Timeline for each of the given live feeds."""
+    for feed in feeds:
+        yield feed_timeline(feed)
@@ -0,0 +1,148 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.trace
+-------------
+
+This module implements lightweight tracing.
+
+Spans are nested (by time, per thread) and carry attributes. Finished
+spans are exported to a JSON file in the Trace Event format, which can be
+opened in standard trace viewers (e.g. chrome://tracing or Perfetto).
+Tracing is disabled by default - span() then returns a shared no-op span
+so that tracing costs next to nothing.
+
+These interfaces are implemented:
+- enable() starts collecting spans
+- disable() stops collecting spans and returns the collected ones
+- is_enabled() tells whether spans are collected
+- span() returns a context manager measuring a span
+- write() writes the collected spans to a trace file
+"""
+
+import json
+import os
+import threading
+from time import perf_counter_ns
+
+
+class _NullSpan:
+    """A span doing nothing - used when tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **attrs):
+        """Ignore the attributes."""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Tracer:
+    """Collector of finished spans."""
+
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+        self.origin = perf_counter_ns()
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end, attrs):
+        """Add a finished span (times are perf_counter_ns() values)."""
+        event = {
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start - self.origin) / 1000,
+            'dur': (end - start) / 1000,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+            'args': attrs,
+        }
+        with self.lock:
+            self.events.append(event)
+
+
+class _Span:
+    """A span being measured."""
+
+    __slots__ = ('tracer', 'name', 'attrs', 'start')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.add(self.name, self.start, perf_counter_ns(), self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Set attributes of the span."""
+        self.attrs.update(attrs)
+
+
+_tracer = None
+
+
+def enable():
+    """Start collecting spans (drop the ones collected so far)."""
+    # pylint: disable=global-statement
+    # (the tracer is a process-wide singleton on purpose)
+    global _tracer
+    _tracer = _Tracer()
+
+
+def disable():
+    """Stop collecting spans and return the collected ones."""
+    # pylint: disable=global-statement
+    # (the tracer is a process-wide singleton on purpose)
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return [] if tracer is None else tracer.events
+
+
+def is_enabled():
+    """Return True if spans are being collected."""
+    return _tracer is not None
+
+
+def span(name, **attrs):
+    """Return a context manager measuring a span with the given name.
+
+    Attributes can be given now or set later using set() method of the
+    object returned by the context manager. Names are dot separated, the
+    first part is the span's category (e.g. 'http.get' is in 'http').
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, attrs)
+
+
+def write(path, events=None):
+    """Write spans (the collected ones by default) to a trace file."""
+    if events is None:
+        events = [] if _tracer is None else list(_tracer.events)
+    with open(path, 'w', encoding='utf-8') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                  trace_file, default=str)
@@ -0,0 +1,229 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.transport
+-----------------
+
+This module implements HTTP transport used to access the NHL API.
+
+The transport keeps a connection pool, always negotiates compressed
+responses (brotli if supported, gzip otherwise), keeps track of the
+achieved compression ratio and optionally stores response bodies in
+a persistent (compressed) cache.
+
+These interfaces are implemented:
+- ACCEPT_ENCODING is the encodings negotiated with the server
+- FOREVER is max_age accepting cached bodies of any age
+- TIMEOUT is the default timeout of requests
+- OfflineError exception
+- log_bad_response_msg() logs error message from a bad response
+- RateLimiter class limits the rate of requests
+- Transport class
+"""
+
+import logging
+import math
+import threading
+import time
+
+import requests
+
+try:
+    # pylint: disable=unused-import
+    # (requests decodes brotli itself if the package is installed)
+    import brotli
+    ACCEPT_ENCODING = 'br, gzip, deflate'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+from hockepy.trace import span
+
+# max_age meaning that any cached body is fresh enough
+FOREVER = math.inf
+
+# default timeout (in seconds) of requests
+TIMEOUT = 10
+
+
+class OfflineError(requests.exceptions.ConnectionError):
+    """A response is needed offline but it's not cached."""
+
+
+def log_bad_response_msg(response):
+    """Try and log an error message from a bad response.
+
+    If a bad response comes back from the NHL API, there might be
+    an error message in it. If it's the case, retrieve and log it if
+    possible. Do nothing if not.
+    """
+    # Do something for bad responses only.
+    if response.status_code == requests.codes['ok']:
+        return
+
+    try:
+        json = response.json()
+        msg_number = json.get('messageNumber', None)
+        msg = json.get('message', None)
+        logging.debug('Bad response from NHL API (HTTP %d): #%d: %s',
+                      response.status_code, msg_number, msg)
+    except ValueError:
+        logging.debug('Bad response from NHL API (HTTP %d).',
+                      response.status_code)
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests.
+
+    At most rate requests per second are allowed on average with bursts
+    of up to burst requests. It's safe to share a limiter across threads.
+    """
+
+    def __init__(self, rate, burst=None):
+        """Initialize the limiter with a full bucket."""
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive: {rate!r}.')
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request is allowed.
+
+        Return the time (in seconds) spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens
+                               + (now - self._updated) * self.rate)
+            self._updated = now
+            # take the token now (possibly going into debt) so that
+            # waiting threads are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class Transport:
+    """HTTP transport for the NHL API.
+
+    If a ResponseCache is provided, retrieved bodies are stored there
+    and can be served from there when fresh enough. If a RateLimiter is
+    provided, requests to the API (not served from the cache) are
+    limited by it. It's safe to share a transport across threads.
+    """
+
+    def __init__(self, cache=None, timeout=TIMEOUT, limiter=None):
+        """Initialize the transport.
+
+        Timeout (in seconds) is the default timeout of requests.
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        # bytes received over the wire and bytes of (decoded) content
+        self.wire_bytes = 0
+        self.content_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def compression_ratio(self):
+        """Return overall ratio of content size to transferred size."""
+        if not self.wire_bytes:
+            return None
+        return self.content_bytes / self.wire_bytes
+
+    def _account(self, response):
+        """Account the response's transferred and content sizes."""
+        content_size = len(response.content)
+        try:
+            wire_size = response.raw.tell()
+        except AttributeError:
+            wire_size = 0
+        wire_size = wire_size or content_size
+        with self._lock:
+            self.wire_bytes += wire_size
+            self.content_bytes += content_size
+        logging.debug('Received %d bytes (%s) for %d bytes of content '
+                      '(compression ratio %.1f).',
+                      wire_size,
+                      response.headers.get('Content-Encoding', 'identity'),
+                      content_size, content_size / (wire_size or 1))
+
+    def age(self, url):
+        """Return age (in seconds) of the cached body for URL or None."""
+        if self.cache is None:
+            return None
+        return self.cache.age(url)
+
+    def get(self, url, fail=True, max_age=None, store=True, timeout=None,
+            offline=False):
+        """Return body (bytes) of the response for the given URL.
+
+        If max_age (in seconds) is given and there is a cached body not
+        older than that, return it without accessing the network
+        (math.inf means any cached body is good enough). Otherwise
+        retrieve the body and store it in the cache if store is True.
+        Timeout (in seconds) overrides the default timeout.
+        If offline is True, only the cache is used (no matter how old the
+        cached body is) - if there is no cached body, OfflineError is
+        raised or None is returned depending on fail parameter.
+        If the response is not OK, then it depends on fail parameter -
+        if it's True, an exception will be raised, otherwise None is
+        returned without an exception.
+        """
+        return self.fetch(url, fail, max_age, store, timeout, offline)[0]
+
+    def fetch(self, url, fail=True, max_age=None, store=True, timeout=None,
+              offline=False):
+        """Return (body, cached) of the response for the given URL.
+
+        Cached is True if the body was served from the cache, False if it
+        was retrieved over the network. See get() for the arguments.
+        """
+        if offline:
+            body = None if self.cache is None else self.cache.get(url)
+            if body is None and fail:
+                raise OfflineError(f'{url!r} is not cached.')
+            return body, True
+
+        if self.cache is not None and max_age is not None:
+            with span('cache.get', url=url) as cache_span:
+                body = self.cache.get(url, max_age)
+                cache_span.set(hit=body is not None)
+            if body is not None:
+                logging.debug('Using cached %r.', url)
+                return body, True
+
+        if self.limiter is not None:
+            with span('http.wait'):
+                self.limiter.acquire()
+        with span('http.get', url=url) as http_span:
+            response = self.session.get(
+                url, timeout=self.timeout if timeout is None else timeout)
+            http_span.set(status=response.status_code,
+                          bytes=len(response.content))
+        if response.status_code != requests.codes['ok']:
+            log_bad_response_msg(response)
+            if fail:
+                response.raise_for_status()
+            return None, False
+
+        self._account(response)
+        body = response.content
+        if self.cache is not None and store:
+            self.cache.put(url, body)
+        return body, False
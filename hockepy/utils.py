@@ -19,6 +19,7 @@ These functions are implemented:
 - datetime_to_local() - converts specified datetime object to local time
 - exit_error() - exit with an error
 - local_timezone() - return local time zone
+- season_dates() - return the first and the last date of a season
 """
 
 import datetime
@@ -27,6 +28,12 @@ import time
 import sys
 
 
+DATE_FMT = '%Y-%m-%d'
+
+# The season starts in autumn and ends in spring (the playoffs included).
+SEASON_START = (9, 1)
+SEASON_END = (6, 30)
+
 ESCAPE_SEQ = {
     'bold': '\033[1m',
     'end': '\033[0m'
@@ -68,3 +75,19 @@ def local_timezone():
     )
     logging.debug('Local timezone is determined to be %s.', local_tz)
     return local_tz
+
+
+def season_dates(start_year=None):
+    """Return (first, last) dates of a season as "YYYY-MM-DD" strings.
+
+    That is the season starting in start_year or the current season by
+    default.
+    """
+    if start_year is None:
+        today = datetime.date.today()
+        start_year = today.year
+        if today.month < SEASON_START[0]:
+            start_year -= 1
+    first = datetime.date(start_year, *SEASON_START)
+    last = datetime.date(start_year + 1, *SEASON_END)
+    return first.strftime(DATE_FMT), last.strftime(DATE_FMT)
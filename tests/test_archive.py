@@ -0,0 +1,152 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.archive module tests
+----------------------------
+"""
+
+import copy
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from hockepy import archive, nhl
+
+
+class TestArchive(unittest.TestCase):
+    """Tests for hockepy.archive module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def setUp(self):
+        """Load the mock feed and split it into growing snapshots."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(path, 'rb') as feed_file:
+            feed = json.load(feed_file)
+        plays = feed['liveData']['plays']['allPlays']
+        self.snapshots = []
+        for count in range(1, len(plays) + 1):
+            snapshot = copy.deepcopy(feed)
+            snapshot['liveData']['plays']['allPlays'] = plays[:count]
+            snapshot['metaData']['timeStamp'] = f'20171008_0000{count:02}'
+            self.snapshots.append(snapshot)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary archive directory."""
+        self.tmp_dir.cleanup()
+
+    def test01_diff_patch(self):
+        """Test that deltas restore the new documents."""
+        old, new = self.snapshots[0], self.snapshots[5]
+        delta = archive.diff(old, new)
+        self.assertEqual(new, archive.patch(old, delta))
+        self.assertEqual(self.snapshots[0], old)
+        # only the new plays (and the timestamp) are in the delta
+        self.assertEqual(['liveData', 'metaData'], sorted(delta))
+        self.assertIsNone(archive.diff(new, copy.deepcopy(new)))
+
+        old = {'a': 1, 'b': [1, 2], 'c': [1, {'x': 1}], 'd': 'x'}
+        new = {'a': 2, 'b': [2], 'c': [1, {'x': 2}], 'e': None}
+        self.assertEqual(new, archive.patch(old, archive.diff(old, new)))
+
+    def test02_record_replay(self):
+        """Test that snapshots are restored at any time."""
+        recorder = archive.FeedRecorder(self.tmp_dir.name,
+                                        keyframe_interval=4)
+        for timestamp, snapshot in enumerate(self.snapshots, 1):
+            body = json.dumps(snapshot).encode()
+            self.assertTrue(recorder.record(1, body, timestamp=timestamp))
+            # unchanged snapshots are not stored
+            self.assertFalse(recorder.record(1, body, timestamp=timestamp))
+
+        feed_archive = recorder.archive(1)
+        self.assertEqual(len(self.snapshots), len(feed_archive))
+        self.assertEqual([0, 4, 8, 12], [
+            idx for idx, record in enumerate(feed_archive.index)
+            if record.keyframe])
+        self.assertEqual(self.snapshots,
+                         [snapshot for _, snapshot in feed_archive])
+
+        start = 0
+        self.assertIsNone(feed_archive.snapshot_at(start))
+        self.assertEqual(self.snapshots[6],
+                         feed_archive.snapshot_at(start + 7.5))
+        self.assertEqual(self.snapshots[-1],
+                         feed_archive.snapshot_at(start + 3600))
+
+        # deltas are much smaller than full snapshots
+        sizes = [record.size for record in feed_archive.index]
+        self.assertLess(2 * max(sizes[5:8]), sizes[8])
+
+        # a new recorder does not store the last snapshot again
+        recorder = archive.FeedRecorder(self.tmp_dir.name)
+        self.assertFalse(recorder.record(1, body))
+        self.assertEqual(len(self.snapshots), len(recorder.archive(1)))
+
+    def test03_partial_index(self):
+        """Test that a partially written index record is ignored."""
+        recorder = archive.FeedRecorder(self.tmp_dir.name)
+        for idx, snapshot in enumerate(self.snapshots[:3]):
+            recorder.record(2, json.dumps(snapshot).encode(),
+                            projected='current', timestamp=idx)
+        path = archive.archive_path(self.tmp_dir.name, 2, projected='current')
+        with open(path + archive.INDEX_SUFFIX, 'ab') as index_file:
+            index_file.write(b'\0' * 5)
+        feed_archive = archive.FeedArchive(path)
+        self.assertEqual(3, len(feed_archive))
+        self.assertEqual(self.snapshots[2], feed_archive.snapshot_at(2))
+
+    def test04_client_recorder(self):
+        """Test that feeds retrieved over the network are recorded."""
+        bodies = [json.dumps(snapshot).encode()
+                  for snapshot in self.snapshots[:2]]
+        transport = mock.Mock()
+        transport.fetch.return_value = (bodies[0], False)
+        recorder = archive.FeedRecorder(self.tmp_dir.name)
+        client = nhl.HockeyClient(transport=transport, recorder=recorder)
+        client.get_feed(3)
+        # cached feeds are not new snapshots
+        transport.fetch.return_value = (bodies[1], True)
+        client.get_feed(3, offline=True)
+        client.get_feed(3)
+        self.assertEqual(1, len(recorder.archive(3)))
+        transport.fetch.return_value = (bodies[1], False)
+        self.assertEqual(bodies[1], client.get_feed(3))
+        self.assertEqual(self.snapshots[:2],
+                         [snapshot for _, snapshot in recorder.archive(3)])
+
+    def test05_concurrent_recorders(self):
+        """Test that recorders appending to the same archive don't clash.
+
+        Each recorder stands for another process recording the game.
+        """
+        recorders = [archive.FeedRecorder(self.tmp_dir.name)
+                     for _ in range(2)]
+        timestamps = [1, 3, 2, 4, 5, 6]
+        for idx, snapshot in enumerate(self.snapshots[:6]):
+            self.assertTrue(recorders[idx % 2].record(
+                4, json.dumps(snapshot).encode(),
+                timestamp=timestamps[idx]))
+        # the other recorder stored the snapshot already
+        self.assertFalse(recorders[0].record(
+            4, json.dumps(self.snapshots[5]).encode()))
+
+        feed_archive = recorders[0].archive(4)
+        self.assertEqual(self.snapshots[:6],
+                         [snapshot for _, snapshot in feed_archive])
+        # times never decrease
+        self.assertEqual([1, 3, 3, 4, 5, 6], feed_archive.times)
+        # deltas against snapshots of the other recorder
+        self.assertEqual([True, False, False, False, False, False],
+                         [record.keyframe for record in feed_archive.index])
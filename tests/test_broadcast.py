@@ -0,0 +1,167 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.broadcast module tests
+------------------------
+"""
+
+import asyncio
+import json
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from hockepy import broadcast
+from hockepy.game import Game, GameStatus, GameType, Play
+
+GAME = Game(home='Shire Halflings', away='Hogsmeade Wizards', home_score=0,
+            away_score=0, time=datetime(2017, 7, 7, 20, 30,
+                                        tzinfo=timezone.utc),
+            type=GameType.PLAYOFFS, status=GameStatus.LIVE,
+            last_play=None, home_id=1, away_id=2, game_id=201707070003)
+
+GOAL = GAME._replace(away_score=1, last_play=Play('1st', '02:23', 'Goal'))
+
+
+async def _read_event(reader):
+    """Return (event, data) of the next event from the stream."""
+    lines = (await reader.readuntil(b'\n\n')).decode().splitlines()
+    fields = dict(line.split(': ', 1) for line in lines if line)
+    return fields['event'], json.loads(fields['data'])
+
+
+class TestBroadcast(unittest.TestCase):
+    """Tests for hockepy.broadcast module."""
+
+    def test01_game_delta(self):
+        """Test that only changed fields are in deltas."""
+        self.assertEqual(broadcast.game_to_dict(GAME),
+                         broadcast.game_delta(None, GAME))
+        self.assertIsNone(broadcast.game_delta(GAME, GAME))
+        self.assertEqual({'game_id': 201707070003, 'away_score': 1,
+                          'last_play': {'period': '1st', 'time': '02:23',
+                                        'description': 'Goal'}},
+                         broadcast.game_delta(GAME, GOAL))
+        self.assertEqual('2017-07-07T20:30:00+00:00',
+                         broadcast.game_to_dict(GAME)['time'])
+        self.assertEqual('live', broadcast.game_to_dict(GAME)['status'])
+
+    def test02_stream(self):
+        """Test that clients get a snapshot and then deltas."""
+        asyncio.run(self.stream())
+
+    async def stream(self):
+        """Serve a few clients and push an update to them."""
+        broadcaster = broadcast.Broadcaster()
+        broadcaster.update([GAME])
+        server = await asyncio.start_server(broadcaster.handle,
+                                            '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        clients = []
+        for _ in range(3):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /events HTTP/1.1\r\nHost: test\r\n\r\n')
+            headers = await reader.readuntil(b'\r\n\r\n')
+            self.assertIn(b'text/event-stream', headers)
+            event, data = await _read_event(reader)
+            self.assertEqual('snapshot', event)
+            self.assertEqual([broadcast.game_to_dict(GAME)], data['games'])
+            clients.append((reader, writer))
+        self.assertEqual(3, broadcaster.client_count)
+
+        self.assertEqual(1, broadcaster.update([GOAL]))
+        self.assertEqual(0, broadcaster.update([GOAL]))
+        for reader, _ in clients:
+            event, data = await _read_event(reader)
+            self.assertEqual('game', event)
+            self.assertEqual({'game_id', 'away_score', 'last_play'},
+                             set(data))
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /other HTTP/1.1\r\n\r\n')
+        self.assertTrue((await reader.read()).startswith(
+            b'HTTP/1.1 404'))
+
+        broadcaster.disconnect_all()
+        for reader, writer in clients:
+            self.assertEqual(b'', await reader.read())
+            writer.close()
+        self.assertEqual(0, broadcaster.client_count)
+        server.close()
+        await server.wait_closed()
+
+    def test03_poll(self):
+        """Test that the schedule is loaded once and refreshed then."""
+        def refresh(schedule):
+            games = next(iter(schedule.values()))
+            self.assertEqual([GAME], games)
+            games[0] = GOAL
+
+        later = GAME._replace(status=GameStatus.SCHEDULED, game_id=2,
+                              time=datetime(2100, 1, 1,
+                                            tzinfo=timezone.utc))
+        broadcaster = broadcast.Broadcaster(reload_interval=3600)
+        with mock.patch('hockepy.nhl.get_schedule',
+                        return_value={'2017-07-07': [GAME, later]}) as get, \
+                mock.patch('hockepy.nhl.refresh',
+                           side_effect=refresh) as refresh_mock:
+            asyncio.run(broadcaster.poll())
+            asyncio.run(broadcaster.poll())
+        self.assertEqual(1, get.call_count)
+        # only the live game is refreshed
+        self.assertEqual(1, refresh_mock.call_count)
+        self.assertEqual({GAME.game_id: GOAL, 2: later}, broadcaster.games)
+
+    def test04_poll_interval(self):
+        """Test that polling respects intervals longer than keep-alives."""
+        broadcaster = broadcast.Broadcaster(interval=60)
+        sleeps = []
+
+        async def sleep(delay):
+            sleeps.append(delay)
+            raise asyncio.CancelledError
+
+        with mock.patch.object(broadcaster, 'poll', new=mock.AsyncMock()), \
+                mock.patch('asyncio.sleep', new=sleep):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(broadcaster.run_poller())
+        self.assertEqual([60], sleeps)
+
+    def test05_poll_errors(self):
+        """Test that malformed responses don't stop polling."""
+        broadcaster = broadcast.Broadcaster()
+
+        async def sleep(_delay):
+            raise asyncio.CancelledError
+
+        with mock.patch.object(broadcaster, 'poll',
+                               new=mock.AsyncMock(side_effect=ValueError)), \
+                mock.patch('asyncio.sleep', new=sleep):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(broadcaster.run_poller())
+
+    def test06_stalled_client(self):
+        """Test that a client not reading the stream is disconnected."""
+        broadcaster = broadcast.Broadcaster()
+        reader = mock.AsyncMock()
+        reader.readuntil.return_value = b'GET /events HTTP/1.1\r\n\r\n'
+        writer = mock.MagicMock()
+        writer.wait_closed = mock.AsyncMock()
+
+        async def drain():
+            await asyncio.Event().wait()
+
+        writer.drain = drain
+        with mock.patch.object(broadcast, 'DRAIN_TIMEOUT', 0.01):
+            asyncio.run(broadcaster.handle(reader, writer))
+        writer.transport.abort.assert_called_once_with()
+        self.assertEqual(0, broadcaster.client_count)
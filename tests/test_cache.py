@@ -0,0 +1,144 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.cache module tests
+------------------------
+"""
+
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from hockepy import cache
+
+
+class TestCache(unittest.TestCase):
+    """Tests for hockepy.cache module."""
+
+    BODY = b'{"liveData": {"plays": {"allPlays": []}}}' * 100
+
+    def setUp(self):
+        """Create a temporary cache directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = cache.ResponseCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        """Remove the temporary cache directory."""
+        self.tmp_dir.cleanup()
+
+    def test01_compress_roundtrip(self):
+        """Test that compressed data is smaller and decompresses back."""
+        compressed = cache.compress(self.BODY)
+        self.assertLess(len(compressed), len(self.BODY))
+        self.assertEqual(self.BODY, cache.decompress(compressed))
+
+    def test02_decompress_any_format(self):
+        """Test that gzip and uncompressed data are read transparently."""
+        self.assertEqual(self.BODY, cache.decompress(gzip.compress(self.BODY)))
+        self.assertEqual(self.BODY, cache.decompress(self.BODY))
+
+    def test03_put_get(self):
+        """Test that cached bodies are stored compressed and read back."""
+        url = 'https://example.com/feed/live'
+        self.assertIsNone(self.cache.get(url))
+        self.cache.put(url, self.BODY)
+        self.assertEqual(self.BODY, self.cache.get(url))
+        self.assertLess(os.path.getsize(self.cache.path(url)),
+                        len(self.BODY))
+        self.assertEqual(self.BODY, cache.read_file(self.cache.path(url)))
+
+    def test04_max_age(self):
+        """Test that too old bodies are ignored."""
+        url = 'https://example.com/schedule'
+        self.cache.put(url, self.BODY)
+        an_hour_ago = time.time() - 3600
+        os.utime(self.cache.path(url), (an_hour_ago, an_hour_ago))
+        self.assertIsNone(self.cache.get(url, max_age=60))
+        self.assertEqual(self.BODY, self.cache.get(url, max_age=7200))
+        self.assertAlmostEqual(3600, self.cache.age(url), delta=60)
+
+    def test05_prune(self):
+        """Test that old bodies go first when the cache is pruned."""
+        now = time.time()
+        urls = [f'https://example.com/game/{idx}' for idx in range(4)]
+        for idx, url in enumerate(urls):
+            self.cache.put(url, self.BODY)
+            mtime = now - (4 - idx) * 3600
+            os.utime(self.cache.path(url), (mtime, mtime))
+        size = os.path.getsize(self.cache.path(urls[0]))
+        self.assertEqual(4, len(list(self.cache.entries())))
+
+        self.assertEqual((1, size), self.cache.prune(max_age=3.5 * 3600))
+        self.assertIsNone(self.cache.get(urls[0]))
+        self.assertEqual((1, size), self.cache.prune(max_size=2 * size))
+        self.assertIsNone(self.cache.get(urls[1]))
+        self.assertEqual((0, 0), self.cache.prune(max_age=3 * 3600,
+                                                  max_size=2 * size))
+        self.assertEqual(self.BODY, self.cache.get(urls[3]))
+
+    def test06_stats(self):
+        """Test that lookups are counted and persisted."""
+        url = 'https://example.com/schedule'
+        self.cache.get(url)
+        self.cache.put(url, self.BODY)
+        self.cache.get(url)
+        self.cache.get(url, max_age=-1)
+        expected = {'hit': 1, 'stale': 1, 'miss': 1}
+        self.assertEqual(expected, self.cache.load_stats())
+        self.cache.save_stats()
+        self.assertEqual(dict.fromkeys(cache.LOOKUPS, 0), self.cache.lookups)
+
+        # statistics are shared by caches in the same directory
+        other = cache.ResponseCache(self.tmp_dir.name)
+        other.get(url)
+        other.save_stats()
+        expected['hit'] += 1
+        self.assertEqual(expected, self.cache.load_stats())
+        # the statistics file is not a cached body
+        self.assertEqual(1, len(list(self.cache.entries())))
+
+    def test07_content_size(self):
+        """Test that decompressed size is read without decompressing."""
+        url = 'https://example.com/teams'
+        self.cache.put(url, self.BODY)
+        self.assertEqual(len(self.BODY),
+                         cache.content_size(self.cache.path(url)))
+        path = os.path.join(self.tmp_dir.name, 'plain')
+        with open(path, 'wb') as plain_file:
+            plain_file.write(self.BODY)
+        self.assertEqual(len(self.BODY), cache.content_size(path))
+
+    def test08_max_size(self):
+        """Test that a cache with max_size is pruned on writes."""
+        self.cache.put('https://example.com/size', self.BODY)
+        size = os.path.getsize(self.cache.path('https://example.com/size'))
+        limited = cache.ResponseCache(os.path.join(self.tmp_dir.name, 'lim'),
+                                      max_size=4 * size)
+        now = time.time()
+        urls = [f'https://example.com/game/{idx}' for idx in range(10)]
+        for idx, url in enumerate(urls):
+            limited.put(url, self.BODY)
+            mtime = now - (10 - idx) * 60
+            os.utime(limited.path(url), (mtime, mtime))
+        # pruned as soon as a tenth of max_size is written
+        self.assertEqual(4, len(list(limited.entries())))
+        self.assertEqual(self.BODY, limited.get(urls[-1]))
+        self.assertIsNone(limited.get(urls[0]))
+
+        # the cache is not pruned again before enough is written
+        unlimited = cache.ResponseCache(limited.directory)
+        for url in urls:
+            unlimited.put(url, self.BODY)
+        limited.max_size = 100 * size
+        limited.put(urls[0], self.BODY)
+        self.assertEqual(10, len(list(limited.entries())))
@@ -13,15 +13,30 @@ hockepy.commands module tests
 ------------------------
 """
 
+import argparse
+import contextlib
+import datetime
+import io
+import os
 import unittest
+from unittest import mock
 
-from hockepy import commands
+from hockepy import commands, nhl, ratings
+from hockepy.game import GameStatus
+from hockepy.schema import decode_boxscore, decode_schedule
 
 
 class TestCommands(unittest.TestCase):
     """Tests for hockepy.commands module.
     """
 
+    TEST_DATA = 'tests/test_data'
+
+    def read_test_data(self, name):
+        """Return contents of the given test data file."""
+        with open(os.path.join(self.TEST_DATA, name), 'rb') as data_file:
+            return data_file.read()
+
     def test01_command_registration(self):
         """Test that commands are properly registered."""
 
@@ -71,3 +86,60 @@ class TestCommands(unittest.TestCase):
 
         self.assertNotIn('abstract_dummy_command',
                          commands.BaseCommand.get_commands())
+
+    def test03_boxscore_game(self):
+        """Test that a game's box score is printed with its status."""
+        box = decode_boxscore(self.read_test_data('nhl_mock_boxscore.json'))
+        args = argparse.Namespace(first_date='2017020001', last_date=None,
+                                  totals=True)
+        command = commands.Boxscore(args)
+
+        with mock.patch('hockepy.nhl.get_game_boxscore',
+                        return_value=(GameStatus.FINAL, box)) as get, \
+                contextlib.redirect_stdout(io.StringIO()) as out:
+            command.run()
+        get.assert_called_once_with(2017020001, False)
+        lines = out.getvalue().splitlines()
+        self.assertEqual('Game 2017020001 (final)', lines[0])
+        self.assertTrue(lines[2].startswith('Shire Halflings: '))
+
+        # the game can't be retrieved
+        for result in (None, OSError('unreachable')):
+            with mock.patch('hockepy.nhl.get_game_boxscore',
+                            side_effect=[result]), \
+                    contextlib.redirect_stdout(io.StringIO()) as out:
+                command.run()
+            self.assertEqual(['Game 2017020001',
+                              '  Box score not available.'],
+                             out.getvalue().splitlines()[:2])
+
+    def test04_ratings_start_date(self):
+        """Test that ratings are updated from the day before the watermark.
+
+        The watermark is in UTC - a game at 8 PM ET on 2017-07-06 is
+        a game of 2017-07-07 in UTC.
+        """
+        watermark = (datetime.datetime(2017, 7, 7, 0, 30,
+                                       tzinfo=datetime.timezone.utc),
+                     2017030001)
+        state = ratings.Ratings(watermark=watermark)
+        command = commands.Ratings(argparse.Namespace(since=None))
+        self.assertEqual('2017-07-06', command.get_start_date(state))
+        command = commands.Ratings(argparse.Namespace(since='2017-01-01'))
+        self.assertEqual('2017-01-01', command.get_start_date(state))
+
+    def test05_odds_games(self):
+        """Test that odds use final regular season games' last plays only."""
+        days = decode_schedule(self.read_test_data('nhl_mock_schedule.json'))
+        with mock.patch('hockepy.nhl.get_schedule_days',
+                        return_value=days) as get_days, \
+                mock.patch('hockepy.nhl.get_last_plays',
+                           return_value={}) as get_last_plays:
+            games = commands.Odds.get_games()
+        self.assertEqual(1, get_days.call_count)
+        get_last_plays.assert_called_once_with([201707040001, 201707070002],
+                                               max_age=nhl.FOREVER)
+        self.assertEqual([201707040001, 201707070002],
+                         [game.game_id for game in games])
+        self.assertEqual([(2, 1), (6, 5)],
+                         [(game.home_id, game.away_id) for game in games])
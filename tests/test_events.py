@@ -0,0 +1,103 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.events module tests
+------------------------
+"""
+
+import asyncio
+import copy
+import json
+import os
+import threading
+import unittest
+from unittest import mock
+
+from hockepy import events, nhl
+
+
+class TestEvents(unittest.TestCase):
+    """Tests for hockepy.events module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def setUp(self):
+        """Prepare a sequence of live feeds of a game in progress.
+
+        The first feed has 10 plays, every other feed one more, the last
+        feed is final.
+        """
+        with open(os.path.join(self.TEST_DATA, 'nhl_mock_feed.json'),
+                  encoding='utf-8') as feed_file:
+            feed = json.loads(feed_file.read())
+        plays = feed['liveData']['plays']['allPlays']
+        self.feeds = []
+        for count in range(10, len(plays) + 1):
+            snapshot = copy.deepcopy(feed)
+            snapshot['liveData']['plays']['allPlays'] = plays[:count]
+            self.feeds.append(json.dumps(snapshot).encode())
+        feed['gameData']['status']['statusCode'] = '7'
+        self.feeds.append(json.dumps(feed).encode())
+        self.all_plays = [nhl.get_play_tuple(play) for play in plays]
+
+    def test01_subscribe_shares_poller(self):
+        """Test that all subscribers share one poller and get new plays."""
+        received = {'all': [], 'goals': [], 'team': []}
+        closed = threading.Event()
+        closed_count = []
+
+        def on_close():
+            closed_count.append(1)
+            if len(closed_count) == 3:
+                closed.set()
+
+        with mock.patch.object(nhl, 'get_feed',
+                               side_effect=self.feeds) as get_feed:
+            subscriptions = [
+                events.subscribe(
+                    1, lambda game, play: received['all'].append(play),
+                    interval=0.01, on_close=on_close),
+                events.subscribe(
+                    1, lambda game, play: received['goals'].append(play),
+                    event_types=['GOAL'], on_close=on_close),
+                events.subscribe(
+                    1, lambda game, play: received['team'].append(play),
+                    team=5, on_close=on_close),
+            ]
+            self.assertTrue(closed.wait(5))
+
+        self.assertEqual(len(self.feeds), get_feed.call_count)
+        # the plays already in the first feed are not dispatched
+        self.assertEqual(self.all_plays[10:], received['all'])
+        self.assertEqual([self.all_plays[12]], received['goals'])
+        self.assertEqual([self.all_plays[12]], received['team'])
+        self.assertTrue(all(sub.closed for sub in subscriptions))
+
+    def test02_iter_plays(self):
+        """Test that plays can be iterated over asynchronously."""
+        async def collect():
+            return [play async for play in events.iter_plays(
+                2, interval=0.01)]
+
+        with mock.patch.object(nhl, 'get_feed', side_effect=self.feeds):
+            plays = asyncio.run(collect())
+        self.assertEqual(self.all_plays[10:], plays)
+
+    def test03_poll_survives_errors(self):
+        """Test that a failed feed request doesn't stop the poller."""
+        feeds = [OSError('Connection reset')] + self.feeds
+        with mock.patch.object(nhl, 'get_feed', side_effect=feeds):
+            plays = []
+            closed = threading.Event()
+            events.subscribe(3, lambda _game_id, play: plays.append(play),
+                             interval=0.01, on_close=closed.set)
+            self.assertTrue(closed.wait(5))
+        self.assertEqual(self.all_plays[10:], plays)
@@ -0,0 +1,64 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.ingest module tests
+------------------------
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from hockepy import ingest, nhl
+
+
+class TestIngest(unittest.TestCase):
+    """Tests for hockepy.ingest module."""
+
+    FEED_PATH = os.path.join('tests', 'test_data', 'nhl_mock_feed.json')
+
+    def setUp(self):
+        """Load expected plays from the mock feed."""
+        with open(self.FEED_PATH, encoding='utf-8') as feed_file:
+            plays = json.loads(feed_file.read())['liveData']['plays']
+        self.expected = tuple(nhl.get_play_tuple(play)
+                              for play in plays['allPlays'])
+
+    def test01_parse_feed(self):
+        """Test that a stored feed is parsed into plays."""
+        feed = ingest.parse_feed(self.FEED_PATH)
+        self.assertEqual(ingest.GameFeed(self.FEED_PATH, 201707070003,
+                                         self.expected),
+                         feed)
+
+    def test02_ingest_feeds_keeps_order(self):
+        """Test that parallel ingestion keeps the order of sources."""
+        sources = [self.FEED_PATH] * 7
+        for workers in (1, 2):
+            feeds = list(ingest.ingest_feeds(sources, workers=workers,
+                                             chunksize=2))
+            self.assertEqual(sources, [feed.source for feed in feeds])
+            self.assertTrue(all(feed.plays == self.expected
+                                for feed in feeds))
+
+    def test03_ingest_feeds_errors(self):
+        """Test that feeds that can't be parsed don't stop ingestion."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            malformed = os.path.join(tmp_dir, 'malformed.json')
+            with open(malformed, 'w', encoding='utf-8') as feed_file:
+                feed_file.write('{"gamePk": 1}')
+            sources = [self.FEED_PATH, malformed,
+                       os.path.join(tmp_dir, 'missing.json'), self.FEED_PATH]
+            for workers in (1, 2):
+                feeds = list(ingest.ingest_feeds(sources, workers=workers))
+                self.assertEqual([self.FEED_PATH, None, None, self.FEED_PATH],
+                                 [feed and feed.source for feed in feeds])
@@ -15,13 +15,18 @@ hockepy.nhl module tests
 
 import json
 import os
+import tempfile
+import threading
+import time
 import unittest
 from datetime import datetime
+from unittest import mock
 
 import requests
 
 from hockepy import nhl
 from hockepy.game import Game, GameStatus, GameType, Play
+from hockepy.transport import OfflineError
 
 
 class TestNhl(unittest.TestCase):
@@ -42,7 +47,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2014-01-01T18:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('SO', '65:00', 'Game End')),
+                 last_play=('SO', '65:00', 'Game End'),
+                 home_id=17,
+                 away_id=10),
             Game(home='Vancouver Canucks',
                  away='Tampa Bay Lightning',
                  home_score=2,
@@ -50,7 +57,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2014-01-02T03:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game End')),
+                 last_play=('3rd', '60:00', 'Game End'),
+                 home_id=23,
+                 away_id=14),
         ]},
         '2016-06-01': {'2016-06-01': [
             Game(home='Pittsburgh Penguins',
@@ -60,7 +69,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2016-06-02T00:00:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.FINAL,
-                 last_play=('OT', '62:35', 'Game End')),
+                 last_play=('OT', '62:35', 'Game End'),
+                 home_id=5,
+                 away_id=28),
         ]},
         '2016-07-01': None,
         '2017-02-05': {'2017-02-05': [
@@ -71,7 +82,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-02-05T19:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game End')),
+                 last_play=('3rd', '60:00', 'Game End'),
+                 home_id=3,
+                 away_id=20),
             Game(home='Montréal Canadiens',
                  away='Edmonton Oilers',
                  home_score=0,
@@ -79,7 +92,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-02-05T18:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('SO', '65:00', 'Game Official')),
+                 last_play=('SO', '65:00', 'Game Official'),
+                 home_id=8,
+                 away_id=22),
             Game(home='Washington Capitals',
                  away='Los Angeles Kings',
                  home_score=5,
@@ -87,7 +102,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-02-05T17:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game End')),
+                 last_play=('3rd', '60:00', 'Game End'),
+                 home_id=15,
+                 away_id=26),
         ]},
         '2020-08-02': {'2020-08-02': [
             Game(home='Nashville Predators',
@@ -97,7 +114,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2020-08-02T18:00:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game Official')),
+                 last_play=('3rd', '60:00', 'Game Official'),
+                 home_id=18,
+                 away_id=53),
             Game(home='Boston Bruins',
                  away='Philadelphia Flyers',
                  home_score=1,
@@ -105,7 +124,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2020-08-02T19:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game Official')),
+                 last_play=('3rd', '60:00', 'Game Official'),
+                 home_id=6,
+                 away_id=4),
             Game(home='Colorado Avalanche',
                  away='St. Louis Blues',
                  home_score=2,
@@ -113,7 +134,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2020-08-02T22:30:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game Official')),
+                 last_play=('3rd', '60:00', 'Game Official'),
+                 home_id=21,
+                 away_id=19),
             Game(home='Toronto Maple Leafs',
                  away='Columbus Blue Jackets',
                  home_score=0,
@@ -121,7 +144,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2020-08-03T00:00:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game Official')),
+                 last_play=('3rd', '60:00', 'Game Official'),
+                 home_id=10,
+                 away_id=29),
             Game(home='Vancouver Canucks',
                  away='Minnesota Wild',
                  home_score=0,
@@ -129,7 +154,9 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2020-08-03T02:30:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.FINAL,
-                 last_play=('3rd', '60:00', 'Game Official')),
+                 last_play=('3rd', '60:00', 'Game Official'),
+                 home_id=23,
+                 away_id=30),
         ]}
     }
 
@@ -142,7 +169,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-04T21:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=None)
+                 last_play=None,
+                 home_id=2,
+                 away_id=1,
+                 game_id=201707040001)
         ],
         '2017-07-07': [
             Game(home='Hill Valley Time Travelers',
@@ -152,7 +182,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-08T00:00:00+0000', TIME_FMT),
                  type=GameType.PRESEASON,
                  status=GameStatus.FINAL,
-                 last_play=None),
+                 last_play=None,
+                 home_id=4,
+                 away_id=3,
+                 game_id=201707070001),
             Game(home='Castle Black Crows',
                  away='Los Santos Gangsters',
                  home_score=0,
@@ -160,7 +193,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-08T03:00:00+0000', TIME_FMT),
                  type=GameType.REGULAR,
                  status=GameStatus.FINAL,
-                 last_play=None),
+                 last_play=None,
+                 home_id=6,
+                 away_id=5,
+                 game_id=201707070002),
             Game(home='Shire Halflings',
                  away='Hogsmeade Wizards',
                  home_score=1,
@@ -168,7 +204,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-07T20:30:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.LIVE,
-                 last_play=None),
+                 last_play=None,
+                 home_id=8,
+                 away_id=7,
+                 game_id=201707070003),
         ],
         '2017-07-08': [
             Game(home='Smallville Reporters',
@@ -178,7 +217,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-09T01:00:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.LIVE,
-                 last_play=None),
+                 last_play=None,
+                 home_id=10,
+                 away_id=9,
+                 game_id=201707080001),
             Game(home='Asgard Gods',
                  away='Hill Valley Time Travelers',
                  home_score=0,
@@ -186,7 +228,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-08T21:30:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.SCHEDULED,
-                 last_play=None),
+                 last_play=None,
+                 home_id=12,
+                 away_id=4,
+                 game_id=201707080002),
             Game(home='Hogsmeade Wizards',
                  away='Gotham City Bats',
                  home_score=0,
@@ -194,7 +239,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-09T01:30:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.SCHEDULED,
-                 last_play=None),
+                 last_play=None,
+                 home_id=7,
+                 away_id=2,
+                 game_id=201707080004),
             Game(home='Shire Halflings',
                  away='Springfield Electrons',
                  home_score=0,
@@ -202,7 +250,10 @@ class TestNhl(unittest.TestCase):
                  time=None,
                  type=GameType.PLAYOFFS,
                  status=GameStatus.SCHEDULED,
-                 last_play=None),
+                 last_play=None,
+                 home_id=8,
+                 away_id=1,
+                 game_id=201707080004),
             Game(home='Twins Freys',
                  away='Winterfell Starks',
                  home_score=0,
@@ -210,7 +261,10 @@ class TestNhl(unittest.TestCase):
                  time=datetime.strptime('2017-07-09T01:00:00+0000', TIME_FMT),
                  type=GameType.PLAYOFFS,
                  status=GameStatus.POSTPONED,
-                 last_play=None),
+                 last_play=None,
+                 home_id=8,
+                 away_id=1,
+                 game_id=201707080009),
         ]
     }
 
@@ -446,7 +500,9 @@ class TestNhl(unittest.TestCase):
                 self.assertEqual(len(day_schedule), len(schedule))
                 self.assertEqual(len(day_schedule[day]), len(schedule[day]))
                 for game in schedule[day]:
-                    self.assertIn(game, day_schedule[day])
+                    # game IDs are not part of the known schedule
+                    self.assertIn(game._replace(game_id=None),
+                                  day_schedule[day])
 
     def test02_get_schedule_empty(self):
         """Test that get_schedule() behaves correctly for no games days.
@@ -516,3 +572,379 @@ class TestNhl(unittest.TestCase):
         for play in plays:
             idx = play['about']['eventIdx']
             self.assertEqual(nhl.get_play_tuple(play), self.MOCK_PLAYS[idx])
+
+    def test10_refresh_mock(self):
+        """Test that refresh() updates only games that may change.
+
+        Instead of hitting NHL API, mock live feed is used for every
+        refreshed game.
+        """
+        feed_path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(feed_path, 'rb') as feed_file:
+            feed = feed_file.read()
+
+        schedule = {day: list(games)
+                    for day, games in self.MOCK_SCHEDULE.items()}
+        # partial and stale games are complete and up to date once
+        # refreshed
+        stale = schedule['2017-07-07'][2]
+        schedule['2017-07-07'][2] = stale._replace(partial=True, age=60)
+        with mock.patch.object(nhl.HockeyClient, 'get_feed',
+                               return_value=feed) as get_feed:
+            changed = nhl.refresh(schedule)
+
+        # live and scheduled games only
+        self.assertEqual(5, get_feed.call_count)
+        self.assertEqual(5, len(changed))
+        old, new = changed[0]
+        self.assertEqual(stale._replace(partial=True, age=60), old)
+        self.assertEqual(
+            stale._replace(home_score=0,
+                           away_score=1,
+                           last_play=Play(period='1st',
+                                          time='07:15',
+                                          description='Meriadoc Brandybuck '
+                                                      'Holding against '
+                                                      'Rubeus Hagrid')),
+            new)
+        self.assertIs(new, schedule['2017-07-07'][2])
+        self.assertEqual(self.MOCK_SCHEDULE['2017-07-04'],
+                         schedule['2017-07-04'])
+
+        # games with malformed feeds are left as they are
+        bad_feed = json.loads(feed)
+        bad_feed['gameData']['status']['statusCode'] = 'X'
+        with mock.patch.object(nhl.HockeyClient, 'get_feed',
+                               return_value=json.dumps(bad_feed)):
+            self.assertEqual([], nhl.refresh(schedule))
+
+    def test11_schedule_url(self):
+        """Test that the schedule URL requests the used fields only."""
+        self.assertEqual(
+            nhl.SCHEDULE_URL + '?startDate=2020-01-01&endDate=2020-04-01'
+            '&fields=' + nhl.SCHEDULE_FIELDS,
+            nhl.schedule_url('2020-01-01', '2020-04-01'))
+
+    def test12_parse_schedule_deadline(self):
+        """Test that feeds missing the deadline are abandoned.
+
+        The game whose feed is slow is marked as partial and the rest of
+        the schedule is parsed normally.
+        """
+        sched_path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(sched_path, 'rb') as schedule_file:
+            schedule = schedule_file.read()
+        slow_game_id = 201707070003
+        release = threading.Event()
+        daemons = set()
+
+        def get_feed(game_id, *args, **kwargs):
+            # pylint: disable=unused-argument
+            daemons.add(threading.current_thread().daemon)
+            if game_id == slow_game_id:
+                release.wait(5)
+            return None
+
+        with mock.patch.object(nhl.HockeyClient, 'get_feed',
+                               side_effect=get_feed):
+            start = time.monotonic()
+            parsed = nhl.parse_schedule(schedule, start + 0.2)
+            elapsed = time.monotonic() - start
+            release.set()
+
+        self.assertLess(elapsed, 2)
+        # abandoned requests must not keep the process running
+        self.assertEqual({True}, daemons)
+        for day, games in self.MOCK_SCHEDULE.items():
+            for game in games:
+                self.assertIn(
+                    game._replace(partial=game.game_id == slow_game_id),
+                    parsed[day])
+
+    def test13_client(self):
+        """Test a client with its own transport shared across threads."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(path, 'rb') as feed_file:
+            feed = feed_file.read()
+        transport = mock.Mock()
+        transport.get.return_value = feed
+        client = nhl.HockeyClient(api_url='https://example.com/api/',
+                                  transport=transport, live_ttl=5)
+
+        self.assertEqual('https://example.com/api/game/1/feed/live',
+                         client.feed_url(1))
+        self.assertEqual(5, client.feed_max_age(GameStatus.LIVE))
+        self.assertIsNone(nhl.HockeyClient().feed_max_age(GameStatus.LIVE))
+
+        plays = client.plays(201707070003)
+        self.assertEqual(14, len(plays))
+        self.assertTrue(all(isinstance(play, Play) for play in plays))
+        self.assertEqual(plays[-1], client.last_play(201707070003))
+
+        results = []
+
+        def get_last_play():
+            results.append(client.last_play(201707070003))
+
+        threads = [threading.Thread(target=get_last_play) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([plays[-1]] * 8, results)
+        self.assertEqual(10, transport.get.call_count)
+
+    def test14_get_last_plays(self):
+        """Test bulk retrieval of last plays with per-game errors."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(path, 'rb') as feed_file:
+            feed = feed_file.read()
+        bodies = {'/1/': feed, '/3/': b'{}', '/4/': b'not JSON'}
+
+        def get(url, *args, **kwargs):
+            # pylint: disable=unused-argument
+            if '/2/' in url:
+                raise requests.exceptions.ConnectionError('unreachable')
+            return next(body for key, body in bodies.items() if key in url)
+
+        transport = mock.Mock()
+        transport.get.side_effect = get
+        client = nhl.HockeyClient(transport=transport, feed_workers=3)
+        last_plays = client.get_last_plays([4, 1, 2, 3, 1])
+
+        self.assertEqual([4, 1, 2, 3], list(last_plays))
+        self.assertEqual('Meriadoc Brandybuck Holding against Rubeus '
+                         'Hagrid', last_plays[1].description)
+        self.assertEqual([None, None, None],
+                         [last_plays[2], last_plays[3], last_plays[4]])
+        self.assertEqual(4, transport.get.call_count)
+        self.assertEqual({}, client.get_last_plays([]))
+
+    def test15_iter_schedule(self):
+        """Test that days are streamed as soon as their feeds are ready."""
+        sched_path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(sched_path, 'rb') as schedule_file:
+            schedule = schedule_file.read()
+        transport = mock.Mock()
+        transport.get.return_value = schedule
+        client = nhl.HockeyClient(transport=transport, feed_workers=2)
+        released = threading.Event()
+
+        def get_last_play_tuple(game_id, *_):
+            # feeds of the last day are only retrieved once released
+            if game_id // 10000 == 20170708:
+                released.wait(5)
+            return None
+
+        with mock.patch.object(client, 'get_last_play_tuple',
+                               side_effect=get_last_play_tuple):
+            days = client.iter_schedule('2017-07-04', '2017-07-08')
+            self.assertEqual(1, transport.get.call_count)
+            self.assertEqual('2017-07-04', next(days)[0])
+            self.assertEqual('2017-07-07', next(days)[0])
+            released.set()
+            date, games = next(days)
+            self.assertEqual('2017-07-08', date)
+            self.assertEqual(self.MOCK_SCHEDULE[date], games)
+            self.assertEqual([], list(days))
+
+            # games missing the deadline are partial
+            released.clear()
+            days = dict(client.iter_parsed_schedule(
+                schedule, deadline=time.monotonic() + 0.2))
+            released.set()
+        self.assertEqual(list(self.MOCK_SCHEDULE), list(days))
+        self.assertFalse(any(game.partial for game in days['2017-07-07']))
+        self.assertTrue(all(game.partial for game in days['2017-07-08']))
+
+    def test16_get_offline_schedule(self):
+        """Test that schedules are assembled from local data only."""
+        sched_path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(sched_path) as schedule_file:
+            schedule = json.load(schedule_file)
+        feed_path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(feed_path, 'rb') as feed_file:
+            feed = feed_file.read()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = nhl.HockeyClient(cache_dir=cache_dir)
+            client.transport.session = mock.Mock(side_effect=AssertionError)
+            cache = client.transport.cache
+            with self.assertRaises(OfflineError):
+                client.get_offline_schedule('2017-07-04', '2017-07-08')
+
+            # single days as cached by the prefetch daemon
+            for day in range(4, 9):
+                date = f'2017-07-{day:02}'
+                dates = [entry for entry in schedule['dates']
+                         if entry['date'] == date]
+                body = {'totalGames': sum(len(entry['games'])
+                                          for entry in dates),
+                        'dates': dates}
+                cache.put(client.schedule_url(date, date),
+                          json.dumps(body).encode())
+            feed_url = client.feed_url(201707070003,
+                                       projected=nhl.CURRENT_PLAY)
+            cache.put(feed_url, feed)
+            an_hour_ago = time.time() - 3600
+            os.utime(cache.path(feed_url), (an_hour_ago, an_hour_ago))
+
+            sched = client.get_offline_schedule('2017-07-04', '2017-07-08')
+            self.assertEqual(list(self.MOCK_SCHEDULE), list(sched))
+            games = {game.game_id: game
+                     for games in sched.values() for game in games}
+            self.assertAlmostEqual(3600, games[201707070003].age, delta=60)
+            self.assertIsNotNone(games[201707070003].last_play)
+            self.assertLess(games[201707040001].age, 60)
+            self.assertEqual(self.MOCK_SCHEDULE['2017-07-04'][0],
+                             games[201707040001]._replace(age=None))
+
+            # teams are filtered locally if needed
+            sched = client.get_offline_schedule('2017-07-04', '2017-07-08',
+                                                team_ids={1})
+            self.assertEqual(['2017-07-04', '2017-07-08'], list(sched))
+            self.assertTrue(all(1 in (game.home_id, game.away_id)
+                                for games in sched.values()
+                                for game in games))
+
+    def test17_parse_schedule_bad_feeds(self):
+        """Test that games with unavailable or malformed feeds are partial."""
+        sched_path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(sched_path, 'rb') as schedule_file:
+            schedule = schedule_file.read()
+        errors = {201707070001: requests.exceptions.ConnectionError('down'),
+                  201707080002: ValueError('not JSON')}
+
+        def get_last_play_tuple(game_id, *_, **__):
+            if game_id in errors:
+                raise errors[game_id]
+            return None
+
+        client = nhl.HockeyClient(transport=mock.Mock(), feed_workers=2)
+        with mock.patch.object(client, 'get_last_play_tuple',
+                               side_effect=get_last_play_tuple):
+            parsed = [
+                client.parse_schedule(schedule),
+                client.parse_schedule(schedule, time.monotonic() + 5),
+                dict(client.iter_parsed_schedule(schedule)),
+            ]
+        for sched in parsed:
+            self.assertEqual(list(self.MOCK_SCHEDULE), list(sched))
+            for games in sched.values():
+                for game in games:
+                    self.assertEqual(game.game_id in errors, game.partial)
+
+    def test18_default_client_workers(self):
+        """Test that module functions use the client's feed_workers."""
+        transport = mock.Mock()
+        transport.get.return_value = b'{}'
+        nhl.set_client(nhl.HockeyClient(transport=transport, feed_workers=2))
+        try:
+            with mock.patch('hockepy.nhl.ThreadPoolExecutor',
+                            wraps=nhl.ThreadPoolExecutor) as executor:
+                nhl.get_last_plays([1, 2, 3])
+                nhl.get_boxscores(dict.fromkeys([1, 2, 3]))
+        finally:
+            nhl.set_client(None)
+        self.assertEqual([2, 2], [call.kwargs['max_workers']
+                                  for call in executor.call_args_list])
+
+    def test19_get_boxscores(self):
+        """Test retrieval of box scores with per-game errors."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_boxscore.json')
+        with open(path, 'rb') as boxscore_file:
+            boxscore = boxscore_file.read()
+
+        malformed = json.loads(boxscore)
+        malformed['teams']['home']['teamStats']['teamSkaterStats'][
+            'faceOffWinPercentage'] = ''
+        malformed = json.dumps(malformed).encode()
+
+        def get(url, *args, **kwargs):
+            # pylint: disable=unused-argument
+            if '/2/' in url:
+                raise requests.exceptions.ConnectionError('unreachable')
+            if '/4/' in url:
+                return malformed
+            return boxscore if '/1/' in url else b'{}'
+
+        transport = mock.Mock()
+        transport.get.side_effect = get
+        client = nhl.HockeyClient(transport=transport, feed_workers=3)
+        box = client.get_boxscore(1, max_age=nhl.FOREVER)
+        self.assertEqual('Shire Halflings', box.home.team)
+        url, _, max_age = transport.get.call_args.args
+        self.assertIn('/1/boxscore?fields=', url)
+        self.assertEqual(nhl.FOREVER, max_age)
+        with self.assertRaises(KeyError):
+            client.get_boxscore(3)
+
+        boxscores = client.get_boxscores({1: None, 2: None, 3: 60, 4: None})
+        self.assertEqual({1: box, 2: None, 3: None, 4: None}, boxscores)
+        self.assertEqual({}, client.get_boxscores({}))
+
+    def test20_team_filter_cached(self):
+        """Test that schedules of teams are filtered from the whole one."""
+        sched_path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(sched_path, 'rb') as schedule_file:
+            schedule = schedule_file.read()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = nhl.HockeyClient(cache_dir=cache_dir, schedule_ttl=60)
+            client.transport.session = mock.Mock(side_effect=AssertionError)
+            # the whole schedule as warmed by hockepy.prefetch
+            client.transport.cache.put(
+                client.schedule_url('2017-07-04', '2017-07-08'), schedule)
+            with mock.patch.object(client, 'get_last_play_tuple',
+                                   return_value=None) as last_play:
+                sched = client.get_schedule('2017-07-04', '2017-07-08', {1})
+                streamed = dict(client.iter_schedule('2017-07-04',
+                                                     '2017-07-08', {1}))
+                cached, _ = client.get_cached_schedule('2017-07-04',
+                                                       '2017-07-08', {1})
+            # no other requests than the (cached) whole schedule
+            self.assertEqual(3, client.transport.cache.lookups['hit'])
+        expected = {date: [game for game in games
+                           if 1 in (game.home_id, game.away_id)]
+                    for date, games in self.MOCK_SCHEDULE.items()}
+        expected = {date: games for date, games in expected.items() if games}
+        self.assertEqual(expected, sched)
+        self.assertEqual(expected, streamed)
+        self.assertEqual(expected, cached)
+        # live feeds of the wanted games only
+        self.assertEqual(
+            {game.game_id for games in expected.values() for game in games},
+            {call.args[0] for call in last_play.call_args_list})
+
+    def test21_get_game_boxscore(self):
+        """Test that status and box score come from a single feed.
+
+        The feed of a final game is then used from the cache forever.
+        """
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_boxscore.json')
+        with open(path, 'rb') as boxscore_file:
+            boxscore = json.load(boxscore_file)
+        feed = {'gameData': {'status': {'statusCode': '3'}},
+                'liveData': {'boxscore': boxscore}}
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = nhl.HockeyClient(cache_dir=cache_dir, live_ttl=5)
+            with mock.patch.object(client.transport.session, 'get') as get:
+                get.return_value.status_code = 200
+                get.return_value.headers = {}
+                get.return_value.content = json.dumps(feed).encode()
+                status, box = client.get_game_boxscore(1)
+                self.assertEqual(GameStatus.LIVE, status)
+                self.assertEqual('Shire Halflings', box.home.team)
+                self.assertEqual(1, get.call_count)
+                self.assertIn(
+                    client.feed_url(1, nhl.BOXSCORE), get.call_args.args)
+
+                feed['gameData']['status']['statusCode'] = '7'
+                client.transport.cache.put(
+                    client.feed_url(1, nhl.BOXSCORE),
+                    json.dumps(feed).encode())
+                get.reset_mock()
+                status, _ = client.get_game_boxscore(1)
+                self.assertEqual(GameStatus.FINAL, status)
+                get.assert_not_called()
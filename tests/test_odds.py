@@ -0,0 +1,82 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.odds module tests
+------------------------
+"""
+
+import unittest
+
+from hockepy import odds
+from hockepy.game import Game, GameStatus, GameType, Play
+
+
+def _game(home, away, home_score=0, away_score=0, status=GameStatus.FINAL,
+          period='3', game_type=GameType.REGULAR):
+    """Return a Game with the given teams (IDs) and result."""
+    return Game(home=f'Team {home}', away=f'Team {away}',
+                home_score=home_score, away_score=away_score, time=None,
+                type=game_type, status=status,
+                last_play=Play(period, '20:00', 'End'), home_id=home,
+                away_id=away)
+
+
+class TestOdds(unittest.TestCase):
+    """Tests for hockepy.odds module."""
+
+    GAMES = [
+        _game(1, 2, 3, 1),
+        _game(2, 3, 2, 1, period='OT'),
+        _game(3, 4, 0, 1, period='SO'),
+        _game(4, 1, 5, 0, game_type=GameType.PRESEASON),
+        _game(1, 3, status=GameStatus.SCHEDULED),
+        _game(2, 4, status=GameStatus.LIVE),
+        _game(3, 1, status=GameStatus.POSTPONED),
+    ]
+
+    def test01_standings(self):
+        """Test standings with overtime and shootout losses."""
+        standings = odds.get_standings(self.GAMES)
+        self.assertEqual({1: 2, 2: 2, 3: 2, 4: 2}, standings.points)
+        self.assertEqual({1: 1, 2: 2, 3: 2, 4: 1}, standings.played)
+
+    def test02_remaining(self):
+        """Test that scheduled and live regular season games remain."""
+        self.assertEqual([(1, 3), (2, 4)],
+                         odds.get_remaining(self.GAMES))
+
+    @unittest.skipIf(odds.numpy is None, 'NumPy is not installed')
+    def test03_simulate(self):
+        """Test simulated playoff odds."""
+        standings = odds.Standings(points={1: 10, 2: 0, 3: 4, 4: 4},
+                                   played={1: 5, 2: 5, 3: 5, 4: 5})
+        remaining = [(3, 4)]
+        probs = odds.simulate(standings, remaining, sims=20000, spots=2,
+                              seed=1)
+        self.assertEqual(1.0, probs[1])
+        self.assertEqual(0.0, probs[2])
+        self.assertAlmostEqual(odds.HOME_WIN_PROB, probs[3], delta=0.02)
+        self.assertAlmostEqual(2.0, sum(probs.values()))
+
+        conferences = {1: 'East', 2: 'East', 3: 'West', 4: 'West'}
+        probs = odds.simulate(standings, remaining, sims=1000, spots=2,
+                              conferences=conferences, seed=1)
+        self.assertEqual(1.0, probs[1])
+        self.assertEqual(0.0, probs[2])
+
+    @unittest.skipIf(odds.numpy is None, 'NumPy is not installed')
+    def test04_simulate_workers(self):
+        """Test that simulations split among processes add up."""
+        standings = odds.get_standings(self.GAMES)
+        remaining = odds.get_remaining(self.GAMES)
+        probs = odds.simulate(standings, remaining, sims=2 * odds.BATCH_SIZE,
+                              spots=2, workers=2, seed=1)
+        self.assertAlmostEqual(2.0, sum(probs.values()))
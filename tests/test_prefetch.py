@@ -0,0 +1,96 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.prefetch module tests
+------------------------
+"""
+
+import os
+import unittest
+from datetime import date, datetime, timezone
+from unittest import mock
+
+from hockepy import prefetch, schema
+
+
+class TestPrefetch(unittest.TestCase):
+    """Tests for hockepy.prefetch module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def setUp(self):
+        """Decode the mock schedule."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(path, 'rb') as schedule_file:
+            self.days = schema.decode_schedule(schedule_file.read())
+
+    def test01_due_games(self):
+        """Test that live games and games about to start are due."""
+        now = datetime(2017, 7, 8, 21, 27, tzinfo=timezone.utc)
+        self.assertEqual([201707070003, 201707080001, 201707080002],
+                         prefetch.due_games(self.days, now, lead=300))
+        self.assertEqual([201707070003, 201707080001],
+                         prefetch.due_games(self.days, now, lead=60))
+
+    def test02_next_wakeup(self):
+        """Test that the daemon wakes up ahead of the next game."""
+        now = datetime(2017, 7, 8, 21, 27, tzinfo=timezone.utc)
+        self.assertEqual(datetime(2017, 7, 9, 1, 25, tzinfo=timezone.utc),
+                         prefetch.next_wakeup(self.days, now, lead=300))
+        self.assertIsNone(prefetch.next_wakeup(
+            self.days, datetime(2017, 7, 10, tzinfo=timezone.utc)))
+
+    def test03_warm(self):
+        """Test that schedules and feeds of final games are warmed."""
+        days = {day.date: [day] for day in self.days}
+        requested = []
+
+        def get_schedule_days(start_date, end_date, max_age=None):
+            self.assertEqual(start_date, end_date)
+            requested.append((start_date, max_age))
+            return days.get(start_date)
+
+        with mock.patch('hockepy.nhl.get_schedule_days',
+                        side_effect=get_schedule_days), \
+                mock.patch('hockepy.nhl.get_feed',
+                           return_value=b'{}') as get_feed:
+            self.assertEqual((5, 3), prefetch.warm(
+                '2017-07-04', '2017-07-08', workers=2,
+                today=date(2017, 7, 8)))
+        self.assertEqual(['2017-07-04', '2017-07-05', '2017-07-06',
+                          '2017-07-07', '2017-07-07', '2017-07-08'],
+                         sorted(day for day, _ in requested))
+        self.assertEqual([prefetch.FOREVER],
+                         [age for day, age in requested
+                          if day == '2017-07-04'])
+        # a game was live when the past day was cached
+        self.assertEqual([prefetch.FOREVER, None],
+                         [age for day, age in requested
+                          if day == '2017-07-07'])
+        self.assertNotIn(prefetch.FOREVER, [age for day, age in requested
+                                            if day == '2017-07-08'])
+        self.assertEqual({201707040001, 201707070001, 201707070002},
+                         {call.args[0] for call in get_feed.call_args_list})
+
+    def test04_spawn_revalidation(self):
+        """Test that the revalidation runs in a detached process."""
+        with mock.patch('subprocess.Popen') as popen:
+            prefetch.spawn_revalidation('2017-07-04', '2017-07-08', {2, 1})
+        args = popen.call_args.args[0]
+        self.assertEqual(['-m', 'hockepy.prefetch', '2017-07-04',
+                          '2017-07-08', '1', '2'], args[1:])
+        self.assertTrue(popen.call_args.kwargs['start_new_session'])
+
+        with mock.patch('hockepy.prefetch.init_config'), \
+                mock.patch('hockepy.nhl.get_schedule') as get_schedule:
+            prefetch._main(args[3:])  # pylint: disable=protected-access
+        get_schedule.assert_called_once_with('2017-07-04', '2017-07-08',
+                                             {1, 2})
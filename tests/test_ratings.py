@@ -0,0 +1,155 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.ratings module tests
+------------------------
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from hockepy import ratings, schema
+from hockepy.game import Game, GameStatus, GameType
+
+START = datetime(2017, 10, 4, 23, 0, tzinfo=timezone.utc)
+
+
+def _game(idx, home_id, away_id, home_score, away_score,
+          status=GameStatus.FINAL, game_id=None):
+    """Return a regular season Game played idx days after START."""
+    return Game(home=str(home_id), away=str(away_id), home_score=home_score,
+                away_score=away_score, time=START + timedelta(days=idx),
+                type=GameType.REGULAR, status=status, last_play=None,
+                home_id=home_id, away_id=away_id,
+                game_id=game_id or 2017020001 + idx)
+
+
+class TestRatings(unittest.TestCase):
+    """Tests for hockepy.ratings module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    GAMES = [
+        _game(0, 1, 2, 3, 1),
+        _game(1, 2, 3, 2, 4),
+        _game(2, 3, 1, 1, 2),
+        _game(3, 1, 3, 0, 0, status=GameStatus.SCHEDULED),
+    ]
+
+    def test01_win_probability(self):
+        """Test win probabilities with the home advantage."""
+        state = ratings.Ratings({1: 1600.0, 2: 1400.0})
+        home_prob = ratings.Ratings().win_probability(3, 4)
+        self.assertGreater(home_prob, 0.5)
+        self.assertLess(home_prob, 0.6)
+        self.assertGreater(state.win_probability(1, 2), 0.75)
+        self.assertGreater(state.win_probability(2, 1), 0.25)
+        self.assertLess(state.win_probability(2, 1), 0.5)
+
+    def test02_update(self):
+        """Test that ratings are zero-sum and stop at unfinished games."""
+        state = ratings.Ratings()
+        self.assertEqual(3, state.update(self.GAMES))
+        self.assertAlmostEqual(3 * ratings.INITIAL_RATING,
+                               sum(state.ratings.values()))
+        self.assertGreater(state.rating(1), state.rating(2))
+        self.assertEqual((self.GAMES[2].time, self.GAMES[2].game_id),
+                         state.watermark)
+
+    def test03_incremental(self):
+        """Test that applied games are skipped by the watermark."""
+        state = ratings.Ratings()
+        state.update(self.GAMES[:2])
+        self.assertEqual(1, state.update(self.GAMES))
+        full = ratings.Ratings()
+        full.update(self.GAMES)
+        self.assertEqual(full.ratings, state.ratings)
+
+    def test04_new_season(self):
+        """Test that ratings regress to the mean in a new season."""
+        state = ratings.Ratings()
+        state.update(self.GAMES[:1])
+        before = state.rating(1) - ratings.INITIAL_RATING
+        state.update([_game(400, 2, 3, 1, 0, game_id=2018020001)])
+        self.assertAlmostEqual(before * (1 - ratings.SEASON_REGRESSION),
+                               state.rating(1) - ratings.INITIAL_RATING)
+
+    def test05_save_load(self):
+        """Test that the state survives saving and loading."""
+        state = ratings.Ratings()
+        state.update(self.GAMES)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ratings')
+            self.assertIsNone(ratings.load_ratings(path))
+            state.save(path)
+            loaded = ratings.load_ratings(path)
+        self.assertEqual(state.ratings, loaded.ratings)
+        self.assertEqual(state.watermark, loaded.watermark)
+        self.assertEqual(state.season, loaded.season)
+
+    def test06_iter_results(self):
+        """Test that schedules are retrieved chunk by chunk."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_schedule.json')
+        with open(path, 'rb') as schedule_file:
+            days = schema.decode_schedule(schedule_file.read())
+        with mock.patch('hockepy.nhl.get_schedule_days',
+                        return_value=days) as get_days:
+            games = list(ratings.iter_results('2017-07-01', '2017-07-10',
+                                              chunk_days=4))
+        self.assertEqual(3, get_days.call_count)
+        self.assertEqual(('2017-07-09', '2017-07-10'),
+                         get_days.call_args[0][:2])
+        self.assertEqual(3 * sum(len(day.games) for day in days),
+                         len(games))
+        chunk = [game.time for game in games[:len(games) // 3]
+                 if game.time is not None]
+        self.assertEqual(sorted(chunk), chunk)
+
+    def test07_update_unfinished(self):
+        """Test that only games of today or later stop applying results."""
+        today = (START + timedelta(days=3)).date()
+        games = [_game(0, 1, 2, 3, 1),
+                 # never finished, e.g. postponed without an update
+                 _game(1, 2, 3, 0, 0, status=GameStatus.SCHEDULED),
+                 _game(2, 3, 1, 1, 2),
+                 _game(3, 1, 3, 0, 0, status=GameStatus.LIVE),
+                 _game(4, 2, 1, 1, 2)]
+        state = ratings.Ratings()
+        self.assertEqual(2, state.update(games, today=today))
+        self.assertEqual((games[2].time, games[2].game_id), state.watermark)
+        self.assertEqual(1, state.update(games, today=today
+                                         + timedelta(days=2)))
+
+    def test08_chunk_max_age(self):
+        """Test that schedules cached once the games were over are final."""
+        # pylint: disable=protected-access
+        end = datetime(2017, 7, 10, tzinfo=timezone.utc)
+        now = end + timedelta(days=5)
+        transport = mock.Mock()
+        with mock.patch('hockepy.nhl.get_transport', return_value=transport):
+            # cached two days after the last day
+            transport.age.return_value = timedelta(days=3).total_seconds()
+            self.assertEqual(ratings.FOREVER, ratings._chunk_max_age(
+                '2017-07-01', '2017-07-10', now))
+            # cached before the last games were over
+            transport.age.return_value = timedelta(days=5).total_seconds()
+            self.assertIsNone(ratings._chunk_max_age(
+                '2017-07-01', '2017-07-10', now))
+            transport.age.return_value = None
+            self.assertIsNone(ratings._chunk_max_age(
+                '2017-07-01', '2017-07-10', now))
+            # the last games may still be played
+            with mock.patch.dict(ratings.CONF, {'schedule_ttl': 60}):
+                self.assertEqual(60, ratings._chunk_max_age(
+                    '2017-07-01', '2017-07-10', end + timedelta(hours=20)))
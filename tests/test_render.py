@@ -0,0 +1,138 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.render module tests
+------------------------
+"""
+
+import io
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from hockepy import teams
+from hockepy.game import Game, GameStatus, GameType, Play
+from hockepy.ratings import Ratings
+from hockepy.render import ScheduleRenderer
+from hockepy.utils import bold_text
+
+TIME = datetime(2017, 7, 8, 1, 30, tzinfo=timezone.utc)
+
+GAMES = [
+    Game(home='Shire Halflings', away='Hogsmeade Wizards', home_score=1,
+         away_score=0, time=TIME, type=GameType.PLAYOFFS,
+         status=GameStatus.LIVE,
+         last_play=Play(period='3rd', time='55:01', description='Goal'),
+         home_id=1, away_id=2),
+    Game(home='Asgard Gods', away='Gotham City Bats', home_score=2,
+         away_score=3, time=TIME, type=GameType.REGULAR,
+         status=GameStatus.FINAL,
+         last_play=Play(period='SO', time='65:00', description='End'),
+         home_id=3, away_id=4),
+    Game(home='Castle Black Crows', away='Shire Halflings', home_score=0,
+         away_score=0, time=None, type=GameType.PRESEASON,
+         status=GameStatus.SCHEDULED, last_play=None, home_id=5, away_id=1,
+         partial=True),
+]
+
+
+class TestRender(unittest.TestCase):
+    """Tests for hockepy.render module."""
+
+    def render(self, **kwargs):
+        """Return lines of the rendered mock day."""
+        out = io.StringIO()
+        ScheduleRenderer(out=out, **kwargs).render({'2017-07-07': GAMES})
+        return out.getvalue().split('\n')
+
+    def test01_render(self):
+        """Test rendering of a day of games."""
+        self.assertEqual([
+            'Schedule for 2017-07-07',
+            'PO   Hogsmeade Wizards @ Shire Halflings     01:30 UTC 0:1    '
+            '(live) - Goal (55:01)',
+            'R     Gotham City Bats @ Asgard Gods         01:30 UTC 3:2 SO '
+            '(final) ',
+            'PR     Shire Halflings @ Castle Black Crows  Time TBD        '
+            '(scheduled) (updating) ',
+            '',
+            '',
+        ], self.render())
+
+    def test02_home_first_and_highlight(self):
+        """Test the home team first and highlighted teams."""
+        lines = self.render(home_first=True, highlight_ids={1})
+        self.assertEqual(
+            f'PO     {bold_text("Shire Halflings")} : Hogsmeade Wizards   '
+            f'01:30 UTC 1:0    (live) - Goal (55:01)', lines[1])
+        self.assertTrue(lines[3].startswith(
+            f'PR  Castle Black Crows : {bold_text("Shire Halflings")}     '
+            f'Time TBD'))
+
+    def test03_win_probabilities(self):
+        """Test win probabilities of scheduled games."""
+        lines = self.render(ratings=Ratings({5: 1800.0}))
+        self.assertTrue(lines[3].endswith('(scheduled) (updating) 13%:87% '))
+        self.assertTrue(lines[2].endswith('(final) '))
+
+    def test04_write_per_day(self):
+        """Test that each day is written at once."""
+        out = mock.Mock()
+        ScheduleRenderer(out=out).render({'2017-07-07': GAMES,
+                                          '2017-07-08': []})
+        self.assertEqual(2, out.write.call_count)
+        self.assertEqual('Schedule for 2017-07-08\n'
+                         '  No games for 2017-07-08.\n\n',
+                         out.write.call_args[0][0])
+        out = mock.Mock()
+        ScheduleRenderer(out=out).render(None)
+        out.write.assert_called_once_with('No games at all.\n')
+
+    def test05_render_stream(self):
+        """Test that streamed days are written as soon as they come."""
+        out = mock.Mock()
+
+        def days():
+            yield '2017-07-07', GAMES
+            # the first day is written (and flushed) already
+            self.assertEqual(1, out.write.call_count)
+            self.assertEqual(1, out.flush.call_count)
+            yield '2017-07-08', []
+
+        ScheduleRenderer(out=out).render(days())
+        self.assertEqual(2, out.write.call_count)
+        out = mock.Mock()
+        ScheduleRenderer(out=out).render(iter(()))
+        out.write.assert_called_once_with('No games at all.\n')
+
+    def test06_data_age(self):
+        """Test that games are marked with the age of their local data."""
+        games = [GAMES[0]._replace(age=30), GAMES[0]._replace(age=3700),
+                 GAMES[0]]
+        out = io.StringIO()
+        ScheduleRenderer(out=out).render({'2017-07-07': games})
+        lines = out.getvalue().splitlines()
+        self.assertIn(' (live) [<1 min old] ', lines[1])
+        self.assertIn(' [1 h old] ', lines[2])
+        self.assertNotIn(' old]', lines[3])
+
+    def test07_highlight_streamed_teams(self):
+        """Test that teams registered while streaming are highlighted."""
+        def days():
+            # as nhl.iter_schedule() does when the day is retrieved
+            teams.register(1, 'Shire Halflings', 'SHR')
+            yield '2017-07-07', GAMES
+
+        out = io.StringIO()
+        ScheduleRenderer(out=out, highlight_names=['shr']).render(days())
+        lines = out.getvalue().splitlines()
+        self.assertIn(bold_text('Shire Halflings'), lines[1])
+        self.assertNotIn(bold_text('Hogsmeade Wizards'), lines[1])
@@ -0,0 +1,165 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.schema module tests
+------------------------
+"""
+
+import os
+import unittest
+from datetime import datetime, timezone
+
+from hockepy import schema
+
+
+class TestSchema(unittest.TestCase):
+    """Tests for hockepy.schema module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def read_test_data(self, name):
+        """Return raw contents of the given test data file."""
+        with open(os.path.join(self.TEST_DATA, name), 'rb') as data_file:
+            return data_file.read()
+
+    def test01_decode_schedule_mock(self):
+        """Test that the mock schedule is decoded into typed tuples."""
+        days = schema.decode_schedule(
+            self.read_test_data('nhl_mock_schedule.json'))
+
+        self.assertEqual(['2017-07-04', '2017-07-07', '2017-07-08'],
+                         [day.date for day in days])
+        self.assertEqual([1, 3, 5], [len(day.games) for day in days])
+        self.assertEqual(
+            schema.ScheduleGame(
+                game_id=201707040001,
+                game_type='R',
+                time=datetime(2017, 7, 4, 21, 0, tzinfo=timezone.utc),
+                status_code='7',
+                home_id=2,
+                home='Gotham City Bats',
+                home_score=2,
+                away_id=1,
+                away='Springfield Electrons',
+                away_score=3),
+            days[0].games[0])
+
+    def test02_decode_schedule_time_tbd(self):
+        """Test that games with time TBD have no time."""
+        days = schema.decode_schedule(
+            self.read_test_data('nhl_mock_schedule.json'))
+        tbd = [game for game in days[2].games if game.status_code == '8']
+        self.assertEqual(1, len(tbd))
+        self.assertIsNone(tbd[0].time)
+
+    def test03_decode_schedule_empty(self):
+        """Test that an empty schedule is decoded as None."""
+        self.assertIsNone(schema.decode_schedule(
+            self.read_test_data('nhl_empty_schedule.json')))
+
+    def test04_decode_play(self):
+        """Test that plays are decoded and empty plays are ignored."""
+        plays = schema.loads(
+            self.read_test_data('nhl_mock_plays.json'))['plays']
+        for play in plays:
+            decoded = schema.decode_play(play)
+            self.assertEqual(play['about']['ordinalNum'], decoded.ordinal)
+            self.assertEqual(play['result']['description'],
+                             decoded.description)
+        self.assertIsNone(schema.decode_play({}))
+        self.assertIsNone(schema.decode_play(None))
+
+    def test05_decode_current_play(self):
+        """Test that the current play is taken from a live feed."""
+        play = schema.loads(
+            self.read_test_data('nhl_mock_plays.json'))['plays'][0]
+        feed = {'liveData': {'plays': {'allPlays': [play],
+                                       'currentPlay': play}}}
+        self.assertEqual(schema.decode_play(play),
+                         schema.decode_current_play(feed))
+        feed['liveData']['plays'].pop('currentPlay')
+        self.assertIsNone(schema.decode_current_play(feed))
+
+    def test06_parse_time(self):
+        """Test that the API's time format is parsed as UTC."""
+        self.assertEqual(datetime(2020, 8, 3, 2, 30, tzinfo=timezone.utc),
+                         schema.parse_time('2020-08-03T02:30:00Z'))
+        self.assertIsNone(schema.parse_time('2020-48-03T02:30:00Z'))
+
+    def test07_decode_feed_game(self):
+        """Test that game's state is decoded from a live feed."""
+        game = schema.decode_feed_game(
+            self.read_test_data('nhl_mock_feed.json'))
+        self.assertEqual(201707070003, game.game_id)
+        self.assertEqual('3', game.status_code)
+        self.assertEqual((0, 1), (game.home_score, game.away_score))
+        self.assertEqual('Meriadoc Brandybuck Holding against Rubeus Hagrid',
+                         game.current_play.description)
+
+    def test08_schedule_projection_in_sync(self):
+        """Test that decoding needs only fields of SCHEDULE_PATHS."""
+        payload = self.read_test_data('nhl_mock_schedule.json')
+        projected = schema.project(payload, schema.SCHEDULE_PATHS)
+        self.assertNotIn('copyright', projected)
+        self.assertEqual(schema.decode_schedule(payload),
+                         schema.decode_schedule(projected))
+
+    def test09_feed_projection_in_sync(self):
+        """Test that decoding needs only fields of FEED_PATHS."""
+        payload = self.read_test_data('nhl_mock_feed.json')
+        projected = schema.project(payload, schema.FEED_PATHS)
+        self.assertEqual(schema.decode_feed_game(payload),
+                         schema.decode_feed_game(projected))
+        self.assertEqual(schema.decode_current_play(payload),
+                         schema.decode_current_play(projected))
+        # all the plays are left to the other projection
+        self.assertNotIn('allPlays', projected['liveData']['plays'])
+
+    def test10_fields_param(self):
+        """Test that the fields parameter lists all names of the paths."""
+        self.assertEqual('date,dates,gamePk,games,totalGames',
+                         schema.fields_param(['totalGames', 'dates.date',
+                                              'dates.games.gamePk']))
+
+    def test11_decode_boxscore(self):
+        """Test that a boxscore is decoded, players without stats skipped."""
+        payload = self.read_test_data('nhl_mock_boxscore.json')
+        box = schema.decode_boxscore(payload)
+        self.assertEqual(('Shire Halflings', 8, 2, 32),
+                         (box.home.team, box.home.team_id, box.home.goals,
+                          box.home.shots))
+        self.assertEqual(['Luna Lovegood', 'Ginny Weasley', 'Oliver Wood'],
+                         [player.name for player in box.away.players])
+        goalie = box.away.players[2]
+        self.assertEqual((30, 32, None), (goalie.saves, goalie.shots,
+                                          goalie.plus_minus))
+        self.assertEqual(box, schema.decode_boxscore(
+            schema.project(payload, schema.BOXSCORE_PATHS)))
+
+    def test12_plays_projection_in_sync(self):
+        """Test that PLAYS_PATHS keep all fields read from the plays."""
+        payload = self.read_test_data('nhl_mock_feed.json')
+        projected = schema.project(payload, schema.PLAYS_PATHS)
+        plays = schema.loads(payload)['liveData']['plays']['allPlays']
+        projected_plays = projected['liveData']['plays']['allPlays']
+        self.assertNotIn('currentPlay', projected['liveData']['plays'])
+        self.assertEqual(
+            [schema.decode_play(play) for play in plays],
+            [schema.decode_play(play) for play in projected_plays])
+        for play, projected_play in zip(plays, projected_plays):
+            self.assertEqual(play['about']['goals'],
+                             projected_play['about']['goals'])
+            self.assertEqual(play['result'].get('eventTypeId'),
+                             projected_play['result'].get('eventTypeId'))
+            self.assertEqual(play.get('team', {}).get('id'),
+                             projected_play.get('team', {}).get('id'))
+            self.assertEqual(play.get('coordinates'),
+                             projected_play.get('coordinates'))
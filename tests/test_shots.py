@@ -0,0 +1,118 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.shots module tests
+------------------------
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from hockepy import nhl, shots
+
+
+@unittest.skipIf(shots.numpy is None, 'NumPy is not installed')
+class TestShots(unittest.TestCase):
+    """Tests for hockepy.shots module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def setUp(self):
+        """Read the mock live feed."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(path, 'rb') as feed_file:
+            self.feed = feed_file.read()
+
+    def test01_collect_shots(self):
+        """Test that shots (and goals) are collected from a feed."""
+        found = shots.collect_shots([self.feed, None])
+        self.assertEqual([64, -75, 35], found.x.tolist())
+        self.assertEqual([3, 0, 25], found.y.tolist())
+        self.assertEqual([False, False, True], found.goal.tolist())
+        self.assertEqual([5, 15, 5], found.team_id.tolist())
+
+        found = shots.collect_shots([self.feed], team_id=15)
+        self.assertEqual([-75], found.x.tolist())
+
+        # feeds without plays are skipped
+        found = shots.collect_shots([b'{"gamePk": 1}', self.feed,
+                                     b'{"liveData": {}}'])
+        self.assertEqual([64, -75, 35], found.x.tolist())
+        self.assertEqual(0, shots.collect_shots([b'{}']).x.size)
+
+    def test02_normalize(self):
+        """Test that shots are rotated to the positive x."""
+        found = shots.normalize(shots.collect_shots([self.feed]))
+        self.assertEqual([64, 75, 35], found.x.tolist())
+        self.assertEqual([3, 0, 25], [abs(y) for y in found.y.tolist()])
+
+    def test03_heatmap(self):
+        """Test that the heatmap is normalized and has the shape wanted."""
+        found = shots.collect_shots([self.feed])
+        hist, x_edges, y_edges = shots.heatmap(found, bins=(10, 5))
+        self.assertEqual((10, 5), hist.shape)
+        self.assertEqual(11, len(x_edges))
+        self.assertEqual(6, len(y_edges))
+        self.assertAlmostEqual(1.0, hist.sum())
+        # goal at (35, 25) -> x bin 3, y bin 3
+        hist, _, _ = shots.heatmap(found, bins=(10, 5), goals_only=True)
+        self.assertEqual(1.0, hist[3, 3])
+
+    def test04_no_shots(self):
+        """Test a heatmap of no shots."""
+        hist, _, _ = shots.heatmap(shots.collect_shots([]), bins=(2, 3))
+        self.assertEqual(0, hist.sum())
+        self.assertEqual('|   |\n|   |', shots.format_heatmap(hist))
+
+    def test05_save_heatmap(self):
+        """Test saving the heatmap as a CSV file."""
+        hist, x_edges, y_edges = shots.heatmap(
+            shots.collect_shots([self.feed]), bins=(2, 2))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'heatmap.csv')
+            shots.save_heatmap(path, hist, x_edges, y_edges)
+            with open(path, encoding='utf-8') as csv_file:
+                lines = csv_file.read().splitlines()
+        self.assertEqual('x,y,value', lines[0])
+        self.assertEqual(5, len(lines))
+        self.assertAlmostEqual(1.0, sum(float(line.split(',')[2])
+                                        for line in lines[1:]))
+
+    def test06_normalize_by_attack(self):
+        """Test that shots are normalized by the net the team attacked."""
+        numpy = shots.numpy
+        found = shots.Shots(
+            x=numpy.array([80, 70, -30, -80, -60, 20, -50],
+                          dtype=numpy.float32),
+            y=numpy.array([5, -5, 10, 5, -5, 10, 0], dtype=numpy.float32),
+            goal=numpy.zeros(7, dtype=bool),
+            team_id=numpy.array([1, 1, 1, 1, 1, 1, 2], dtype=numpy.int32),
+            period=numpy.array([1, 1, 1, 2, 2, 2, 1], dtype=numpy.int16),
+            game_id=numpy.ones(7, dtype=numpy.int64))
+        self.assertEqual([1, 1, 1, -1, -1, -1, -1],
+                         shots.attack_directions(found).tolist())
+        normalized = shots.normalize(found)
+        # shots from the team's own half stay there
+        self.assertEqual([80, 70, -30, 80, 60, -20, 50],
+                         normalized.x.tolist())
+        self.assertEqual([5, -5, 10, -5, 5, -10, 0], normalized.y.tolist())
+        self.assertEqual(0, shots.normalize(
+            shots.collect_shots([])).x.size)
+
+    def test07_iter_feeds_errors(self):
+        """Test that feeds that can't be retrieved are None."""
+        with mock.patch.object(nhl, 'get_feed',
+                               side_effect=[OSError('unreachable'),
+                                            ValueError('invalid'), b'{}']):
+            self.assertEqual([None, None, b'{}'], list(shots.iter_feeds(
+                {1: None, 2: None, 3: None}, workers=1)))
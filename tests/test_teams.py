@@ -0,0 +1,84 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.teams module tests
+------------------------
+"""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from hockepy import teams
+
+
+class TestTeams(unittest.TestCase):
+    """Tests for hockepy.teams module."""
+
+    def test01_register_interns_names(self):
+        """Test that registered names are shared string objects."""
+        name = ''.join(['Gotham ', 'City ', 'Bats'])
+        first = teams.register(1002, name)
+        second = teams.register(1002, ''.join(['Gotham City ', 'Bats']))
+        self.assertIs(first, second)
+        self.assertIs(first, teams.team_name(1002))
+
+    def test02_register_keeps_metadata(self):
+        """Test that metadata is kept when a team is registered again."""
+        teams.register(1006, 'Castle Black Crows', 'CBC', 'North', 'Wall')
+        teams.register(1006, 'Castle Black Crows')
+        self.assertEqual(
+            teams.Team(1006, 'Castle Black Crows', 'CBC', 'North', 'Wall'),
+            teams.get_team(1006))
+
+    def test03_find_team_id(self):
+        """Test that teams are found by names, abbreviations and IDs."""
+        teams.register(1008, 'Shire Halflings', 'SHI')
+        self.assertEqual(1008, teams.find_team_id('Shire Halflings'))
+        self.assertEqual(1008, teams.find_team_id('shi'))
+        self.assertEqual(1008, teams.find_team_id('1008'))
+        self.assertEqual(1008, teams.find_team_id(1008))
+        self.assertIsNone(teams.find_team_id('Mordor Orcs'))
+        self.assertIsNone(teams.find_team_id(1666))
+
+    def test04_team_ids(self):
+        """Test that unknown teams are ignored by team_ids()."""
+        teams.register(1012, 'Asgard Gods', 'ASG')
+        self.assertEqual(frozenset({1012}),
+                         teams.team_ids(['Asgard Gods', 'ASG', 'Mordor Orcs']))
+
+    def test05_concurrent_register(self):
+        """Test that metadata registered by many threads is merged."""
+        def register(idx):
+            team, half = idx % 4, idx // 4 % 2
+            teams.register(1020 + team, f'Team {team}', f'T{team}',
+                           conference='East' if half else None,
+                           division=None if half else 'Metro')
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(register, range(400)))
+        self.assertEqual(
+            [teams.Team(1020 + idx, f'Team {idx}', f'T{idx}', 'East',
+                        'Metro') for idx in range(4)],
+            [teams.get_team(1020 + idx) for idx in range(4)])
+
+    def test06_register_renamed(self):
+        """Test that a renamed team is not found by its old names."""
+        teams.register(1030, 'Phoenix Coyotes', 'PHX')
+        teams.register(1030, 'Arizona Coyotes', 'ARI')
+        self.assertEqual(1030, teams.find_team_id('Arizona Coyotes'))
+        self.assertEqual(1030, teams.find_team_id('ARI'))
+        self.assertIsNone(teams.find_team_id('Phoenix Coyotes'))
+        self.assertIsNone(teams.find_team_id('PHX'))
+
+        # the kept abbreviation is still found
+        teams.register(1030, 'Utah Coyotes')
+        self.assertEqual(1030, teams.find_team_id('ari'))
+        self.assertIsNone(teams.find_team_id('Arizona Coyotes'))
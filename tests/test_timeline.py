@@ -0,0 +1,74 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.timeline module tests
+------------------------
+"""
+
+import json
+import os
+import unittest
+
+from hockepy import nhl, timeline
+
+
+@unittest.skipIf(timeline.numpy is None, 'NumPy is not installed')
+class TestTimeline(unittest.TestCase):
+    """Tests for hockepy.timeline module."""
+
+    TEST_DATA = 'tests/test_data'
+
+    def test01_elapsed_like_play_tuples(self):
+        """Test that elapsed times follow the rules of get_play_tuple()."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_plays.json')
+        with open(path, encoding='utf-8') as plays_file:
+            plays = json.loads(plays_file.read())['plays']
+
+        line = timeline.play_timeline(plays)
+        self.assertEqual(len(plays), len(line.elapsed))
+        for play, elapsed, period in zip(plays, line.elapsed, line.period):
+            mins, secs = nhl.get_play_tuple(play).time.split(':')
+            self.assertEqual(int(mins) * 60 + int(secs), elapsed)
+            self.assertEqual(play['about']['period'], period)
+
+    def test02_feed_timeline(self):
+        """Test events and score states of the mock live feed."""
+        path = os.path.join(self.TEST_DATA, 'nhl_mock_feed.json')
+        with open(path, 'rb') as feed_file:
+            line = timeline.feed_timeline(feed_file.read())
+
+        goal = timeline.event_code('GOAL')
+        goals = line.event == goal
+        self.assertEqual(1, goals.sum())
+        self.assertEqual([143], line.elapsed[goals].tolist())
+        self.assertEqual([0, 1], [line.home_score[-1], line.away_score[-1]])
+        self.assertEqual(timeline.event_code('GAME_SCHEDULED'),
+                         line.event[0])
+
+    def test03_unknown_and_empty(self):
+        """Test unknown event types and a game without plays."""
+        self.assertEqual(0, timeline.event_code('NO_SUCH_EVENT'))
+        line = timeline.play_timeline([])
+        self.assertEqual(0, len(line.elapsed))
+        self.assertEqual(0, len(line.home_score))
+
+    def test04_game_clock(self):
+        """Test that game clocks are validated."""
+        # pylint: disable=protected-access
+        self.assertEqual([754, 5, 1200],
+                         timeline._parse_clock(['12:34', '00:05',
+                                                '20:00']).tolist())
+        self.assertEqual([65, 720],
+                         timeline._parse_clock(['1:05', '12:00']).tolist())
+        for times in (['12:34', '1234a'], ['12:3x'], ['12:75'], ['1:5'],
+                      ['12-34'], [None]):
+            with self.assertRaises(ValueError):
+                timeline._parse_clock(times)
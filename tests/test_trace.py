@@ -0,0 +1,85 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.trace module tests
+------------------------
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from hockepy import trace
+
+
+class TestTrace(unittest.TestCase):
+    """Tests for hockepy.trace module."""
+
+    def tearDown(self):
+        """Make sure tracing is disabled after each test."""
+        trace.disable()
+
+    def test01_disabled(self):
+        """Test that nothing is collected when tracing is disabled."""
+        self.assertFalse(trace.is_enabled())
+        with trace.span('outer', attr=1) as span:
+            span.set(other=2)
+        self.assertEqual([], trace.disable())
+
+    def test02_nested_spans(self):
+        """Test that nested spans are collected with attributes."""
+        trace.enable()
+        with trace.span('command', command='test'):
+            with trace.span('http.get', url='url') as span:
+                span.set(status=200)
+        events = trace.disable()
+        self.assertEqual(['http.get', 'command'],
+                         [event['name'] for event in events])
+        inner, outer = events
+        self.assertEqual('http', inner['cat'])
+        self.assertEqual({'url': 'url', 'status': 200}, inner['args'])
+        self.assertEqual('X', outer['ph'])
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'],
+                                inner['ts'] + inner['dur'])
+
+    def test03_errors_and_threads(self):
+        """Test spans failing with an exception and spans of threads."""
+        trace.enable()
+        with self.assertRaises(KeyError):
+            with trace.span('parse'):
+                raise KeyError('missing')
+
+        def run():
+            with trace.span('thread'):
+                pass
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        events = trace.disable()
+        self.assertEqual({'error': 'KeyError'}, events[0]['args'])
+        self.assertNotEqual(events[0]['tid'], events[1]['tid'])
+
+    def test04_write(self):
+        """Test that the trace file is in the Trace Event format."""
+        trace.enable()
+        with trace.span('render.day', date='2017-07-07'):
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            trace.write(path)
+            with open(path, encoding='utf-8') as trace_file:
+                data = json.load(trace_file)
+        self.assertEqual(1, len(data['traceEvents']))
+        self.assertEqual('render.day', data['traceEvents'][0]['name'])
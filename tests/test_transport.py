@@ -0,0 +1,68 @@
+# vim: set fileencoding=utf-8 :
+
+#  ____  ____    ____      ______  ___  ____   _________  ______    ____  ____
+# |_   ||   _| .'    `.  .' ___  ||_  ||_  _| |_   ___  ||_   __ \ |_  _||_  _|
+#   | |__| |  /  .--.  \/ .'   \_|  | |_/ /     | |_  \_|  | |__) |  \ \  / /
+#   |  __  |  | |    | || |         |  __'.     |  _|  _   |  ___/    \ \/ /
+#  _| |  | |_ \  `--'  /\ `.___.'\ _| |  \ \_  _| |___/ | _| |_       _|  |_
+# |____||____| `.____.'  `._____.'|____||____||_________||_____|     |______|
+#
+
+"""
+hockepy.transport module tests
+------------------------
+"""
+
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from hockepy.cache import ResponseCache
+from hockepy.transport import RateLimiter, Transport
+
+
+class TestTransport(unittest.TestCase):
+    """Tests for hockepy.transport module."""
+
+    def test01_rate_limiter(self):
+        """Test that bursts are allowed and the rate is kept after them."""
+        limiter = RateLimiter(50, burst=5)
+        start = time.monotonic()
+        waits = [limiter.acquire() for _ in range(10)]
+        elapsed = time.monotonic() - start
+        self.assertEqual([0] * 5, waits[:5])
+        self.assertTrue(all(wait > 0 for wait in waits[5:]))
+        # 5 requests over the burst at 50 requests per second
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test02_rate_limiter_threads(self):
+        """Test that threads share the limit."""
+        limiter = RateLimiter(100, burst=1)
+        threads = [threading.Thread(target=limiter.acquire)
+                   for _ in range(11)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test03_invalid_rate(self):
+        """Test that the rate must be positive."""
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+    def test04_fetch(self):
+        """Test that bodies served from the cache are told apart."""
+        url = 'https://example.com/feed/live'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            transport = Transport(ResponseCache(cache_dir))
+            transport.session = mock.Mock()
+            transport.session.get.return_value = mock.Mock(
+                status_code=200, content=b'{}', headers={}, raw=None)
+            self.assertEqual((b'{}', False), transport.fetch(url, max_age=60))
+            self.assertEqual((b'{}', True), transport.fetch(url, max_age=60))
+            self.assertEqual(b'{}', transport.get(url, offline=True))
+            self.assertEqual(1, transport.session.get.call_count)
@@ -40,3 +40,11 @@ class TestUtils(unittest.TestCase):
     def test03_local_timezone(self):
         """Test that local timezone is determined correctly."""
         self.assertEqual(time.localtime().tm_zone, str(utils.local_timezone()))
+
+    def test04_season_dates(self):
+        """Test that seasons span from autumn to spring."""
+        self.assertEqual(('2023-09-01', '2024-06-30'),
+                         utils.season_dates(2023))
+        first, last = utils.season_dates()
+        self.assertLessEqual(first, time.strftime('%Y-%m-%d'))
+        self.assertGreaterEqual(last, time.strftime('%Y-%m-%d'))